@@ -0,0 +1,109 @@
+"""
+Benchmarks APY extraction from the checked-in Aave page (aave_html_structure.html).
+
+"before" serializes the DOM and parses all of it with BeautifulSoup's html.parser,
+as AaveScraper used to. "after" runs the in-page query AaveScraper now uses, and
+"static" the selective parse of AaveScraper.get_apy_rates_from_html, with
+html.parser and with lxml (the default, see requirements.txt). The
+in-page timings need a Playwright Chromium (`playwright install chromium`); without
+it only the Python-side parse cost of the old approach is reported.
+
+Usage:
+    python benchmarks/bench_aave_extraction.py [--repeat 5]
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Dict, Optional
+
+from bs4 import BeautifulSoup
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.aave_scraper import EXTRACT_APY_SCRIPT, MARKET_ROW_PREFIX, MARKET_ROW_SELECTOR
+from src.text_extraction import PARSER_BACKEND, extract_apy_rates
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "aave_html_structure.html")
+TICKERS = ["USDT", "USDC", "DAI"]
+
+
+def legacy_extract(html: str) -> Dict[str, Optional[str]]:
+    """
+    The original extraction: a full html.parser tree, then one find() per ticker.
+
+    Args:
+        html: The serialized page.
+
+    Returns:
+        The APY text per ticker, None when missing.
+    """
+    apy_rates = dict.fromkeys(TICKERS)
+    soup = BeautifulSoup(html, "html.parser")
+    for ticker in apy_rates:
+        asset_div = soup.find("div", attrs={"data-cy": f"{MARKET_ROW_PREFIX}{ticker}"})
+        if asset_div:
+            apy_element = asset_div.find("p", attrs={"data-cy": "apy"})
+            if apy_element:
+                apy_rates[ticker] = apy_element.get_text(strip=True)
+    return apy_rates
+
+
+def _best_of(func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    Runs the benchmark and prints one line per extraction approach.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+
+    parse_time = _best_of(lambda: legacy_extract(html), args.repeat)
+    print(f"fixture: {len(html.encode('utf-8')) / 1e6:.2f} MB, rates: {legacy_extract(html)}")
+    print(f"before  html.parser full parse + find   {parse_time * 1000:9.1f} ms")
+    for backend in sorted({"html.parser", PARSER_BACKEND}):
+        extract = lambda backend=backend: extract_apy_rates(html, TICKERS, MARKET_ROW_PREFIX, backend)
+        strainer_time = _best_of(extract, args.repeat)
+        print(f"static  {backend:<11} market rows only     {strainer_time * 1000:9.1f} ms")
+
+    try:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as p:
+            browser = p.chromium.launch(headless=True)
+            page = browser.new_page()
+            page.set_content(html, wait_until="domcontentloaded")
+
+            serialize_time = _best_of(page.content, args.repeat)
+            arg = [MARKET_ROW_PREFIX, TICKERS]
+            query = lambda: page.eval_on_selector_all(MARKET_ROW_SELECTOR, EXTRACT_APY_SCRIPT, arg)
+            query_time = _best_of(query, args.repeat)
+            result = query()
+            browser.close()
+    except Exception as e:
+        print(f"after   skipped, no usable Chromium: {str(e).splitlines()[0]}")
+        return
+
+    print(f"before  page.content() serialization    {serialize_time * 1000:9.1f} ms")
+    print(
+        f"after   in-page query                   {query_time * 1000:9.1f} ms "
+        f"({len(json.dumps(result))} bytes returned: {result})"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Compares per-row and batched dedup/insert paths of Database.
+
+Usage:
+    python benchmarks/bench_database.py [--existing 100000] [--batch 100] [--cycles 50]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.database import Database
+
+
+def per_row_cycle(db: Database, ids):
+    """
+    One polling cycle the old way: a SELECT and a committed INSERT per filing.
+    """
+    for filing_id in ids:
+        if not db.filing_exists(filing_id):
+            db.add_filing(filing_id)
+
+
+def batched_cycle(db: Database, ids):
+    """
+    One polling cycle with a single query and a single transaction.
+    """
+    db.add_filings(db.filter_unprocessed(ids))
+
+
+def run(label: str, cycle, existing: int, batch: int, cycles: int, legacy_pragmas: bool):
+    """
+    Times `cycles` polling cycles of `batch` filings (half of them new) on a
+    fresh on-disk database pre-filled with `existing` IDs.
+    """
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(db_path=os.path.join(tmp_dir, "bench.db"))
+        if legacy_pragmas:
+            db.conn.execute("PRAGMA journal_mode=DELETE")
+            db.conn.execute("PRAGMA synchronous=FULL")
+        db.add_filings(f"old-{i}" for i in range(existing))
+
+        start = time.perf_counter()
+        for c in range(cycles):
+            ids = [f"old-{i}" for i in range(c * batch, c * batch + batch // 2)]
+            ids += [f"new-{c}-{i}" for i in range(batch - len(ids))]
+            cycle(db, ids)
+        elapsed = time.perf_counter() - start
+        db.close()
+
+    per_cycle_ms = elapsed / cycles * 1000
+    print(f"{label:<34} {per_cycle_ms:9.2f} ms/cycle  {cycles * batch / elapsed:10.0f} filings/s")
+
+
+def main():
+    """
+    Runs the benchmark and prints one line per configuration.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--existing", type=int, default=100000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--cycles", type=int, default=50)
+    args = parser.parse_args()
+
+    common = (args.existing, args.batch, args.cycles)
+    run("per-row, rollback journal (old)", per_row_cycle, *common, legacy_pragmas=True)
+    run("per-row, WAL + synchronous=NORMAL", per_row_cycle, *common, legacy_pragmas=False)
+    run("batched, WAL + synchronous=NORMAL", batched_cycle, *common, legacy_pragmas=False)
+
+
+if __name__ == "__main__":
+    main()
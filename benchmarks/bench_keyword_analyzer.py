@@ -0,0 +1,114 @@
+"""
+Benchmarks KeywordAnalyzer.analyze_filing against the original per-keyword loop.
+
+Usage:
+    python benchmarks/bench_keyword_analyzer.py [--sizes-mb 1 10 50] [--repeat 3]
+"""
+
+import argparse
+import os
+import random
+import re
+import sys
+import time
+from typing import Dict, List, Optional
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.keyword_analyzer import KeywordAnalyzer
+
+FILLER_WORDS = [
+    "the", "company", "revenue", "fiscal", "quarter", "net", "income", "operating",
+    "expenses", "shareholders", "pursuant", "section", "agreement", "material",
+    "adverse", "effect", "financial", "statements", "consolidated", "period",
+    "solder", "dotted", "adapt", "ethereal", "linked", "unit", "tonnage", "token",
+]
+
+
+def legacy_analyze_filing(filing_text: str) -> Dict[str, Optional[str]]:
+    """
+    The original implementation: one re.search per keyword per line.
+
+    Args:
+        filing_text: The full text of the SEC filing.
+
+    Returns:
+        The analysis result in the same shape as KeywordAnalyzer.analyze_filing.
+    """
+    detected_keywords = []
+    snippet = []
+    for line in filing_text.splitlines():
+        for keyword in KeywordAnalyzer.CRYPTO_KEYWORDS:
+            if re.search(r"\b" + re.escape(keyword) + r"\b", line, re.IGNORECASE):
+                detected_keywords.append(keyword)
+                snippet.append(re.sub(r"<[^>]*>", "", line.strip()))
+                break
+    if detected_keywords:
+        summary_text = (
+            f"Crypto keywords detected: {', '.join(set(detected_keywords))}. "
+            f"Snippet: {' '.join(snippet[:3])}..."
+        )
+        return {"crypto_detected": True, "summary": summary_text}
+    return {"crypto_detected": False, "summary": None}
+
+
+def make_synthetic_filing(size_bytes: int, hit_rate: float = 0.0005, seed: int = 0) -> str:
+    """
+    Builds a filing-like text of roughly size_bytes with sparse keyword hits.
+
+    Args:
+        size_bytes: Approximate size of the generated text.
+        hit_rate: Probability that a generated line mentions a crypto keyword.
+        seed: Seed for the random generator, so runs are reproducible.
+
+    Returns:
+        The generated text.
+    """
+    rng = random.Random(seed)
+    lines: List[str] = []
+    total = 0
+    while total < size_bytes:
+        words = rng.choices(FILLER_WORDS, k=rng.randint(6, 16))
+        if rng.random() < hit_rate:
+            words.insert(rng.randrange(len(words)), rng.choice(KeywordAnalyzer.CRYPTO_KEYWORDS))
+        line = "<p>" + " ".join(words) + "</p>"
+        lines.append(line)
+        total += len(line) + 1
+    return "\n".join(lines)
+
+
+def _time(func, text: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(text)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    """
+    Runs the benchmark and prints one line per filing size.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy-above-mb", type=float, default=10,
+                        help="Time the legacy loop once only above this size (it is slow).")
+    args = parser.parse_args()
+
+    analyzer = KeywordAnalyzer()
+    for size_mb in args.sizes_mb:
+        text = make_synthetic_filing(int(size_mb * 1024 * 1024))
+        legacy_repeat = 1 if size_mb > args.skip_legacy_above_mb else args.repeat
+        legacy = _time(legacy_analyze_filing, text, legacy_repeat)
+        current = _time(analyzer.analyze_filing, text, args.repeat)
+        print(
+            f"{size_mb:>7.1f} MB  legacy {legacy:8.3f}s  single-pass {current:8.3f}s  "
+            f"speedup {legacy / current:6.1f}x  ({size_mb / current:7.1f} MB/s)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+"""
+Runs the benchmark suite and optionally compares it with a saved baseline.
+
+Cases cover KeywordAnalyzer.analyze_filing and the memory-mapped
+analyze_path on synthetic filings, HTML text
+extraction and analysis of large synthetic inline XBRL exhibits, Atom feed
+parsing in SecEdgarClient.get_latest_filings, Database lookups and inserts,
+extract_filing_id, and Aave APY extraction from aave_html_structure.html (full
+parse and selective parse). Every case reports a throughput (higher is better)
+from the best of --repeat runs, and the results are written as JSON.
+
+The feed case parses benchmarks/fixtures/edgar_current_feed_synthetic.xml, a
+synthetic feed shaped like EDGAR's getcurrent page (see make_synthetic_feed),
+not a recording. To time a real page instead, save one from sec.gov and pass it
+with --feed; its result is reported under a separate name.
+
+Usage:
+    python benchmarks/bench_suite.py [--quick] [--output results.json]
+        [--baseline baseline.json] [--tolerance 0.2] [--only keyword feed ...]
+        [--feed recorded_feed.xml]
+
+Save the output of a run on the reference machine as the baseline; later runs
+exit with status 1 when a case is more than --tolerance slower than it.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from benchmarks.bench_aave_extraction import FIXTURE as AAVE_FIXTURE, legacy_extract
+from benchmarks.bench_keyword_analyzer import make_synthetic_filing
+from main import extract_filing_id
+from src.database import Database
+from src.keyword_analyzer import KeywordAnalyzer
+from src.sec_client import SecEdgarClient
+from src.aave_scraper import MARKET_ROW_PREFIX
+from src.text_extraction import PARSER_BACKEND, extract_apy_rates, html_to_text
+
+FEED_FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "edgar_current_feed_synthetic.xml")
+FORM_TYPES = ["8-K", "10-Q", "10-K", "4", "S-1", "424B2", "SC 13G", "6-K", "DEF 14A", "13F-HR"]
+
+Result = Dict[str, float]
+
+
+def make_synthetic_feed(entries: int = 100, seed: int = 0) -> str:
+    """
+    Builds an Atom document shaped like EDGAR's getcurrent feed.
+
+    This is how benchmarks/fixtures/edgar_current_feed_synthetic.xml was
+    generated (see --write-feed-fixture).
+
+    Args:
+        entries: Number of filings in the feed.
+        seed: Seed for the random generator, so the output is reproducible.
+
+    Returns:
+        The feed XML.
+    """
+    rng = random.Random(seed)
+    parts = [
+        '<?xml version="1.0" encoding="ISO-8859-1" ?>\n'
+        '<feed xmlns="http://www.w3.org/2005/Atom">\n'
+        '<title>Latest Filings - Mon, 14 Jul 2025 17:30:05 EDT</title>\n'
+        '<link rel="alternate" href="/cgi-bin/browse-edgar?action=getcurrent"/>\n'
+        '<link rel="self" href="/cgi-bin/browse-edgar?action=getcurrent"/>\n'
+        '<id>https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent</id>\n'
+        '<author><name>Webmaster</name><email>webmaster@sec.gov</email></author>\n'
+        '<updated>2025-07-14T17:30:05-04:00</updated>\n'
+    ]
+    for i in range(entries):
+        cik = rng.randint(1000000, 1999999)
+        accession = f"{cik:010d}-25-{rng.randint(1, 999999):06d}"
+        form = rng.choice(FORM_TYPES)
+        minute = 59 - i * 60 // entries
+        parts.append(
+            "<entry>\n"
+            f"<title>{form} - EXAMPLE COMPANY {i} INC ({cik:010d}) (Filer)</title>\n"
+            f'<link rel="alternate" type="text/html" href="https://www.sec.gov/Archives/edgar/data/'
+            f'{cik}/{accession.replace("-", "")}/{accession}-index.htm"/>\n'
+            f'<summary type="html"> &lt;b&gt;Filed:&lt;/b&gt; 2025-07-14 &lt;b&gt;AccNo:&lt;/b&gt; '
+            f"{accession} &lt;b&gt;Size:&lt;/b&gt; {rng.randint(5, 9000)} KB</summary>\n"
+            f"<updated>2025-07-14T17:{minute:02d}:05-04:00</updated>\n"
+            f'<category scheme="https://www.sec.gov/" label="form type" term="{form}"/>\n'
+            f"<id>urn:tag:sec.gov,2008:accession-number={accession}</id>\n"
+            "</entry>\n"
+        )
+    parts.append("</feed>\n")
+    return "".join(parts)
+
+
+def make_synthetic_html_exhibit(size_bytes: int, seed: int = 0) -> str:
+    """
+    Builds a full submission holding one inline XBRL HTML document.
+
+    Paragraphs of filler words are wrapped in styled spans, tagged facts, tables
+    and entities the way EDGAR's HTML exhibits are, after a hidden ix:header.
+
+    Args:
+        size_bytes: Approximate size of the generated submission.
+        seed: Seed for the random generator, so the output is reproducible.
+    """
+    text = make_synthetic_filing(size_bytes // 3, seed=seed)
+    parts = [
+        "<SEC-DOCUMENT>0001234567-25-000001.txt\n<DOCUMENT>\n<TYPE>10-K\n<FILENAME>form10k.htm\n<TEXT>\n"
+        "<XBRL>\n<?xml version='1.0' encoding='ASCII'?>\n<html xmlns=\"http://www.w3.org/1999/xhtml\">\n"
+        "<head><title>10-K</title><style>p { margin: 0 }</style></head>\n<body>\n"
+        '<div style="display:none"><ix:header><ix:hidden><ix:nonNumeric name="dei:Bitcoin">x'
+        "</ix:nonNumeric></ix:hidden></ix:header></div>\n"
+    ]
+    for i, line in enumerate(text.splitlines()):
+        words = line[3:-4]
+        if i % 10 == 0:
+            parts.append(
+                '<table style="border-collapse:collapse"><tr><td style="padding:0">Revenue&#160;</td>'
+                f'<td><ix:nonFraction name="us-gaap:Revenues" unitRef="usd" decimals="-3">{i},000'
+                "</ix:nonFraction></td></tr></table>\n"
+            )
+        parts.append(
+            '<p style="margin:0pt;text-align:justify"><span style="font-family:\'Times New Roman\';'
+            f"font-size:10pt\">{words} &#8217;s</span></p>\n"
+        )
+    parts.append("</body>\n</html>\n</XBRL>\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n")
+    return "".join(parts)
+
+
+def best_of(func: Callable[[], object], repeat: int) -> float:
+    """
+    Returns the fastest of `repeat` timed calls, in seconds.
+    """
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_keyword(sizes_mb: List[float], repeat: int) -> Dict[str, Result]:
+    """
+    Times analyze_filing on synthetic filings of each size.
+    """
+    analyzer = KeywordAnalyzer()
+    results = {}
+    for size_mb in sizes_mb:
+        text = make_synthetic_filing(int(size_mb * 1024 * 1024))
+        runs = repeat if size_mb <= 50 else 1
+        seconds = best_of(lambda text=text: analyzer.analyze_filing(text), runs)
+        results[f"keyword.analyze_filing.{size_mb:g}MB"] = {
+            "seconds": seconds, "throughput": len(text) / 1e6 / seconds, "unit": "MB/s",
+        }
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "filing.txt")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(text)
+            seconds = best_of(lambda path=path: analyzer.analyze_path(path), runs)
+        results[f"keyword.analyze_path.{size_mb:g}MB"] = {
+            "seconds": seconds, "throughput": len(text) / 1e6 / seconds, "unit": "MB/s",
+        }
+    return results
+
+
+def bench_html(sizes_mb: List[float], repeat: int) -> Dict[str, Result]:
+    """
+    Times HTML text extraction and analyze_filing on synthetic HTML exhibits.
+    """
+    analyzer = KeywordAnalyzer()
+    results = {}
+    for size_mb in sizes_mb:
+        submission = make_synthetic_html_exhibit(int(size_mb * 1024 * 1024))
+        runs = repeat if size_mb <= 50 else 1
+        mb = len(submission) / 1e6
+        seconds = best_of(lambda submission=submission: html_to_text(submission), runs)
+        results[f"html.html_to_text.{size_mb:g}MB"] = {"seconds": seconds, "throughput": mb / seconds, "unit": "MB/s"}
+        seconds = best_of(lambda submission=submission: analyzer.analyze_filing(submission), runs)
+        results[f"html.analyze_filing.{size_mb:g}MB"] = {
+            "seconds": seconds, "throughput": mb / seconds, "unit": "MB/s",
+        }
+    return results
+
+
+class _RecordedResponse:
+    """
+    Stands in for a requests.Response serving a saved feed body.
+    """
+
+    status_code = 200
+    headers: Dict[str, str] = {}
+    raw = None
+
+    def __init__(self, content: bytes):
+        self.content = content
+
+    def raise_for_status(self):
+        pass
+
+
+def bench_feed(repeat: int, feed_path: Optional[str] = None) -> Dict[str, Result]:
+    """
+    Times get_latest_filings parsing a saved feed page, with the network replaced.
+
+    Args:
+        repeat: Number of timed runs.
+        feed_path: A feed page recorded from sec.gov; by default the synthetic
+            fixture.
+    """
+    with open(feed_path or FEED_FIXTURE, "rb") as f:
+        content = f.read()
+    client = SecEdgarClient()
+    iterations = 20
+    with patch.object(client, "_get", lambda url, **kwargs: _RecordedResponse(content)):
+        filings = client.get_latest_filings()
+        assert filings, "the feed did not parse"
+
+        def run():
+            for _ in range(iterations):
+                client.get_latest_filings()
+
+        seconds = best_of(run, repeat) / iterations
+    name = "feed.get_latest_filings.recorded" if feed_path else "feed.get_latest_filings"
+    return {
+        name: {
+            "seconds": seconds, "throughput": len(filings) / seconds, "unit": "entries/s",
+        }
+    }
+
+
+def bench_database(repeat: int, existing: int = 100000, batch: int = 100) -> Dict[str, Result]:
+    """
+    Times batched lookups (cold and cached) and inserts on an on-disk database.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        db = Database(db_path=os.path.join(tmp_dir, "bench.db"), cache_size=0)
+        db.add_filings(f"old-{i}" for i in range(existing))
+        lookups = [f"old-{i}" for i in range(0, existing, existing // (batch * 20))][: batch * 20]
+        lookups += [f"new-{i}" for i in range(len(lookups))]
+
+        def lookup():
+            for start in range(0, len(lookups), batch):
+                db.filter_unprocessed(lookups[start:start + batch])
+
+        seconds = best_of(lookup, repeat)
+        results["database.filter_unprocessed"] = {
+            "seconds": seconds, "throughput": len(lookups) / seconds, "unit": "ids/s",
+        }
+
+        counter = [0]
+
+        def insert():
+            counter[0] += 1
+            for start in range(0, 2000, batch):
+                db.add_filings(f"ins-{counter[0]}-{i}" for i in range(start, start + batch))
+
+        seconds = best_of(insert, repeat)
+        results["database.add_filings"] = {
+            "seconds": seconds, "throughput": 2000 / seconds, "unit": "ids/s",
+        }
+        db.close()
+    return results
+
+
+def bench_extract_filing_id(repeat: int, count: int = 100000) -> Dict[str, Result]:
+    """
+    Times extract_filing_id over feed-style index URLs.
+    """
+    urls = [
+        f"https://www.sec.gov/Archives/edgar/data/{1000000 + i}/000{1000000 + i}25{i:06d}/"
+        f"000{1000000 + i}-25-{i:06d}-index.htm"
+        for i in range(count)
+    ]
+
+    def run():
+        for url in urls:
+            extract_filing_id(url)
+
+    seconds = best_of(run, repeat)
+    return {"main.extract_filing_id": {"seconds": seconds, "throughput": count / seconds, "unit": "urls/s"}}
+
+
+def bench_aave(repeat: int) -> Dict[str, Result]:
+    """
+    Times APY extraction from the checked-in Aave page.
+    """
+    with open(AAVE_FIXTURE, encoding="utf-8") as f:
+        html = f.read()
+    size_mb = len(html.encode("utf-8")) / 1e6
+    seconds = best_of(lambda: legacy_extract(html), repeat)
+    results = {"aave.html_parser_extract": {"seconds": seconds, "throughput": size_mb / seconds, "unit": "MB/s"}}
+    tickers = ["USDT", "USDC", "DAI"]
+    for backend in sorted({"html.parser", PARSER_BACKEND}):
+        extract = lambda backend=backend: extract_apy_rates(html, tickers, MARKET_ROW_PREFIX, backend)
+        assert extract() == legacy_extract(html)
+        seconds = best_of(extract, repeat)
+        results[f"aave.strainer_extract.{backend}"] = {
+            "seconds": seconds, "throughput": size_mb / seconds, "unit": "MB/s",
+        }
+    return results
+
+
+def compare(results: Dict[str, Result], baseline: Dict[str, Result], tolerance: float) -> List[str]:
+    """
+    Prints each case next to its baseline and returns the regressed case names.
+
+    Args:
+        results: This run's results.
+        baseline: The saved results to compare with.
+        tolerance: Allowed relative throughput drop, e.g. 0.2 for 20%.
+    """
+    regressions = []
+    for name, result in results.items():
+        reference = baseline.get(name)
+        if reference is None:
+            print(f"{name:<38} {result['throughput']:14.1f} {result['unit']:<10} (no baseline)")
+            continue
+        change = result["throughput"] / reference["throughput"] - 1
+        flag = ""
+        if change < -tolerance:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<38} {result['throughput']:14.1f} {result['unit']:<10} {change:+7.1%}{flag}")
+    return regressions
+
+
+SUITES = {
+    "keyword": lambda args: bench_keyword(args.sizes_mb, args.repeat),
+    "html": lambda args: bench_html(args.sizes_mb, args.repeat),
+    "feed": lambda args: bench_feed(args.repeat, args.feed),
+    "database": lambda args: bench_database(args.repeat),
+    "filing_id": lambda args: bench_extract_filing_id(args.repeat),
+    "aave": lambda args: bench_aave(args.repeat),
+}
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the selected benchmarks, writes the JSON results and compares them.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1, 10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--quick", action="store_true", help="Small filings only, one run per case")
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), help="Run only these suites")
+    parser.add_argument("--output", help="Write the results to this JSON file")
+    parser.add_argument("--baseline", help="Compare with the results saved in this JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--feed", help="Time this feed page saved from sec.gov instead of the synthetic one")
+    parser.add_argument("--write-feed-fixture", action="store_true",
+                        help="Regenerate the synthetic feed fixture and exit")
+    args = parser.parse_args(argv)
+
+    if args.write_feed_fixture:
+        os.makedirs(os.path.dirname(FEED_FIXTURE), exist_ok=True)
+        with open(FEED_FIXTURE, "w", encoding="iso-8859-1", newline="\n") as f:
+            f.write(make_synthetic_feed())
+        return 0
+    if args.quick:
+        args.sizes_mb = [0.1, 1]
+        args.repeat = 1
+
+    results: Dict[str, Result] = {}
+    for name in args.only or SUITES:
+        results.update(SUITES[name](args))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        },
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print(f"{len(regressions)} case(s) regressed by more than {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -6,7 +6,7 @@ from urllib.parse import urlparse
 
 from src.database import Database
 from src.keyword_analyzer import KeywordAnalyzer
-from src.sec_client import SecEdgarClient
+from src.sec_client import FETCH_PRIMARY, SecEdgarClient
 from src.telegram_client import TelegramClient
 from src.aave_scraper import AaveScraper
 
@@ -16,78 +16,722 @@ logging.basicConfig(
 )
 
 
+import argparse
 import logging
+import multiprocessing
+import os
+import signal
+import socket
+import sys
+import tempfile
 import time
-from datetime import datetime, timedelta
+from concurrent.futures import Executor, ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional
 from urllib.parse import urlparse
 
+import requests
 
+from src import metrics
+from src.analysis_executor import AnalysisExecutor, filing_size_hint
 from src.database import Database
+from src.edgar_index import (
+    DAILY, QUARTERLY, BackfillCheckpoint, form_selected, index_urls, parse_master_index, read_filing_batches,
+    spool_filings,
+)
+from src.job_queue import JobQueue, SqliteJobQueue
 from src.keyword_analyzer import KeywordAnalyzer
+from src.rate_limiter import RateLimiter
 from src.sec_client import SecEdgarClient
 from src.telegram_client import TelegramClient
 from src.aave_scraper import AaveScraper
+from src.scheduler import PollScheduler
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Filings of a backfill processed (and checkpointed) at a time
+BACKFILL_BATCH_SIZE = 200
+
 
-def main():
+def main(argv: Optional[List[str]] = None):
     """
     Main function to run the SEC EDGAR Crypto Alert Service.
+
+    With --role all (the default) one process polls the feed and processes the
+    filings itself. To scale out, run one --role poller, which queues new filings
+    in the job table, and any number of --role worker processes, which lease and
+    process them.
+
+    --role backfill processes the filings of a past date range (--start, --end)
+    from EDGAR's index files once and exits; run it again with the same options
+    to resume it.
     """
-    sec_client = SecEdgarClient()
+    parser = argparse.ArgumentParser(description="SEC EDGAR Crypto Alert Service")
+    parser.add_argument("--role", choices=["all", "poller", "worker", "backfill"],
+                        default=os.getenv("SERVICE_ROLE", "all"))
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")),
+                        help="Number of worker processes started by --role worker")
+    backfill = parser.add_argument_group("backfill")
+    backfill.add_argument("--start", type=date.fromisoformat, help="First filing date, YYYY-MM-DD")
+    backfill.add_argument("--end", type=date.fromisoformat, help="Last filing date (default: --start)")
+    backfill.add_argument("--form", action="append", help="Form type to process, e.g. 8-K (repeatable; default all)")
+    backfill.add_argument("--index", choices=[QUARTERLY, DAILY], default=QUARTERLY,
+                          help="Read quarterly full-index or daily-index files")
+    backfill.add_argument("--checkpoint", default=os.getenv("BACKFILL_CHECKPOINT", "backfill_checkpoint.json"),
+                          help="JSON file recording the progress of the backfill")
+    backfill.add_argument("--alert", action="store_true", help="Send Telegram alerts for backfilled filings")
+    args = parser.parse_args(argv)
+    exit_on_sigterm()
+
+    if args.role == "worker":
+        run_worker_processes(args.processes)
+        return
+    if args.role == "backfill":
+        if args.start is None:
+            parser.error("--role backfill requires --start")
+        run_backfill_command(args)
+        return
+
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.start_http_server(int(metrics_port), host=os.getenv("METRICS_HOST", "127.0.0.1"))
+
+    if args.role == "poller":
+        # The poller only reads the feed; the workers on this host share the rest
+        # of SEC's fair-access limit (see run_worker_processes).
+        sec_client = SecEdgarClient(rate_limiter=RateLimiter(poller_request_rate()))
+    else:
+        sec_client = SecEdgarClient()
     keyword_analyzer = KeywordAnalyzer()
-    telegram_client = TelegramClient()
-    aave_scraper = AaveScraper()
-    db = Database()
+    analysis_executor = open_analysis_executor(keyword_analyzer)
+    # Alerts are sent from a background thread so a burst of filings never waits
+    # on Telegram's flood limits.
+    telegram_client = TelegramClient(
+        background=os.getenv("TELEGRAM_BACKGROUND_SEND", "true").lower() in ("1", "true", "yes")
+    )
+    # A persistent scraper keeps Chromium running between polls, which makes short
+    # APY polling intervals cheap. It is only ever used from this thread.
+    aave_scraper = AaveScraper(
+        persistent=os.getenv("AAVE_PERSISTENT_BROWSER", "false").lower() in ("1", "true", "yes"),
+        max_uses=int(os.getenv("AAVE_BROWSER_MAX_USES", "100")),
+    )
+    db = Database(cache_size=int(os.getenv("DB_CACHE_SIZE", "20000")))
+    # Filings are downloaded and analyzed concurrently; the client's rate limiter
+    # keeps all workers together within SEC's fair-access limit.
+    executor = ThreadPoolExecutor(
+        max_workers=int(os.getenv("SEC_WORKERS", "8")), thread_name_prefix="filing"
+    )
+    job_queue = open_job_queue() if args.role == "poller" else None
+
+    retention_days = float(os.getenv("DB_RETENTION_DAYS", "90"))
+    # APY rates are sampled every poll interval, but only alerted on every alert
+    # interval (daily by default), so frequent sampling does not flood the chat.
+    apy_alert_interval = timedelta(minutes=float(os.getenv("AAVE_ALERT_INTERVAL_MINUTES", "1440")))
+    apy_poll_interval = timedelta(
+        minutes=float(os.getenv("AAVE_POLL_INTERVAL_MINUTES", str(apy_alert_interval.total_seconds() / 60)))
+    )
 
+    # Polls follow the rate of new filings and EDGAR's business hours instead
+    # of a fixed sleep.
+    scheduler = PollScheduler(
+        min_interval=float(os.getenv("POLL_MIN_SECONDS", "60")),
+        max_interval=float(os.getenv("POLL_MAX_SECONDS", "300")),
+        off_hours_interval=float(os.getenv("POLL_OFF_HOURS_SECONDS", "1800")),
+        target_new_filings=float(os.getenv("POLL_TARGET_NEW_FILINGS", "10")),
+        jitter=float(os.getenv("POLL_JITTER", "0.1")),
+        overrun_policy=os.getenv("POLL_OVERRUN_POLICY", "skip"),
+    )
+
+    last_apy_poll_time = None
     last_apy_alert_time = None # Initialize to None to send alert on first run
+    last_compaction_time = None
+
+    try:
+        while True:
+            scheduler.wait()
+            current_time = datetime.now()
+
+            # Sample the Aave APY rates and send the periodic alert with the latest ones
+            if last_apy_poll_time is None or (current_time - last_apy_poll_time) >= apy_poll_interval:
+                last_apy_poll_time = current_time
+                apy_rates = aave_scraper.get_apy_rates()
+                if any(apy_rates.values()):
+                    logging.info(f"Aave APY rates: {apy_rates}")
+                    if last_apy_alert_time is None or (current_time - last_apy_alert_time) >= apy_alert_interval:
+                        logging.info("Sending Aave APY alert...")
+                        telegram_client.send_aave_alert(apy_rates)
+                        last_apy_alert_time = current_time
+                else:
+                    logging.warning("Could not retrieve Aave APY rates.")
 
-    while True:
-        current_time = datetime.now()
+            # Prune old processed filings once a day to keep the database bounded
+            if last_compaction_time is None or (current_time - last_compaction_time) >= timedelta(days=1):
+                db.compact(retention_days)
+                if job_queue is not None:
+                    job_queue.purge(retention_days * 86400)
+                last_compaction_time = current_time
 
-        # Check for daily Aave APY alert
-        if last_apy_alert_time is None or (current_time - last_apy_alert_time) >= timedelta(days=1):
-            logging.info("Sending daily Aave APY alert...")
-            apy_rates = aave_scraper.get_apy_rates()
-            if apy_rates:
-                telegram_client.send_aave_alert(apy_rates)
-                last_apy_alert_time = current_time
+            logging.info("Checking for new SEC filings...")
+            if job_queue is not None:
+                new_filings = enqueue_new_filings(sec_client, db, job_queue)
             else:
-                logging.warning("Could not retrieve Aave APY rates.")
-
-        logging.info("Checking for new SEC filings...")
-        latest_filings = sec_client.get_latest_filings()
-
-        for filing in latest_filings:
-            filing_id = extract_filing_id(filing["link"])
-            if not db.filing_exists(filing_id):
-                logging.info(f"Processing new filing: {filing['title']}")
-                full_text = sec_client.get_full_filing_text(filing["link"])
-
-                if full_text:
-                    analysis = keyword_analyzer.analyze_filing(full_text)
-                    if analysis["crypto_detected"]:
-                        filing_details = {
-                            "company_name": filing["title"].split(" - ")[1],
-                            "form_type": filing["title"].split(" - ")[0],
-                            "filing_date": filing["published"] if filing["published"] is not None else "N/A",
-                            "link": filing["link"],
-                        }
-                        telegram_client.send_sec_alert(filing_details, analysis["summary"][:200])
-                    db.add_filing(filing_id)
+                new_filings = process_new_filings(
+                    sec_client, keyword_analyzer, telegram_client, db, executor, analysis_executor
+                )
+
+            delay = scheduler.record_poll(new_filings)
+            logging.info(f"Waiting {delay:.0f}s for the next check...")
+    finally:
+        aave_scraper.close()
+        executor.shutdown()
+        if analysis_executor is not None:
+            analysis_executor.close()
+        # Send the queued alerts and record their filings before closing the database.
+        telegram_client.close()
+        record_delivered_alerts(telegram_client, db)
+        if job_queue is not None:
+            job_queue.close()
+        db.close()
+
+
+def exit_on_sigterm():
+    """
+    Turns SIGTERM into SystemExit, so a stopped service cleans up (closes the
+    browser, sends the queued alerts) as it does on Ctrl-C.
+    """
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+
+
+def process_new_filings(
+    sec_client: SecEdgarClient,
+    keyword_analyzer: KeywordAnalyzer,
+    telegram_client: TelegramClient,
+    db: Database,
+    executor: Executor,
+    analysis_executor: Optional[AnalysisExecutor] = None,
+) -> int:
+    """
+    Runs one polling cycle: fetches the feed and processes every new filing.
+
+    Downloads and analysis run on the executor's workers. Database access and
+    alerts stay on the calling thread, which owns the SQLite connection, so each
+    filing is checked and recorded exactly once. Filings that raised an alert are
+    recorded immediately; the rest are recorded in one batch at the end.
+
+    Args:
+        sec_client: Client used for the feed and the filing downloads.
+        keyword_analyzer: Analyzer applied to each filing.
+        telegram_client: Client used to send alerts.
+        db: Database of processed filing IDs.
+        executor: Executor running fetch_and_analyze for each new filing.
+        analysis_executor: If given, analyzes large filings on its process pool.
+
+    Returns:
+        The number of new filings found in the feed.
+    """
+    cycle_start = time.monotonic()
+    latest_filings = sec_client.get_latest_filings(any_processed=lambda filings: any_processed(db, filings))
+    counts = process_filings(
+        sec_client, keyword_analyzer, telegram_client, db, executor, latest_filings, analysis_executor
+    )
+
+    cycle_seconds = time.monotonic() - cycle_start
+    metrics.CYCLE_SECONDS.observe(cycle_seconds)
+    logging.info(
+        f"Processed {counts['new']} new of {len(latest_filings)} filings "
+        f"in {cycle_seconds:.1f}s"
+    )
+    return counts['new']
+
+
+def process_filings(
+    sec_client: SecEdgarClient,
+    keyword_analyzer: KeywordAnalyzer,
+    telegram_client: Optional[TelegramClient],
+    db: Database,
+    executor: Executor,
+    filings: List[Dict[str, str]],
+    analysis_executor: Optional[AnalysisExecutor] = None,
+) -> Dict[str, int]:
+    """
+    Processes a batch of filings: every one not in the database yet is downloaded,
+    analyzed, alerted on if crypto is found, and recorded.
+
+    Downloads and analysis run on the executor's workers. Database access and
+    alerts stay on the calling thread, which owns the SQLite connection, so each
+    filing is checked and recorded exactly once. Filings without an alert are
+    recorded in one batch at the end. Filings that raised an alert are recorded
+    once Telegram accepted it, by this or a later call (see
+    record_delivered_alerts), and are skipped while the alert is in flight; an
+    alert lost to a crash or a failed send is raised again. Filings that could
+    not be processed are not recorded either, so they are tried again later.
+
+    Args:
+        sec_client: Client used for the filing downloads.
+        keyword_analyzer: Analyzer applied to each filing.
+        telegram_client: Client used to send alerts; None only logs detections.
+        db: Database of processed filing IDs.
+        executor: Executor running fetch_and_analyze for each new filing.
+        filings: Filing entries shaped like those of the feed.
+        analysis_executor: If given, analyzes large filings on its process pool.
+
+    Returns:
+        The number of new filings, of filings with crypto content, and of
+        filings that failed, including alerts that could not be sent.
+    """
+    filing_ids = [extract_filing_id(filing["link"]) for filing in filings]
+    # One query answers the whole batch instead of one SELECT per entry.
+    unprocessed = set(db.filter_unprocessed(filing_ids))
+    if telegram_client is not None:
+        unprocessed -= telegram_client.alerts_in_flight()
+
+    pending = {}
+    for filing, filing_id in zip(filings, filing_ids, strict=True):
+        if filing_id not in unprocessed:
+            logging.info(f"Skipping already processed filing: {filing['title']}")
+            continue
+        unprocessed.discard(filing_id)  # Submit entries repeated in the feed once
+        logging.info(f"Processing new filing: {filing['title']}")
+        future = executor.submit(fetch_and_analyze, sec_client, keyword_analyzer, filing, analysis_executor)
+        pending[future] = (filing_id, filing)
+
+    counts = {"new": len(pending), "alerts": 0, "failures": 0}
+    alerted = []
+    processed_without_alert = []
+    for future in as_completed(pending):
+        filing_id, filing = pending[future]
+        try:
+            analysis = future.result()
+        except Exception as e:
+            logging.error(f"Error processing filing {filing['link']}: {e}")
+            counts["failures"] += 1
+            continue
+
+        if analysis:
+            if analysis["crypto_detected"]:
+                counts["alerts"] += 1
+                if telegram_client is not None:
+                    send_filing_alert(telegram_client, filing, analysis, key=filing_id)
+                    alerted.append(filing_id)
                 else:
-                    logging.warning(
-                        f"Could not retrieve full text for {filing['link']}"
-                    )
+                    logging.info(f"Crypto content in {filing['title']}: {filing['link']}")
+                    db.add_filing(filing_id, crypto_detected=True)
+            else:
+                processed_without_alert.append(filing_id)
+        else:
+            logging.warning(
+                f"Could not retrieve full text for {filing['link']}"
+            )
+            counts["failures"] += 1
+
+    db.add_filings(processed_without_alert, crypto_detected=False)
+    if telegram_client is not None:
+        delivered = set(record_delivered_alerts(telegram_client, db))
+        in_flight = telegram_client.alerts_in_flight()
+        counts["failures"] += sum(
+            1 for filing_id in alerted if filing_id not in delivered and filing_id not in in_flight
+        )
+    return counts
+
+
+def record_delivered_alerts(telegram_client: TelegramClient, db: Database) -> List[str]:
+    """
+    Records the filings whose alerts Telegram accepted since the last call.
+
+    Returns:
+        Their filing IDs.
+    """
+    delivered = telegram_client.take_delivered()
+    db.add_filings(delivered, crypto_detected=True)
+    return delivered
+
+
+def any_processed(db: Database, filings: List[Dict[str, str]]) -> bool:
+    """
+    Tells whether any of the filings is in the database, with one query.
+    """
+    filing_ids = {extract_filing_id(filing["link"]) for filing in filings}
+    return len(db.filter_unprocessed(filing_ids)) < len(filing_ids)
+
+
+def send_filing_alert(
+    telegram_client: TelegramClient, filing: Dict[str, str], analysis: Dict, key: Optional[str] = None
+) -> None:
+    """
+    Sends the Telegram alert for a filing with crypto-related content.
+
+    Args:
+        telegram_client: Client used to send the alert.
+        filing: The filing entry from the feed.
+        analysis: The analysis result of the filing.
+        key: Key reported by TelegramClient.take_delivered once it was sent.
+    """
+    filing_details = {
+        "company_name": filing["title"].split(" - ")[1],
+        "form_type": filing["title"].split(" - ")[0],
+        "filing_date": filing["published"] if filing["published"] is not None else "N/A",
+        "link": filing["link"],
+    }
+    telegram_client.send_sec_alert(filing_details, analysis["summary"][:200], key=key)
+
+
+def open_analysis_executor(keyword_analyzer: KeywordAnalyzer) -> Optional[AnalysisExecutor]:
+    """
+    Creates the process pool for large filings, unless ANALYSIS_PROCESSES is 0.
+    """
+    processes = int(os.getenv("ANALYSIS_PROCESSES", "2"))
+    if processes <= 0:
+        return None
+    return AnalysisExecutor(
+        keyword_analyzer,
+        processes=processes,
+        size_threshold=int(float(os.getenv("ANALYSIS_OFFLOAD_MB", "5")) * 1024 * 1024),
+        spool_dir=os.getenv("ANALYSIS_SPOOL_DIR") or None,
+    )
+
+
+def open_job_queue() -> JobQueue:
+    """
+    Opens the job table shared by the poller and the workers.
+    """
+    return SqliteJobQueue(
+        db_path=os.getenv("JOB_QUEUE_PATH", "jobs.db"),
+        max_attempts=int(os.getenv("JOB_MAX_ATTEMPTS", "5")),
+        retry_delay=float(os.getenv("JOB_RETRY_DELAY_SECONDS", "30")),
+    )
+
+
+def enqueue_new_filings(sec_client: SecEdgarClient, db: Database, job_queue: JobQueue) -> int:
+    """
+    Runs one poller cycle: queues every filing from the feed not seen before.
+
+    Args:
+        sec_client: Client used for the feed.
+        db: Database of processed filing IDs.
+        job_queue: Queue the workers lease filings from.
+
+    Returns:
+        The number of filings queued.
+    """
+    cycle_start = time.monotonic()
+    latest_filings = sec_client.get_latest_filings(
+        any_processed=lambda filings: bool(job_queue.filter_known(extract_filing_id(f["link"]) for f in filings))
+    )
+    filing_ids = [extract_filing_id(filing["link"]) for filing in latest_filings]
+    # Filings processed before the queue was introduced are skipped too.
+    unprocessed = set(db.filter_unprocessed(filing_ids))
+    queued = job_queue.enqueue(
+        (filing_id, filing)
+        for filing, filing_id in zip(latest_filings, filing_ids, strict=True)
+        if filing_id in unprocessed
+    )
+    cycle_seconds = time.monotonic() - cycle_start
+    metrics.CYCLE_SECONDS.observe(cycle_seconds)
+    logging.info(f"Queued {queued} new of {len(latest_filings)} filings in {cycle_seconds:.1f}s")
+    return queued
+
+
+def process_next_job(
+    sec_client: SecEdgarClient,
+    keyword_analyzer: KeywordAnalyzer,
+    telegram_client: TelegramClient,
+    db: Database,
+    job_queue: JobQueue,
+    worker_id: str,
+    lease_seconds: float,
+    analysis_executor: Optional[AnalysisExecutor] = None,
+) -> bool:
+    """
+    Leases one filing from the job queue, processes it and settles the job.
+
+    The alert is claimed in the job table before it is sent and confirmed once
+    Telegram accepted it, so a filing whose lease expired mid-processing and was
+    taken over is alerted once. If the send fails, the claim is released and the
+    job retried; a claim left unconfirmed by a worker that died is taken over
+    after lease_seconds, so the alert is not lost.
+
+    Args:
+        sec_client: Client used for the download.
+        keyword_analyzer: Analyzer applied to the filing.
+        telegram_client: Client used to send alerts.
+        db: Database of processed filing IDs.
+        job_queue: Queue to lease the filing from.
+        worker_id: Name of this worker.
+        lease_seconds: Visibility timeout of the lease, also the timeout of an
+            unconfirmed alert claim.
+        analysis_executor: If given, analyzes large filings on its process pool.
+
+    Returns:
+        False if no job was available, True otherwise.
+    """
+    job = job_queue.lease(worker_id, lease_seconds)
+    if job is None:
+        return False
+    filing = job.payload
+    try:
+        analysis = fetch_and_analyze(sec_client, keyword_analyzer, filing, analysis_executor)
+        if analysis is None:
+            job_queue.fail(job, f"could not retrieve {filing['link']}")
+            return True
+        if analysis["crypto_detected"]:
+            if job_queue.claim_alert(job.accession, lease_seconds):
+                send_filing_alert(telegram_client, filing, analysis, key=job.accession)
+                telegram_client.flush()
+                if job.accession not in telegram_client.take_delivered():
+                    job_queue.release_alert(job.accession)
+                    job_queue.fail(job, "the alert could not be sent")
+                    return True
+                job_queue.confirm_alert(job.accession)
+            elif not job_queue.alert_delivered(job.accession):
+                job_queue.fail(job, "the alert is being sent by another worker")
+                return True
             else:
-                logging.info(f"Skipping already processed filing: {filing['title']}")
+                logging.info(f"Alert for {job.accession} was already sent; not sending it again.")
+        db.add_filings([job.accession], crypto_detected=analysis["crypto_detected"])
+        job_queue.complete(job)
+    except Exception as e:
+        logging.error(f"Error processing filing {filing.get('link')}: {e}")
+        job_queue.fail(job, str(e))
+    return True
+
+
+def run_worker(index: int = 0, rate: Optional[float] = None):
+    """
+    Runs a worker process: leases and processes filings until interrupted.
+
+    Args:
+        index: Number of this worker among the processes started together; it
+            offsets the metrics port so every worker can be scraped.
+        rate: sec.gov requests per second allowed to this process.
+    """
+    exit_on_sigterm()
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    metrics_port = os.getenv("METRICS_PORT")
+    if metrics_port:
+        metrics.start_http_server(int(metrics_port) + 1 + index, host=os.getenv("METRICS_HOST", "127.0.0.1"))
+    rate_limiter = RateLimiter(rate) if rate else None
+    sec_client = SecEdgarClient(rate_limiter=rate_limiter)
+    keyword_analyzer = KeywordAnalyzer()
+    analysis_executor = open_analysis_executor(keyword_analyzer)
+    telegram_client = TelegramClient(
+        background=os.getenv("TELEGRAM_BACKGROUND_SEND", "true").lower() in ("1", "true", "yes")
+    )
+    db = Database(cache_size=int(os.getenv("DB_CACHE_SIZE", "20000")))
+    job_queue = open_job_queue()
+    lease_seconds = float(os.getenv("JOB_LEASE_SECONDS", "300"))
+    idle_seconds = float(os.getenv("WORKER_IDLE_SECONDS", "2"))
+
+    logging.info(f"Worker {worker_id} started.")
+    try:
+        while True:
+            if not process_next_job(
+                sec_client, keyword_analyzer, telegram_client, db, job_queue, worker_id, lease_seconds,
+                analysis_executor,
+            ):
+                time.sleep(idle_seconds)
+    finally:
+        if analysis_executor is not None:
+            analysis_executor.close()
+        telegram_client.close()
+        job_queue.close()
+        db.close()
+
+
+def poller_request_rate() -> float:
+    """
+    Returns the requests per second reserved for the --role poller process of
+    this machine; 0 on machines that run none.
+    """
+    return float(os.getenv("SEC_POLLER_REQUESTS_PER_SECOND", "1"))
+
+
+def run_worker_processes(processes: int):
+    """
+    Runs one worker in this process, or starts several and waits for them.
+
+    SEC's fair-access limit, minus the share of a poller on the same machine
+    (SEC_POLLER_REQUESTS_PER_SECOND), is split evenly between the processes
+    started here; workers on other machines need their own
+    SEC_MAX_REQUESTS_PER_SECOND share.
+
+    Args:
+        processes: Number of worker processes.
+    """
+    total_rate = float(os.getenv("SEC_MAX_REQUESTS_PER_SECOND", "10"))
+    available_rate = total_rate - poller_request_rate()
+    if available_rate <= 0:
+        raise ValueError("SEC_POLLER_REQUESTS_PER_SECOND leaves no requests for the workers")
+    rate = available_rate / max(1, processes)
+    if processes <= 1:
+        run_worker(0, rate)
+        return
+    workers = [
+        multiprocessing.Process(target=run_worker, args=(index, rate), name=f"worker-{index}")
+        for index in range(processes)
+    ]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+
+
+def run_backfill_command(args: argparse.Namespace):
+    """
+    Runs --role backfill with the parsed command line options.
+    """
+    end = args.end or args.start
+    checkpoint = BackfillCheckpoint(args.checkpoint, {
+        "start": args.start.isoformat(), "end": end.isoformat(), "forms": args.form, "index": args.index,
+    })
+    sec_client = SecEdgarClient()
+    keyword_analyzer = KeywordAnalyzer()
+    analysis_executor = open_analysis_executor(keyword_analyzer)
+    telegram_client = TelegramClient() if args.alert else None
+    db = Database(cache_size=int(os.getenv("DB_CACHE_SIZE", "20000")))
+    executor = ThreadPoolExecutor(max_workers=int(os.getenv("SEC_WORKERS", "8")), thread_name_prefix="filing")
+    try:
+        run_backfill(
+            sec_client, keyword_analyzer, telegram_client, db, executor, args.start, end,
+            args.form, args.index, checkpoint, analysis_executor,
+        )
+    finally:
+        executor.shutdown()
+        if analysis_executor is not None:
+            analysis_executor.close()
+        if telegram_client is not None:
+            telegram_client.close()
+        db.close()
 
-        logging.info("Waiting for the next check...")
-        time.sleep(300)  # Wait for 5 minutes
+
+def run_backfill(
+    sec_client: SecEdgarClient,
+    keyword_analyzer: KeywordAnalyzer,
+    telegram_client: Optional[TelegramClient],
+    db: Database,
+    executor: Executor,
+    start: date,
+    end: date,
+    forms: Optional[List[str]] = None,
+    granularity: str = QUARTERLY,
+    checkpoint: Optional[BackfillCheckpoint] = None,
+    analysis_executor: Optional[AnalysisExecutor] = None,
+    batch_size: int = BACKFILL_BATCH_SIZE,
+) -> Dict[str, int]:
+    """
+    Processes the filings of a past date range, read from EDGAR's master index
+    files instead of the live feed.
+
+    Each index file is streamed and its filings in the range and of the wanted
+    forms are spooled to a temporary file; they are then read back in batches,
+    and those not in the database yet go through process_filings. An index file
+    is marked completed in the checkpoint once all its filings were processed,
+    so a rerun skips it; filings of an interrupted index file are skipped on
+    resume through the database.
+
+    Master index files do not state filing sizes, so filing_size_hint finds
+    none and analysis_executor analyzes backfilled filings inline.
+
+    Args:
+        sec_client: Client used for the index files and the filing downloads.
+        keyword_analyzer: Analyzer applied to each filing.
+        telegram_client: Client used to send alerts; None only logs detections.
+        db: Database of processed filing IDs.
+        executor: Executor running fetch_and_analyze for each filing.
+        start: First filing date of the range.
+        end: Last filing date of the range (inclusive).
+        forms: Form types to process (amendments included); None processes all.
+        granularity: 'quarterly' or 'daily' index files, see index_urls.
+        checkpoint: Progress of the run, to resume it.
+        analysis_executor: Passed on to process_filings (see above).
+        batch_size: Number of filings read, processed and checkpointed at a time.
+
+    Returns:
+        The number of filings processed, with crypto content, and failed, and of
+        index files that could not be read.
+    """
+    stats = checkpoint.stats if checkpoint is not None else {"filings": 0, "alerts": 0, "failures": 0}
+    stats.setdefault("index_failures", 0)
+    for index_url in index_urls(sec_client.archives_url, start, end, granularity):
+        if checkpoint is not None and checkpoint.is_completed(index_url):
+            logging.info(f"Skipping completed index file {index_url}")
+            continue
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            try:
+                # Spooled before processing: an index connection left open during
+                # long batches would time out, and a quarterly index lists too
+                # many filings to keep in memory.
+                selected = (
+                    entry for entry in parse_master_index(sec_client.iter_index_lines(index_url))
+                    if start <= entry.date_filed <= end and form_selected(entry.form_type, forms)
+                )
+                listed = spool_filings(selected, sec_client.archives_url, spool)
+            except requests.exceptions.RequestException:
+                stats["index_failures"] += 1
+                continue
+            logging.info(f"{listed} filings listed in {index_url}")
+
+            spool.seek(0)
+            failures = 0
+            for filings in read_filing_batches(spool, batch_size):
+                unprocessed = set(db.filter_unprocessed(extract_filing_id(filing["link"]) for filing in filings))
+                filings = [filing for filing in filings if extract_filing_id(filing["link"]) in unprocessed]
+                if not filings:
+                    continue
+                counts = process_filings(
+                    sec_client, keyword_analyzer, telegram_client, db, executor, filings, analysis_executor,
+                )
+                stats["filings"] += counts["new"]
+                stats["alerts"] += counts["alerts"]
+                stats["failures"] += counts["failures"]
+                failures += counts["failures"]
+                if checkpoint is not None:
+                    checkpoint.save()
+        # Failed filings are retried by the next run of this index file.
+        if checkpoint is not None and not failures:
+            checkpoint.mark_completed(index_url)
+    logging.info(
+        f"Backfill processed {stats['filings']} filings: {stats['alerts']} with crypto content, "
+        f"{stats['failures']} failed"
+    )
+    return stats
+
+
+def fetch_and_analyze(
+    sec_client: SecEdgarClient,
+    keyword_analyzer: KeywordAnalyzer,
+    filing: Dict[str, str],
+    analysis_executor: Optional[AnalysisExecutor] = None,
+) -> Optional[Dict[str, Optional[str]]]:
+    """
+    Downloads and analyzes one filing. Safe to run on a worker thread.
+
+    Args:
+        sec_client: Client used for the download.
+        keyword_analyzer: Analyzer applied to the filing text.
+        filing: The filing entry from the feed.
+        analysis_executor: If given, filings the feed announces as large are
+            analyzed on its process pool instead of on this thread. The feed
+            states the size of the full submission, so in primary-document
+            mode, which downloads a fraction of it, filings stay on this thread.
+
+    Returns:
+        The analysis result, or None if the filing could not be retrieved.
+    """
+    # Stream the filing so memory use does not depend on its size, and stop
+    # downloading once there is enough for an alert.
+    chunks = sec_client.stream_filing_text(filing["link"])
+    if chunks is None:
+        return None
+    try:
+        if analysis_executor is not None:
+            size_hint = filing_size_hint(filing) if sec_client.fetch_mode != FETCH_PRIMARY else None
+            return analysis_executor.analyze_stream(chunks, size_hint)
+        return keyword_analyzer.analyze_stream(chunks)
+    except requests.exceptions.RequestException:
+        return None
 
 
 def extract_filing_id(url: str) -> str:
@@ -1,26 +1,73 @@
 import logging
 import os
-import re
 from typing import Dict, Optional
 
-from bs4 import BeautifulSoup
 from dotenv import load_dotenv
-from playwright.sync_api import sync_playwright
+from playwright.sync_api import Route, sync_playwright
+
+from src.text_extraction import extract_apy_rates
 
 load_dotenv()
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+MARKET_ROW_PREFIX = 'marketListItemListItem_'
+MARKET_ROW_SELECTOR = f'div[data-cy^="{MARKET_ROW_PREFIX}"]'
+
+# Runs inside the page over the market rows and returns {ticker: APY text} for the
+# requested tickers, so only a few bytes cross back instead of the whole DOM.
+# Like a find() per ticker, only the first row of each ticker is considered.
+EXTRACT_APY_SCRIPT = """
+(rows, [prefix, tickers]) => {
+    const rates = {};
+    const seen = new Set();
+    for (const row of rows) {
+        const ticker = row.getAttribute('data-cy').slice(prefix.length);
+        if (!tickers.includes(ticker) || seen.has(ticker)) continue;
+        seen.add(ticker);
+        const apy = row.querySelector('p[data-cy="apy"]');
+        if (apy) rates[ticker] = apy.textContent;
+    }
+    return rates;
+}
+"""
+
+
 class AaveScraper:
     """
     A client for scraping APY rates from Aave.
     """
 
-    def __init__(self):
+    # Resources the market list renders without: they are aborted before download.
+    BLOCKED_RESOURCE_TYPES = {'image', 'media', 'font', 'stylesheet', 'manifest', 'texttrack'}
+    BLOCKED_URL_KEYWORDS = (
+        'google-analytics', 'googletagmanager', 'segment.io', 'sentry.io',
+        'hotjar', 'mixpanel', 'amplitude', 'intercom',
+    )
+
+    def __init__(self, persistent: bool = False, max_uses: int = 100):
+        """
+        Initializes the AaveScraper.
+
+        Args:
+            persistent: Keep one browser and page alive between calls and reload
+                the page, instead of launching Chromium for every call. The
+                Playwright sync API is thread-bound, so a persistent scraper must
+                always be used from the same thread; call close() when done.
+            max_uses: In persistent mode, recycle the browser after this many
+                successful calls to cap memory growth of a long-lived page.
+        """
         self.aave_url = os.getenv('AAVE_URL', 'https://app.aave.com/')
         user_agent = os.getenv('USER_AGENT', 'BlackHatMedia/1.0 (daniel@blackhatmedia.com)')
         from_email = os.getenv('FROM_EMAIL', 'daniel@blackhatmedia.com')
         self.headers = {'User-Agent': user_agent, 'From': from_email}
+        self.persistent = persistent
+        self.max_uses = max(1, max_uses)
+        self._playwright = None
+        self._browser = None
+        self._page = None
+        self._page_loaded = False
+        self._uses = 0
 
     def get_apy_rates(self) -> Dict[str, Optional[str]]:
         """
@@ -31,33 +78,127 @@ class AaveScraper:
             Returns None for a stablecoin if its APY cannot be found.
         """
         apy_rates = {'USDT': None, 'USDC': None, 'DAI': None}
+        if self.persistent:
+            return self._get_apy_rates_persistent(apy_rates)
 
         with sync_playwright() as p:
             browser = p.chromium.launch(headless=True)
             page = browser.new_page(user_agent=self.headers['User-Agent'])
             try:
+                page.route('**/*', self._route_request)
                 page.goto(self.aave_url)
-                
-                # Wait for the elements to be present
-                page.wait_for_selector('[data-cy^="marketListItemListItem_"]', timeout=20000)
-
-                soup = BeautifulSoup(page.content(), 'html.parser')
-
-                for ticker in apy_rates.keys():
-                    # Find the parent div for the asset
-                    asset_div = soup.find('div', attrs={'data-cy': f'marketListItemListItem_{ticker}'})
-                    if asset_div:
-                        # Find the APY within this asset's div
-                        apy_element = asset_div.find('p', attrs={'data-cy': 'apy'})
-                        if apy_element:
-                            apy_rates[ticker] = apy_element.get_text(strip=True)
-
+                self._extract_apy_rates(page, apy_rates)
             except Exception as e:
                 logging.error(f"Error scraping Aave APY rates with Playwright: {e}")
             finally:
                 browser.close()
         return apy_rates
 
+    def get_apy_rates_from_html(self, page_html: str) -> Dict[str, Optional[str]]:
+        """
+        Reads the APY rates from a saved copy of the rendered Aave page, without a
+        browser. Only the market rows are parsed.
+
+        Args:
+            page_html: The serialized page, e.g. from page.content().
+
+        Returns:
+            The same dictionary as get_apy_rates.
+        """
+        return extract_apy_rates(page_html, ['USDT', 'USDC', 'DAI'], MARKET_ROW_PREFIX)
+
+    def close(self):
+        """
+        Shuts down the persistent browser, if one is running.
+        """
+        for resource, shutdown in ((self._browser, 'close'), (self._playwright, 'stop')):
+            if resource is not None:
+                try:
+                    getattr(resource, shutdown)()
+                except Exception as e:
+                    logging.warning(f"Error shutting down Playwright: {e}")
+        self._playwright = self._browser = self._page = None
+        self._page_loaded = False
+        self._uses = 0
+
+    def _get_apy_rates_persistent(self, apy_rates: Dict[str, Optional[str]]) -> Dict[str, Optional[str]]:
+        """
+        Retrieves the APY rates with the long-lived browser, restarting it once if
+        it crashed or the page got stuck.
+
+        Args:
+            apy_rates: The tickers to fill in, all set to None.
+        """
+        for attempt in range(2):
+            try:
+                page = self._ensure_page()
+                if self._page_loaded:
+                    page.reload()
+                else:
+                    page.goto(self.aave_url)
+                    self._page_loaded = True
+                self._extract_apy_rates(page, apy_rates)
+                self._uses += 1
+                if self._uses >= self.max_uses:
+                    logging.info(f"Recycling the Aave browser after {self._uses} uses.")
+                    self.close()
+                return apy_rates
+            except Exception as e:
+                logging.error(f"Error scraping Aave APY rates with Playwright (attempt {attempt + 1}): {e}")
+                self.close()
+        return apy_rates
+
+    def _ensure_page(self):
+        """
+        Returns the persistent page, (re)launching the browser if needed.
+        """
+        if self._browser is not None and (not self._browser.is_connected() or self._page.is_closed()):
+            logging.warning("Aave browser is gone; restarting it.")
+            self.close()
+        if self._browser is None:
+            self._playwright = sync_playwright().start()
+            self._browser = self._playwright.chromium.launch(headless=True)
+            self._page = self._browser.new_page(user_agent=self.headers['User-Agent'])
+            self._page.route('**/*', self._route_request)
+            self._page_loaded = False
+        return self._page
+
+    def _extract_apy_rates(self, page, apy_rates: Dict[str, Optional[str]]):
+        """
+        Waits for the market list on a loaded page and fills in the APY rates.
+
+        Args:
+            page: The Playwright page showing the Aave app.
+            apy_rates: The tickers to fill in.
+        """
+        # Wait for the elements to be present
+        page.wait_for_selector(MARKET_ROW_SELECTOR, timeout=20000)
+
+        # Query the rows inside the page instead of serializing the DOM
+        found = page.eval_on_selector_all(
+            MARKET_ROW_SELECTOR,
+            EXTRACT_APY_SCRIPT,
+            [MARKET_ROW_PREFIX, list(apy_rates.keys())],
+        )
+        for ticker in apy_rates.keys():
+            if found.get(ticker):
+                apy_rates[ticker] = ''.join(found[ticker].split())
+
+    def _route_request(self, route: Route):
+        """
+        Aborts requests for resources the APY rates do not depend on.
+
+        Args:
+            route: The intercepted request.
+        """
+        request = route.request
+        if request.resource_type in self.BLOCKED_RESOURCE_TYPES or any(
+            keyword in request.url for keyword in self.BLOCKED_URL_KEYWORDS
+        ):
+            route.abort()
+        else:
+            route.continue_()
+
 if __name__ == '__main__':
     scraper = AaveScraper()
     rates = scraper.get_apy_rates()
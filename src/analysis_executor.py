@@ -0,0 +1,287 @@
+import codecs
+import logging
+import multiprocessing
+import os
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from src import metrics
+from src.keyword_analyzer import READ_CHUNK_SIZE, IncrementalAnalysis, KeywordAnalyzer
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# The feed summary of a filing ends with e.g. '<b>Size:</b> 9 MB'.
+FEED_SIZE_PATTERN = re.compile(r'Size:(?:</b>)?\s*([\d.]+)\s*(KB|MB|GB)', re.IGNORECASE)
+SIZE_UNITS = {'KB': 1024, 'MB': 1024 ** 2, 'GB': 1024 ** 3}
+
+# Created next to a spool file once the download has been written completely
+COMPLETE_SUFFIX = '.complete'
+# Seconds a pool process waits before looking for more of a spool file
+SPOOL_POLL_SECONDS = 0.01
+
+# Analyzer of the current pool process, built once by _init_worker
+_worker_analyzer: Optional[KeywordAnalyzer] = None
+
+
+def filing_size_hint(filing: Dict[str, str]) -> Optional[int]:
+    """
+    Returns the submission size announced in a feed entry's summary.
+
+    Args:
+        filing: The filing entry from the feed.
+
+    Returns:
+        The size in bytes, or None if the summary does not state it.
+    """
+    match = FEED_SIZE_PATTERN.search(filing.get('summary') or '')
+    if match is None:
+        return None
+    return int(float(match.group(1)) * SIZE_UNITS[match.group(2).upper()])
+
+
+def analyze_text_file(path: str, analyzer: KeywordAnalyzer, max_snippets: Optional[int] = 3) -> Tuple[Dict, float]:
+    """
+    Analyzes a text file through a memory map, stopping once enough lines matched.
+
+    Args:
+        path: The file to analyze.
+        analyzer: The analyzer to apply.
+        max_snippets: Passed on to IncrementalAnalysis.
+
+    Returns:
+        The analysis result and the time spent scanning, in seconds.
+    """
+    analysis = IncrementalAnalysis(analyzer, max_snippets)
+    analysis.feed_path(path)
+    result = analysis.finish()
+    return result, analysis.analysis_seconds
+
+
+def analyze_spool_file(path: str, analyzer: KeywordAnalyzer, max_snippets: Optional[int] = 3) -> Tuple[Dict, float]:
+    """
+    Analyzes a spool file while it is still being written, stopping once enough lines matched.
+
+    The file is complete once path + COMPLETE_SUFFIX exists; until then, reaching
+    its end means waiting for the writer.
+
+    Args:
+        path: The spool file to analyze.
+        analyzer: The analyzer to apply.
+        max_snippets: Passed on to IncrementalAnalysis.
+
+    Returns:
+        The analysis result and the time spent scanning, in seconds.
+    """
+    analysis = IncrementalAnalysis(analyzer, max_snippets)
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+    complete = False
+    with open(path, 'rb') as f:
+        while not analysis.done:
+            data = f.read(READ_CHUNK_SIZE)
+            if data:
+                analysis.feed(decoder.decode(data))
+            elif complete:
+                analysis.feed(decoder.decode(b'', final=True))
+                break
+            else:
+                # Read once more after seeing the marker: the last chunk may have
+                # been written between the empty read and the check.
+                complete = os.path.exists(path + COMPLETE_SUFFIX)
+                if not complete:
+                    time.sleep(SPOOL_POLL_SECONDS)
+    result = analysis.finish()
+    return result, analysis.analysis_seconds
+
+
+def _init_worker(keywords: List[str], include_types: Optional[List[str]], exclude_types: List[str]):
+    """
+    Builds the analyzer of a pool process once, instead of once per filing.
+    """
+    global _worker_analyzer
+    _worker_analyzer = KeywordAnalyzer(include_types=include_types, exclude_types=exclude_types, keywords=keywords)
+
+
+def _analyze_in_worker(path: str, max_snippets: Optional[int]) -> Tuple[Dict, float]:
+    return analyze_spool_file(path, _worker_analyzer, max_snippets)
+
+
+class AnalysisExecutor:
+    """
+    Runs keyword analysis inline or on a process pool, depending on filing size.
+
+    The analysis is pure-Python CPU work, so under the GIL concurrent analyses of
+    large filings share one core. Filings the feed announces at or above
+    size_threshold are therefore spooled to a temporary file while they download,
+    and the file's path (never the text itself) is sent to a pool process, which
+    analyzes the file as it grows. Once the analysis is done the download is
+    closed, so an early match still saves the rest of the download. Smaller
+    filings are analyzed inline while they stream, where the pool's overhead
+    would outweigh the gain.
+
+    Safe to call from several threads; each call blocks until its result is ready.
+    """
+
+    def __init__(
+        self,
+        analyzer: KeywordAnalyzer,
+        processes: int = 2,
+        size_threshold: int = 5 * 1024 * 1024,
+        spool_dir: Optional[str] = None,
+        max_snippets: Optional[int] = 3,
+    ):
+        """
+        Initializes the AnalysisExecutor; the pool processes start on first use.
+
+        Args:
+            analyzer: Analyzer used inline; the pool processes build an identical one.
+            processes: Number of pool processes; 0 analyzes everything inline.
+            size_threshold: Announced size in bytes from which a filing is offloaded.
+            spool_dir: Directory for the temporary files (default: the system's).
+            max_snippets: Number of matching lines after which a scan stops.
+        """
+        self.analyzer = analyzer
+        self.processes = processes
+        self.size_threshold = size_threshold
+        self.spool_dir = spool_dir
+        self.max_snippets = max_snippets
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._stats = {'inline': 0, 'offloaded': 0, 'pool_failures': 0}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns the number of inline and offloaded analyses and the queue depth.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+        stats['queue_depth'] = int(metrics.ANALYSIS_QUEUE_DEPTH.get())
+        return stats
+
+    def analyze_stream(self, chunks: Iterable[str], size_hint: Optional[int] = None) -> Dict[str, Optional[str]]:
+        """
+        Analyzes a filing delivered in text chunks.
+
+        Args:
+            chunks: The filing text, e.g. from SecEdgarClient.stream_full_filing_text.
+            size_hint: The filing's expected size in bytes, if known (see
+                filing_size_hint); unknown sizes are analyzed inline.
+
+        Returns:
+            The same dictionary as KeywordAnalyzer.analyze_filing.
+        """
+        if not self.processes or size_hint is None or size_hint < self.size_threshold:
+            with self._lock:
+                self._stats['inline'] += 1
+            return self.analyzer.analyze_stream(chunks, self.max_snippets)
+
+        fd, path = tempfile.mkstemp(suffix='.txt', prefix='filing-', dir=self.spool_dir)
+        submitted = time.perf_counter()
+        metrics.ANALYSIS_QUEUE_DEPTH.inc()
+        future = None
+        try:
+            with open(fd, 'wb') as f:
+                try:
+                    future = self._submit(path)
+                    for chunk in chunks:
+                        f.write(chunk.encode('utf-8'))
+                        f.flush()
+                        if future is not None and future.done() and future.exception() is None:
+                            # The analysis needs no more text; closing chunks stops the download.
+                            break
+                finally:
+                    open(path + COMPLETE_SUFFIX, 'w').close()
+                    close = getattr(chunks, 'close', None)
+                    if close is not None:
+                        close()
+            if future is not None:
+                try:
+                    result, analysis_seconds = future.result()
+                except BrokenProcessPool as e:
+                    self._pool_failed(e)
+                    future = None
+            if future is None:
+                # The download is complete by now, as the loop above only stops
+                # early for a successful analysis.
+                return self._analyze_inline(path)
+        finally:
+            metrics.ANALYSIS_QUEUE_DEPTH.dec()
+            if future is not None:
+                # Let the pool process see the marker and finish before its file goes.
+                wait([future])
+            size = os.path.getsize(path)
+            os.remove(path)
+            if os.path.exists(path + COMPLETE_SUFFIX):
+                os.remove(path + COMPLETE_SUFFIX)
+
+        # The pool process observed this in its own registry, which is not exported.
+        metrics.ANALYSIS_SECONDS.observe(analysis_seconds)
+        with self._lock:
+            self._stats['offloaded'] += 1
+        waited = time.perf_counter() - submitted - analysis_seconds
+        logging.info(
+            f"Analyzed {size / 1e6:.1f} MB in a worker process in {analysis_seconds:.2f}s "
+            f"after {max(0.0, waited):.2f}s in the queue or downloading"
+        )
+        return result
+
+    def close(self):
+        """
+        Shuts the pool processes down.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown()
+
+    def _submit(self, path: str) -> Optional[Future]:
+        """
+        Starts the analysis of a spool file on the pool; None if the pool is broken.
+        """
+        try:
+            return self._get_pool().submit(_analyze_in_worker, path, self.max_snippets)
+        except BrokenProcessPool as e:
+            self._pool_failed(e)
+            return None
+
+    def _pool_failed(self, error: BrokenProcessPool):
+        """
+        Drops a broken pool, so that the next offloaded filing starts a new one.
+        """
+        # A pool process died (e.g. killed for memory).
+        logging.error(f"Analysis process pool failed, analyzing inline: {error}")
+        with self._lock:
+            self._stats['pool_failures'] += 1
+            self._pool = None
+
+    def _analyze_inline(self, path: str) -> Dict[str, Optional[str]]:
+        """
+        Analyzes a completely spooled filing in this process.
+        """
+        # analyze_text_file observes ANALYSIS_SECONDS through IncrementalAnalysis.finish.
+        result, _ = analyze_text_file(path, self.analyzer, self.max_snippets)
+        with self._lock:
+            self._stats['inline'] += 1
+        return result
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                analyzer = self.analyzer
+                include_types = list(analyzer.include_types) if analyzer.include_types is not None else None
+                # spawn: forking a process that runs threads (downloads, Telegram,
+                # metrics) can copy locks in a held state.
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.processes,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(analyzer.keywords, include_types, list(analyzer.exclude_types)),
+                )
+            return self._pool
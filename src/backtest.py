@@ -0,0 +1,286 @@
+"""
+Replays the keyword analysis over filings already on disk.
+
+Runs KeywordAnalyzer (optionally with a candidate keyword list) over a directory
+of full submission .txt files or a FilingCache directory on every core, writes
+one JSON line per filing and prints aggregate statistics and throughput.
+
+Usage:
+    python -m src.backtest FILING_DIR [--keywords-file FILE] [--add-keyword KW]
+        [--remove-keyword KW] [--labels LABELS.csv] [--output results.jsonl]
+        [--workers N]
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional
+
+from src.filing_cache import GZIP_SUFFIX, ZSTD_SUFFIX
+from src.keyword_analyzer import IncrementalAnalysis, KeywordAnalyzer
+
+# Configure logging
+logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+FILING_SUFFIXES = (ZSTD_SUFFIX, GZIP_SUFFIX, '.txt')
+TRUE_LABELS = ('1', 'true', 'yes', 'y', 'crypto')
+
+# Analyzer of the current worker process, built once by _init_worker
+_worker_analyzer: Optional[KeywordAnalyzer] = None
+
+
+def find_filings(directory: str) -> List[str]:
+    """
+    Lists the submission files below a directory, in a stable order.
+
+    Args:
+        directory: A directory of .txt submissions or a FilingCache directory.
+
+    Returns:
+        The paths of every .txt, .txt.gz and .txt.zst file, sorted.
+    """
+    paths = []
+    for root, _, files in os.walk(directory):
+        for name in files:
+            if name.endswith(FILING_SUFFIXES) and not name.startswith('.'):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+
+def accession_from_path(path: str) -> str:
+    """
+    Returns the accession number a filing file is named after.
+    """
+    name = os.path.basename(path)
+    for suffix in FILING_SUFFIXES:
+        if name.endswith(suffix):
+            return name[:-len(suffix)]
+    return name
+
+
+def load_labels(path: str) -> Dict[str, bool]:
+    """
+    Reads the expected outcome per filing from a CSV file.
+
+    Each row is 'accession,label', where a label of 1/true/yes/crypto marks a
+    filing that should raise an alert; a header row is ignored.
+
+    Args:
+        path: The CSV file.
+
+    Returns:
+        A dictionary from accession number to whether an alert is expected.
+    """
+    labels = {}
+    with open(path, newline='', encoding='utf-8') as f:
+        for row in csv.reader(f):
+            if len(row) < 2 or row[0].strip().lower() == 'accession':
+                continue
+            labels[row[0].strip()] = row[1].strip().lower() in TRUE_LABELS
+    return labels
+
+
+def build_keywords(
+    keywords_file: Optional[str] = None,
+    add: Iterable[str] = (),
+    remove: Iterable[str] = (),
+) -> List[str]:
+    """
+    Builds the keyword list to backtest.
+
+    Args:
+        keywords_file: File with one keyword per line ('#' starts a comment);
+            defaults to KeywordAnalyzer.CRYPTO_KEYWORDS.
+        add: Keywords appended to the list.
+        remove: Keywords removed from the list (case-insensitive).
+
+    Returns:
+        The keywords, in reporting order.
+    """
+    if keywords_file:
+        with open(keywords_file, encoding='utf-8') as f:
+            keywords = [line.split('#', 1)[0].strip() for line in f]
+        keywords = [keyword for keyword in keywords if keyword]
+    else:
+        keywords = list(KeywordAnalyzer.CRYPTO_KEYWORDS)
+    removed = {keyword.lower() for keyword in remove}
+    keywords = [keyword for keyword in keywords if keyword.lower() not in removed]
+    keywords.extend(keyword for keyword in add if keyword not in keywords)
+    return keywords
+
+
+def analyze_file(path: str, analyzer: KeywordAnalyzer) -> Dict:
+    """
+    Analyzes one filing file in full.
+
+    Args:
+        path: The filing file.
+        analyzer: The analyzer to apply.
+
+    Returns:
+        The per-filing result: accession number, path, size in bytes, whether an
+        alert would be raised, the distinct keywords found, the occurrences of each
+        keyword (most frequent first), the summary and the analysis time in seconds. Unreadable files get an 'error' instead.
+    """
+    result = {'accession': accession_from_path(path), 'path': path}
+    start = time.perf_counter()
+    analysis = IncrementalAnalysis(analyzer, max_snippets=None)
+    try:
+        # Plain files are memory-mapped, so large filings do not fill the RAM.
+        size = analysis.feed_path(path)
+    except Exception as e:
+        result.update(bytes=0, error=str(e), seconds=time.perf_counter() - start)
+        return result
+    outcome = analysis.finish()
+    result.update(
+        bytes=size,
+        crypto_detected=outcome['crypto_detected'],
+        keywords=sorted(outcome.keyword_counts),
+        keyword_counts=dict(outcome.ranked_keywords()),
+        summary=outcome['summary'],
+        seconds=time.perf_counter() - start,
+    )
+    return result
+
+
+def _init_worker(keywords: List[str], include_types: Optional[List[str]]):
+    """
+    Builds the analyzer of a worker process once, instead of once per filing.
+    """
+    global _worker_analyzer
+    _worker_analyzer = KeywordAnalyzer(include_types=include_types, keywords=keywords)
+
+
+def _analyze_in_worker(path: str) -> Dict:
+    return analyze_file(path, _worker_analyzer)
+
+
+def run_backtest(
+    paths: List[str],
+    keywords: List[str],
+    include_types: Optional[List[str]] = None,
+    workers: Optional[int] = None,
+) -> Iterator[Dict]:
+    """
+    Analyzes the filings on a process pool.
+
+    Args:
+        paths: The filing files.
+        keywords: The keyword list to test.
+        include_types: If given, only these document types are analyzed.
+        workers: Number of processes; defaults to the number of cores. 1 runs in
+            this process.
+
+    Yields:
+        The result of analyze_file for each path, in order.
+    """
+    if workers == 1:
+        analyzer = KeywordAnalyzer(include_types=include_types, keywords=keywords)
+        for path in paths:
+            yield analyze_file(path, analyzer)
+        return
+
+    workers = workers or os.cpu_count() or 1
+    # Small batches amortize the inter-process overhead without starving workers.
+    chunksize = max(1, min(32, len(paths) // (workers * 4)))
+    with ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(keywords, include_types)
+    ) as executor:
+        yield from executor.map(_analyze_in_worker, paths, chunksize=chunksize)
+
+
+def summarize(results: Iterable[Dict], labels: Optional[Dict[str, bool]] = None) -> Dict:
+    """
+    Aggregates per-filing results.
+
+    Args:
+        results: Results of analyze_file.
+        labels: Expected outcome per accession number, if known.
+
+    Returns:
+        Counts of filings, errors, bytes and alerts, the number of alerting filings
+        and of occurrences per keyword, and with labels the confusion counts (true/false positives
+        and negatives among the labeled filings) with precision and recall.
+    """
+    summary = {'filings': 0, 'errors': 0, 'bytes': 0, 'alerts': 0, 'analysis_seconds': 0.0}
+    keyword_filings: Counter = Counter()
+    keyword_hits: Counter = Counter()
+    confusion = Counter(true_positives=0, false_positives=0, false_negatives=0, true_negatives=0)
+    for result in results:
+        summary['filings'] += 1
+        summary['bytes'] += result['bytes']
+        summary['analysis_seconds'] += result['seconds']
+        if 'error' in result:
+            summary['errors'] += 1
+            continue
+        detected = result['crypto_detected']
+        summary['alerts'] += detected
+        keyword_filings.update(result['keywords'])
+        keyword_hits.update(result['keyword_counts'])
+        if labels is not None and result['accession'] in labels:
+            expected = labels[result['accession']]
+            confusion[
+                ('true_' if detected == expected else 'false_') + ('positives' if detected else 'negatives')
+            ] += 1
+
+    summary['keyword_filings'] = dict(keyword_filings.most_common())
+    summary['keyword_hits'] = dict(keyword_hits.most_common())
+    if labels is not None:
+        summary.update(confusion)
+        flagged = confusion['true_positives'] + confusion['false_positives']
+        relevant = confusion['true_positives'] + confusion['false_negatives']
+        summary['precision'] = confusion['true_positives'] / flagged if flagged else None
+        summary['recall'] = confusion['true_positives'] / relevant if relevant else None
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Runs the backtest command line.
+    """
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('directory', help='Directory of .txt submissions or a filing cache directory')
+    parser.add_argument('--keywords-file', help='One keyword per line, replacing CRYPTO_KEYWORDS')
+    parser.add_argument('--add-keyword', action='append', default=[], help='Keyword to add (repeatable)')
+    parser.add_argument('--remove-keyword', action='append', default=[], help='Keyword to remove (repeatable)')
+    parser.add_argument('--include-type', action='append', help='Only analyze this document type (repeatable)')
+    parser.add_argument('--labels', help="CSV of 'accession,label' rows with the expected outcome")
+    parser.add_argument('--output', default='backtest_results.jsonl', help="Per-filing JSONL output, '-' for stdout")
+    parser.add_argument('--workers', type=int, help='Worker processes (default: all cores)')
+    args = parser.parse_args(argv)
+
+    paths = find_filings(args.directory)
+    if not paths:
+        logging.error(f"No filings found in {args.directory}")
+        return 1
+    keywords = build_keywords(args.keywords_file, args.add_keyword, args.remove_keyword)
+    labels = load_labels(args.labels) if args.labels else None
+
+    output = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    results = []
+    start = time.perf_counter()
+    try:
+        for result in run_backtest(paths, keywords, args.include_type, args.workers):
+            output.write(json.dumps(result) + '\n')
+            results.append({k: v for k, v in result.items() if k != 'summary'})
+    finally:
+        if output is not sys.stdout:
+            output.close()
+    elapsed = time.perf_counter() - start
+
+    summary = summarize(results, labels)
+    summary['wall_seconds'] = elapsed
+    summary['mb_per_second'] = summary['bytes'] / 1e6 / elapsed if elapsed else None
+    summary['filings_per_second'] = summary['filings'] / elapsed if elapsed else None
+    print(json.dumps(summary, indent=2), file=sys.stderr if args.output == '-' else sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
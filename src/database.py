@@ -1,6 +1,10 @@
 import logging
 import sqlite3
-from typing import Optional
+import time
+from collections import OrderedDict
+from typing import Iterable, List, Optional, Set
+
+from src import metrics
 
 # Configure logging
 logging.basicConfig(
@@ -8,22 +12,51 @@ logging.basicConfig(
 )
 
 
+# Stay well below SQLite's limit on host parameters per statement (999 in old builds).
+MAX_QUERY_PARAMETERS = 500
+
+# Schema migrations, applied in order on top of the original id-only table. The
+# number of migrations applied is stored in PRAGMA user_version.
+MIGRATIONS = [
+    # 1: when each filing was processed (unix seconds) and whether it raised an
+    # alert (NULL when unknown), indexed for time-based retention. Rows from
+    # before the migration count as processed at migration time.
+    [
+        "ALTER TABLE processed_filings ADD COLUMN processed_at INTEGER",
+        "ALTER TABLE processed_filings ADD COLUMN crypto_detected INTEGER",
+        "UPDATE processed_filings SET processed_at = CAST(strftime('%s', 'now') AS INTEGER)",
+        "CREATE INDEX IF NOT EXISTS idx_processed_filings_processed_at ON processed_filings (processed_at)",
+    ],
+]
+
+
 class Database:
     """
     A class to handle the SQLite database for storing processed filing IDs.
     """
 
-    def __init__(self, db_path: str = "processed_filings.db"):
+    def __init__(self, db_path: str = "processed_filings.db", cache_size: int = 20000):
         """
         Initializes the Database object and creates the database and table if they don't exist.
 
         Args:
             db_path: The path to the SQLite database file.
+            cache_size: Number of recently processed filing IDs kept in memory, so
+                the common "already processed" lookup needs no query. 0 disables it.
         """
         self.db_path = db_path
         self.conn: Optional[sqlite3.Connection] = None
+        self.cache_size = max(0, cache_size)
+        # LRU of IDs known to be in processed_filings. Only IDs read from or written
+        # to the table are added, so a hit is always a processed filing; a miss
+        # falls through to SQLite.
+        self._processed_cache: "OrderedDict[str, None]" = OrderedDict()
+        self.cache_hits = 0
+        self.cache_misses = 0
         self.connect()
         self.create_table()
+        self.migrate()
+        self.load_cache()
 
     def connect(self):
         """
@@ -31,6 +64,14 @@ class Database:
         """
         try:
             self.conn = sqlite3.connect(self.db_path)
+            # Lets compact() return freed pages to the OS. Only takes effect on a new
+            # database; migrate() converts existing ones.
+            self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            # WAL lets readers run alongside the writer and turns each commit into a
+            # sequential append; with synchronous=NORMAL it is only fsynced at
+            # checkpoints, which stays crash-safe (the last commits may roll back).
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("PRAGMA synchronous=NORMAL")
         except sqlite3.Error as e:
             logging.error(f"Error connecting to database: {e}")
 
@@ -53,23 +94,111 @@ class Database:
         except sqlite3.Error as e:
             logging.error(f"Error creating table: {e}")
 
-    def add_filing(self, filing_id: str):
+    def migrate(self):
         """
-        Adds a filing ID to the processed_filings table.
+        Brings the schema up to date by applying the pending MIGRATIONS.
 
-        Args:
-            filing_id: The unique ID of the filing to add.
+        Each migration runs in its own transaction together with the user_version
+        update, so an interrupted migration is retried on the next start. A
+        database created before incremental auto-vacuum was enabled is vacuumed
+        once to switch it over.
         """
         if not self.conn:
             return
+        try:
+            version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+            for number, statements in enumerate(MIGRATIONS[version:], start=version + 1):
+                logging.info(f"Applying database migration {number}.")
+                self.conn.execute("BEGIN")
+                try:
+                    for statement in statements:
+                        self.conn.execute(statement)
+                    self.conn.execute(f"PRAGMA user_version = {number}")
+                    self.conn.commit()
+                except sqlite3.Error:
+                    self.conn.rollback()
+                    raise
+
+            if self.conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:  # INCREMENTAL
+                logging.info("Enabling incremental auto-vacuum (one-time VACUUM).")
+                self.conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+                self.conn.execute("VACUUM")
+        except sqlite3.Error as e:
+            logging.error(f"Error migrating database: {e}")
+
+    def load_cache(self):
+        """
+        Warms the in-memory cache with the most recently added filing IDs.
+        """
+        if not self.conn or not self.cache_size:
+            return
         try:
             cursor = self.conn.cursor()
             cursor.execute(
-                "INSERT INTO processed_filings (id) VALUES (?)", (filing_id,)
+                "SELECT id FROM processed_filings ORDER BY rowid DESC LIMIT ?",
+                (self.cache_size,),
             )
-            self.conn.commit()
+            recent_ids = [row[0] for row in cursor.fetchall()]
+        except sqlite3.Error as e:
+            logging.error(f"Error loading recent filing IDs: {e}")
+            return
+        self._remember(reversed(recent_ids))
+
+    def _remember(self, filing_ids: Iterable[str]):
+        """
+        Marks filing IDs known to be in the table as most recently used.
+
+        Args:
+            filing_ids: IDs present in processed_filings.
+        """
+        if not self.cache_size:
+            return
+        cache = self._processed_cache
+        for filing_id in filing_ids:
+            cache[filing_id] = None
+            cache.move_to_end(filing_id)
+        while len(cache) > self.cache_size:
+            cache.popitem(last=False)
+
+    def _cached(self, filing_id: str) -> bool:
+        """
+        Checks the in-memory cache, counting the hit or miss.
+
+        Args:
+            filing_id: The unique ID of the filing to check.
+
+        Returns:
+            True if the filing is known to be processed without a query.
+        """
+        if filing_id in self._processed_cache:
+            self._processed_cache.move_to_end(filing_id)
+            self.cache_hits += 1
+            return True
+        self.cache_misses += 1
+        return False
+
+    def add_filing(self, filing_id: str, crypto_detected: Optional[bool] = None):
+        """
+        Adds a filing ID to the processed_filings table.
+
+        Args:
+            filing_id: The unique ID of the filing to add.
+            crypto_detected: The analysis outcome, if known.
+        """
+        if not self.conn:
+            return
+        try:
+            with metrics.DB_SECONDS.labels("add_filing").time():
+                cursor = self.conn.cursor()
+                cursor.execute(
+                    "INSERT INTO processed_filings (id, processed_at, crypto_detected) VALUES (?, ?, ?)",
+                    (filing_id, int(time.time()), crypto_detected),
+                )
+                self.conn.commit()
+            self._remember([filing_id])
         except sqlite3.IntegrityError:
             logging.warning(f"Filing ID {filing_id} already exists in the database.")
+            self._remember([filing_id])
         except sqlite3.Error as e:
             logging.error(f"Error adding filing ID {filing_id}: {e}")
 
@@ -83,16 +212,127 @@ class Database:
         Returns:
             True if the filing ID exists, False otherwise.
         """
+        if self._cached(filing_id):
+            return True
         if not self.conn:
             return False
         try:
-            cursor = self.conn.cursor()
-            cursor.execute("SELECT 1 FROM processed_filings WHERE id = ?", (filing_id,))
-            return cursor.fetchone() is not None
+            with metrics.DB_SECONDS.labels("filing_exists").time():
+                cursor = self.conn.cursor()
+                cursor.execute("SELECT 1 FROM processed_filings WHERE id = ?", (filing_id,))
+                row = cursor.fetchone()
+            if row is None:
+                return False
+            self._remember([filing_id])
+            return True
         except sqlite3.Error as e:
             logging.error(f"Error checking filing ID {filing_id}: {e}")
             return False
 
+    def add_filings(self, filing_ids: Iterable[str], crypto_detected: Optional[bool] = None) -> int:
+        """
+        Adds several filing IDs to the processed_filings table in one transaction.
+
+        IDs that are already present are ignored.
+
+        Args:
+            filing_ids: The unique IDs of the filings to add.
+            crypto_detected: The analysis outcome shared by these filings, if known.
+
+        Returns:
+            The number of IDs that were newly added.
+        """
+        if not self.conn:
+            return 0
+        filing_ids = list(filing_ids)
+        processed_at = int(time.time())
+        try:
+            with metrics.DB_SECONDS.labels("add_filings").time(), self.conn:
+                cursor = self.conn.executemany(
+                    "INSERT OR IGNORE INTO processed_filings (id, processed_at, crypto_detected) VALUES (?, ?, ?)",
+                    ((filing_id, processed_at, crypto_detected) for filing_id in filing_ids),
+                )
+            self._remember(filing_ids)
+            return cursor.rowcount
+        except sqlite3.Error as e:
+            logging.error(f"Error adding filing IDs: {e}")
+            return 0
+
+    def filter_unprocessed(self, filing_ids: Iterable[str]) -> List[str]:
+        """
+        Returns the filing IDs that are not in the processed_filings table yet.
+
+        A batch of up to MAX_QUERY_PARAMETERS IDs is answered with a single query.
+
+        Args:
+            filing_ids: The unique IDs of the filings to check.
+
+        Returns:
+            The unprocessed IDs, without duplicates, in their original order. If
+            the database cannot be queried, every ID not in the in-memory cache is
+            returned, as filing_exists would report them missing.
+        """
+        unique_ids = list(dict.fromkeys(filing_ids))
+        processed = {filing_id for filing_id in unique_ids if self._cached(filing_id)}
+        uncached_ids = [filing_id for filing_id in unique_ids if filing_id not in processed]
+        if not self.conn or not uncached_ids:
+            return uncached_ids
+        try:
+            with metrics.DB_SECONDS.labels("filter_unprocessed").time():
+                self._select_processed(uncached_ids, processed)
+        except sqlite3.Error as e:
+            logging.error(f"Error checking filing IDs: {e}")
+        return [filing_id for filing_id in unique_ids if filing_id not in processed]
+
+    def _select_processed(self, filing_ids: List[str], processed: Set[str]):
+        """
+        Adds the IDs of filing_ids found in the table to processed, in batches.
+        """
+        cursor = self.conn.cursor()
+        for i in range(0, len(filing_ids), MAX_QUERY_PARAMETERS):
+            batch = filing_ids[i:i + MAX_QUERY_PARAMETERS]
+            placeholders = ",".join("?" * len(batch))
+            cursor.execute(
+                f"SELECT id FROM processed_filings WHERE id IN ({placeholders})",
+                batch,
+            )
+            found = [row[0] for row in cursor.fetchall()]
+            processed.update(found)
+            self._remember(found)
+
+    def compact(self, retention_days: float) -> int:
+        """
+        Deletes filings processed more than retention_days ago and frees their pages.
+
+        Deletion uses the processed_at index; the freed pages are then returned to
+        the file system with an incremental vacuum, and the WAL is truncated, so
+        the database file and lookup depth stay bounded. Retention must comfortably
+        exceed how far back the feed is read, or old filings would be reprocessed.
+
+        Args:
+            retention_days: Age in days after which a processed filing is forgotten.
+
+        Returns:
+            The number of filings deleted.
+        """
+        if not self.conn:
+            return 0
+        cutoff = int(time.time() - retention_days * 86400)
+        try:
+            with metrics.DB_SECONDS.labels("compact").time(), self.conn:
+                cursor = self.conn.execute(
+                    "DELETE FROM processed_filings WHERE processed_at < ?", (cutoff,)
+                )
+            deleted = cursor.rowcount
+            # executescript steps the pragma to completion; a cursor execute would
+            # only free a single page.
+            self.conn.executescript("PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);")
+            logging.info(f"Compacted database: removed {deleted} filings older than {retention_days} days.")
+            return deleted
+        except sqlite3.Error as e:
+            logging.error(f"Error compacting database: {e}")
+            return 0
+
     def close(self):
         """
         Closes the database connection.
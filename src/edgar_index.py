@@ -0,0 +1,237 @@
+import json
+import logging
+import os
+import tempfile
+from datetime import date, datetime, timedelta
+from typing import IO, Dict, Iterable, Iterator, List, NamedTuple, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+QUARTERLY = 'quarterly'
+DAILY = 'daily'
+# Paths of EDGAR's master index files below the Archives URL. The quarterly file
+# is served gzipped; the daily ones are plain (SecEdgarClient handles both).
+QUARTERLY_INDEX_PATH = 'edgar/full-index/{year}/QTR{quarter}/master.gz'
+DAILY_INDEX_PATH = 'edgar/daily-index/{year}/QTR{quarter}/master.{day:%Y%m%d}.idx'
+# The header of a master index ends with a line of dashes.
+HEADER_END = '-----'
+
+
+class IndexEntry(NamedTuple):
+    """
+    One filing listed in an EDGAR master index (CIK|Company Name|Form Type|Date
+    Filed|Filename).
+    """
+
+    cik: str
+    company: str
+    form_type: str
+    date_filed: date
+    filename: str
+
+    @property
+    def accession(self) -> str:
+        """
+        The dashed accession number, e.g. '0001234567-25-000001'.
+        """
+        return os.path.basename(self.filename)[:-len('.txt')]
+
+    def to_filing(self, archives_url: str) -> Dict[str, str]:
+        """
+        Builds a filing entry shaped like those of the live feed, so it can go
+        through the same fetch-and-analyze path.
+
+        Args:
+            archives_url: Base URL of the EDGAR archives, without trailing slash.
+        """
+        accession = self.accession
+        return {
+            'title': f"{self.form_type} - {self.company} ({self.cik})",
+            'link': f"{archives_url}/edgar/data/{self.cik}/{accession.replace('-', '')}/{accession}-index.htm",
+            'summary': '',
+            'published': self.date_filed.isoformat(),
+        }
+
+
+def index_urls(archives_url: str, start: date, end: date, granularity: str = QUARTERLY) -> List[str]:
+    """
+    Lists the master index files covering a date range.
+
+    Args:
+        archives_url: Base URL of the EDGAR archives, without trailing slash.
+        start: First filing date of the range.
+        end: Last filing date of the range (inclusive).
+        granularity: 'quarterly' for one full-index file per calendar quarter, or
+            'daily' for one daily-index file per weekday.
+
+    Returns:
+        The index URLs in chronological order.
+    """
+    if granularity not in (QUARTERLY, DAILY):
+        raise ValueError(f"Unknown index granularity: {granularity}")
+    urls = []
+    if granularity == QUARTERLY:
+        year, quarter = start.year, (start.month - 1) // 3 + 1
+        while (year, quarter) <= (end.year, (end.month - 1) // 3 + 1):
+            urls.append(f"{archives_url}/{QUARTERLY_INDEX_PATH.format(year=year, quarter=quarter)}")
+            year, quarter = (year + 1, 1) if quarter == 4 else (year, quarter + 1)
+        return urls
+    day = start
+    while day <= end:
+        if day.weekday() < 5:
+            path = DAILY_INDEX_PATH.format(year=day.year, quarter=(day.month - 1) // 3 + 1, day=day)
+            urls.append(f"{archives_url}/{path}")
+        day += timedelta(days=1)
+    return urls
+
+
+def parse_master_index(lines: Iterable[str]) -> Iterator[IndexEntry]:
+    """
+    Parses the lines of a master index file.
+
+    Args:
+        lines: The decoded lines of the file, header included.
+
+    Yields:
+        One IndexEntry per filing; malformed lines are skipped.
+    """
+    lines = iter(lines)
+    for line in lines:
+        if line.startswith(HEADER_END):
+            break
+    for line in lines:
+        fields = line.rstrip('\r\n').split('|')
+        if len(fields) != 5 or not fields[4].endswith('.txt'):
+            continue
+        cik, company, form_type, date_filed, filename = fields
+        try:
+            filed = datetime.strptime(date_filed.replace('-', ''), '%Y%m%d').date()
+        except ValueError:
+            continue
+        yield IndexEntry(cik.strip(), company.strip(), form_type.strip(), filed, filename.strip())
+
+
+def form_selected(form_type: str, forms: Optional[Iterable[str]]) -> bool:
+    """
+    Tells whether a form type is wanted; a form also matches its amendments, so
+    '8-K' matches '8-K/A'.
+
+    Args:
+        form_type: The form type of a filing, e.g. '10-K/A'.
+        forms: The wanted form types; None selects every form.
+    """
+    if forms is None:
+        return True
+    form_type = form_type.upper()
+    return any(form_type in (form.upper(), form.upper() + '/A') for form in forms)
+
+
+def spool_filings(entries: Iterable[IndexEntry], archives_url: str, spool: IO[str]) -> int:
+    """
+    Writes the filing entries of index entries to a file, one JSON object per
+    line, so they can be processed after the index download has ended.
+
+    Args:
+        entries: The index entries, e.g. from parse_master_index.
+        archives_url: Base URL of the EDGAR archives, passed on to to_filing.
+        spool: A text file open for writing.
+
+    Returns:
+        The number of filings written.
+    """
+    count = 0
+    for entry in entries:
+        spool.write(json.dumps(entry.to_filing(archives_url)) + '\n')
+        count += 1
+    return count
+
+
+def read_filing_batches(spool: IO[str], batch_size: int) -> Iterator[List[Dict[str, str]]]:
+    """
+    Reads the filings written by spool_filings back, batch_size at a time.
+
+    Args:
+        spool: The file, positioned at the first filing.
+        batch_size: The maximum number of filings per batch.
+
+    Yields:
+        Lists of filing entries, in the order they were written.
+    """
+    batch = []
+    for line in spool:
+        batch.append(json.loads(line))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class BackfillCheckpoint:
+    """
+    Progress of a backfill run, saved to a JSON file so an interrupted run can
+    resume.
+
+    It records the index files whose filings were all processed, for one set of
+    run parameters; a run with different parameters starts over. Filings of an
+    index file that was only partly processed are skipped on resume anyway,
+    because they are in the Database.
+    """
+
+    def __init__(self, path: str, parameters: Dict):
+        """
+        Loads the checkpoint of a run, if one was saved with the same parameters.
+
+        Args:
+            path: The JSON file.
+            parameters: The run's parameters (JSON serializable), e.g. date range
+                and forms.
+        """
+        self.path = path
+        self.parameters = parameters
+        self.completed: List[str] = []
+        self.stats = {'filings': 0, 'alerts': 0, 'failures': 0}
+        try:
+            with open(path, encoding='utf-8') as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            logging.warning(f"Ignoring unreadable backfill checkpoint {path}: {e}")
+            return
+        if saved.get('parameters') != parameters:
+            logging.info(f"Backfill checkpoint {path} is for other parameters; starting over.")
+            return
+        self.completed = list(saved.get('completed', []))
+        self.stats.update(saved.get('stats', {}))
+
+    def is_completed(self, index_url: str) -> bool:
+        """
+        Tells whether every filing of an index file was processed.
+        """
+        return index_url in self.completed
+
+    def mark_completed(self, index_url: str):
+        """
+        Records a fully processed index file and saves the checkpoint.
+        """
+        if index_url not in self.completed:
+            self.completed.append(index_url)
+        self.save()
+
+    def save(self):
+        """
+        Writes the checkpoint atomically, so a crash never leaves a torn file.
+        """
+        directory = os.path.dirname(os.path.abspath(self.path))
+        fd, tmp_path = tempfile.mkstemp(prefix='.backfill-', suffix='.tmp', dir=directory)
+        try:
+            with open(fd, 'w', encoding='utf-8') as f:
+                json.dump({'parameters': self.parameters, 'completed': self.completed, 'stats': self.stats}, f)
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
@@ -0,0 +1,352 @@
+import codecs
+import gzip
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import BinaryIO, Dict, Iterator, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:  # zstd is optional; gzip from the standard library is the fallback
+    zstandard = None
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+GZIP_SUFFIX = '.txt.gz'
+ZSTD_SUFFIX = '.txt.zst'
+TEMP_SUFFIX = '.tmp'
+# Temporary files untouched for this long belong to no live writer (e.g. a
+# process killed mid-write); younger ones may be written by another process.
+STALE_TEMP_SECONDS = 3600
+
+
+def read_filing_file(path: str) -> bytes:
+    """
+    Reads a filing file, decompressing cache entries (.txt.gz, .txt.zst).
+
+    Args:
+        path: A cache entry or a plain .txt submission.
+
+    Returns:
+        The uncompressed submission bytes (UTF-8 for cache entries).
+    """
+    with open(path, 'rb') as f:
+        data = f.read()
+    if path.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError('zstandard is not installed')
+        return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    if path.endswith(GZIP_SUFFIX):
+        return gzip.decompress(data)
+    return data
+
+
+def open_filing_file(path: str) -> BinaryIO:
+    """
+    Opens a filing file for reading, decompressing cache entries on the fly.
+
+    Args:
+        path: A cache entry or a plain .txt submission.
+
+    Returns:
+        A binary file object yielding the uncompressed submission bytes.
+    """
+    if path.endswith(ZSTD_SUFFIX):
+        if zstandard is None:
+            raise RuntimeError('zstandard is not installed')
+        return zstandard.ZstdDecompressor().stream_reader(open(path, 'rb'), closefd=True)
+    if path.endswith(GZIP_SUFFIX):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+class FilingCache:
+    """
+    A size-capped on-disk cache of full submission texts, keyed by accession number.
+
+    Filings are stored UTF-8 encoded and compressed with zstd when the zstandard
+    package is installed, gzip otherwise; either format is read back. Every hit
+    touches the file's modification time, and when the cache grows past its cap the
+    least recently used files are deleted first. Entries are written to a temporary
+    file and renamed into place, so readers never see a partial filing.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 1024 * 1024 * 1024):
+        """
+        Initializes the FilingCache, creating the directory if needed.
+
+        Args:
+            directory: Directory holding the compressed filings.
+            max_bytes: Most bytes of compressed filings kept on disk.
+        """
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.suffix = ZSTD_SUFFIX if zstandard is not None else GZIP_SUFFIX
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._remove_stale_temp_files()
+        self._size = sum(size for _, size, _ in self._entries())
+        self._stats = {'hits': 0, 'misses': 0, 'stores': 0, 'evictions': 0}
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns the cache counters.
+
+        Returns:
+            A dictionary with the number of hits, misses, stored filings and evicted
+            filings, and the current size of the cache in bytes.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['bytes'] = self._size
+        return stats
+
+    def get(self, accession: str) -> Optional[str]:
+        """
+        Returns the cached text of a filing.
+
+        Args:
+            accession: The accession number, e.g. '0001234567-25-000001'.
+
+        Returns:
+            The full submission text, or None if the filing is not cached.
+        """
+        for suffix in (ZSTD_SUFFIX, GZIP_SUFFIX):
+            path = self._path(accession, suffix)
+            try:
+                text = read_filing_file(path).decode('utf-8')
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.warning(f"Dropping unreadable cached filing {path}: {e}")
+                self._remove(path)
+                continue
+            try:
+                os.utime(path)  # Mark as recently used for eviction
+            except OSError:
+                pass
+            with self._lock:
+                self._stats['hits'] += 1
+            return text
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def iter_chunks(self, accession: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[str]]:
+        """
+        Returns the cached text of a filing as an iterator of chunks, decompressed
+        and decoded as it is consumed, so memory use does not depend on its size.
+
+        Args:
+            accession: The accession number.
+            chunk_size: Number of uncompressed bytes per chunk.
+
+        Returns:
+            An iterator over the text, or None if the filing is not cached. A file
+            found corrupt while reading is dropped from the cache and the iterator
+            raises the error.
+        """
+        for suffix in (ZSTD_SUFFIX, GZIP_SUFFIX):
+            path = self._path(accession, suffix)
+            try:
+                f = open_filing_file(path)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logging.warning(f"Dropping unreadable cached filing {path}: {e}")
+                self._remove(path)
+                continue
+            try:
+                os.utime(path)  # Mark as recently used for eviction
+            except OSError:
+                pass
+            with self._lock:
+                self._stats['hits'] += 1
+            return self._read_chunks(f, path, chunk_size)
+        with self._lock:
+            self._stats['misses'] += 1
+        return None
+
+    def put(self, accession: str, text: str):
+        """
+        Stores the text of a filing.
+
+        Args:
+            accession: The accession number.
+            text: The full submission text.
+        """
+        writer = self.open_writer(accession)
+        writer.write(text)
+        writer.commit()
+
+    def open_writer(self, accession: str) -> 'FilingCacheWriter':
+        """
+        Starts storing a filing whose text arrives in chunks.
+
+        Args:
+            accession: The accession number.
+
+        Returns:
+            A writer; the filing is only added to the cache by its commit().
+        """
+        fd, temp_path = tempfile.mkstemp(prefix=f'.{accession}.', suffix=TEMP_SUFFIX, dir=self.directory)
+        return FilingCacheWriter(self, accession, os.fdopen(fd, 'wb'), temp_path)
+
+    def _commit(self, accession: str, temp_path: str):
+        """
+        Moves a completely written temporary file into place and enforces the cap.
+        """
+        path = self._path(accession, self.suffix)
+        size = os.path.getsize(temp_path)
+        with self._lock:
+            previous = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(temp_path, path)
+            self._size += size - previous
+            self._stats['stores'] += 1
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _evict(self):
+        """
+        Deletes the least recently used filings until the cache fits its cap.
+        Must be called with the lock held.
+        """
+        for path, size, _ in sorted(self._entries(), key=lambda entry: entry[2]):
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            self._size -= size
+            self._stats['evictions'] += 1
+
+    def _entries(self) -> Iterator[Tuple[str, int, float]]:
+        """
+        Yields (path, size, mtime) for every cached filing.
+        """
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith((ZSTD_SUFFIX, GZIP_SUFFIX)) and entry.is_file():
+                    stat = entry.stat()
+                    yield entry.path, stat.st_size, stat.st_mtime
+
+    def _remove_stale_temp_files(self):
+        """
+        Deletes temporary files left behind by writers that never finished; they
+        do not count toward max_bytes and would otherwise never go.
+        """
+        cutoff = time.time() - STALE_TEMP_SECONDS
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if not (entry.name.startswith('.') and entry.name.endswith(TEMP_SUFFIX)):
+                    continue
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                except OSError:
+                    continue
+
+    def _remove(self, path: str):
+        """
+        Deletes one cached file and updates the size.
+        """
+        with self._lock:
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                return
+            self._size -= size
+
+    def _read_chunks(self, f: BinaryIO, path: str, chunk_size: int) -> Iterator[str]:
+        """
+        Decodes an opened cache entry chunk by chunk, then closes it.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')()
+        try:
+            with f:
+                while True:
+                    data = f.read(chunk_size)
+                    if not data:
+                        break
+                    text = decoder.decode(data)
+                    if text:
+                        yield text
+                text = decoder.decode(b'', final=True)
+                if text:
+                    yield text
+        except Exception as e:
+            logging.warning(f"Dropping unreadable cached filing {path}: {e}")
+            self._remove(path)
+            raise
+
+    def _path(self, accession: str, suffix: str) -> str:
+        return os.path.join(self.directory, f'{accession}{suffix}')
+
+    def _compressor(self, raw: BinaryIO):
+        """
+        Wraps a binary file in a streaming compressor of this cache's format.
+        """
+        if self.suffix == ZSTD_SUFFIX:
+            return zstandard.ZstdCompressor(level=3).stream_writer(raw)
+        return gzip.GzipFile(fileobj=raw, mode='wb', compresslevel=6)
+
+
+class FilingCacheWriter:
+    """
+    Compresses a filing into a temporary file chunk by chunk. commit() adds it to
+    the cache; abort() (or commit() never being called) leaves the cache untouched.
+    """
+
+    def __init__(self, cache: FilingCache, accession: str, raw: BinaryIO, temp_path: str):
+        self._cache = cache
+        self._accession = accession
+        self._raw = raw
+        self._stream = cache._compressor(raw)
+        self._temp_path = temp_path
+        self._closed = False
+
+    def write(self, text: str):
+        """
+        Appends a chunk of the filing text.
+        """
+        self._stream.write(text.encode('utf-8'))
+
+    def commit(self):
+        """
+        Finishes the file and adds the filing to the cache.
+        """
+        if self._closed:
+            return
+        self._close_files()
+        self._cache._commit(self._accession, self._temp_path)
+
+    def abort(self):
+        """
+        Discards the partially written filing.
+        """
+        if self._closed:
+            return
+        try:
+            self._close_files()
+        except Exception:
+            pass
+        try:
+            os.remove(self._temp_path)
+        except FileNotFoundError:
+            pass
+
+    def _close_files(self):
+        self._closed = True
+        try:
+            self._stream.close()
+        finally:
+            if not self._raw.closed:
+                self._raw.close()
@@ -0,0 +1,92 @@
+from typing import Iterable, List, NamedTuple, Optional
+from urllib.parse import urljoin
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+from src.sgml_parser import type_selected
+from src.text_extraction import PARSER_BACKEND
+
+# Exhibits fetched along with the primary document by default: press releases
+# and other additional exhibits, where announcements usually are.
+DEFAULT_EXHIBIT_TYPES = ('EX-99',)
+# Inline XBRL documents are linked through the viewer, e.g. /ix?doc=/Archives/...
+_INLINE_VIEWER_PREFIX = '/ix?doc='
+
+
+class IndexDocument(NamedTuple):
+    """
+    One row of the document table of a filing's -index.htm page.
+
+    size is the size in bytes the index states, or None if it is missing.
+    """
+
+    sequence: str
+    description: str
+    filename: str
+    url: str
+    type: str
+    size: Optional[int]
+
+
+def parse_filing_index(page_html: str, page_url: str) -> List[IndexDocument]:
+    """
+    Reads the document table ('Document Format Files') of a filing index page.
+
+    The 'Data Files' table (XBRL) and the complete submission text file, which
+    has no type, are not included.
+
+    Args:
+        page_html: The -index.htm page.
+        page_url: The page's URL, which document links are relative to.
+
+    Returns:
+        The documents in the order of the table, the primary document first.
+    """
+    tables = SoupStrainer('table', attrs={'summary': 'Document Format Files'})
+    soup = BeautifulSoup(page_html, PARSER_BACKEND, parse_only=tables)
+    documents = []
+    for row in soup.find_all('tr'):
+        cells = row.find_all('td')
+        if len(cells) < 5:
+            continue  # The heading row
+        link = cells[2].find('a', href=True)
+        doc_type = cells[3].get_text(strip=True)
+        if link is None or not doc_type:
+            continue
+        href = link['href']
+        if href.startswith(_INLINE_VIEWER_PREFIX):
+            href = href[len(_INLINE_VIEWER_PREFIX):]
+        size = cells[4].get_text(strip=True)
+        documents.append(IndexDocument(
+            sequence=cells[0].get_text(strip=True),
+            description=cells[1].get_text(strip=True),
+            filename=link.get_text(strip=True),
+            url=urljoin(page_url, href),
+            type=doc_type,
+            size=int(size) if size.isdigit() else None,
+        ))
+    return documents
+
+
+def select_documents(
+    documents: List[IndexDocument], exhibit_types: Iterable[str] = DEFAULT_EXHIBIT_TYPES
+) -> List[IndexDocument]:
+    """
+    Picks the primary document and the exhibits of the given types.
+
+    Args:
+        documents: The documents of a filing index, from parse_filing_index.
+        exhibit_types: Types of the other documents to keep; 'EX-99' also matches
+            'EX-99.1' and so on.
+
+    Returns:
+        The selected documents in index order; empty if there is no document.
+    """
+    if not documents:
+        return []
+    primary = next((document for document in documents if document.sequence == '1'), documents[0])
+    exhibit_types = tuple(exhibit_types)
+    return [
+        document for document in documents
+        if document is primary or type_selected(document.type, exhibit_types, ())
+    ]
@@ -0,0 +1,453 @@
+import json
+import logging
+import sqlite3
+import time
+import uuid
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, Iterator, NamedTuple, Optional, Set, Tuple
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Most accession numbers bound to one IN (...) query, well below SQLite's limit
+MAX_QUERY_PARAMETERS = 500
+
+# Job states
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+class Job(NamedTuple):
+    """
+    A filing leased to a worker.
+
+    lease_token identifies this lease; complete() and fail() only act while the
+    lease is still held, so a worker whose lease expired cannot overwrite the
+    outcome of the worker that took the job over.
+    """
+
+    id: int
+    accession: str
+    payload: Dict
+    attempts: int
+    lease_token: str
+
+
+class JobQueue(ABC):
+    """
+    A durable queue of filings to process, shared by a feed poller and workers.
+
+    Jobs are leased for a visibility timeout: a job whose worker dies becomes
+    available again when its lease expires, and a failed job is retried with
+    backoff until it runs out of attempts.
+
+    Alerts are claimed separately with claim_alert() before they are sent, and
+    confirmed with confirm_alert() once delivered, so a job processed twice
+    alerts once. A claim that is never confirmed, because its worker died or
+    the send failed, can be taken over after the claim timeout, so the alert is
+    not lost either. Only a worker stalled for longer than the timeout between
+    sending and confirming can cause a second alert.
+
+    This class defines the interface; SqliteJobQueue implements it locally.
+    """
+
+    @abstractmethod
+    def enqueue(self, jobs: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Adds filings to the queue, ignoring accession numbers already queued.
+
+        Args:
+            jobs: (accession number, payload) pairs; the payload must be JSON
+                serializable (e.g. the filing entry from the feed).
+
+        Returns:
+            The number of jobs added.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def contains(self, accession: str) -> bool:
+        """
+        Tells whether a filing was ever queued (and not purged since).
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def filter_known(self, accessions: Iterable[str]) -> Set[str]:
+        """
+        Returns the accession numbers that were ever queued (and not purged
+        since), checking a whole batch at once.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Takes the oldest available job for lease_seconds.
+
+        Args:
+            worker_id: Name of the worker, for diagnostics.
+            lease_seconds: Visibility timeout after which the job is handed out
+                again unless completed, failed or extended.
+
+        Returns:
+            The leased job, or None if no job is available.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def extend(self, job: Job, lease_seconds: float) -> bool:
+        """
+        Renews a lease for a job that is taking long. Returns False if it was lost.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def complete(self, job: Job) -> bool:
+        """
+        Marks a leased job as done. Returns False if the lease was lost.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Releases a leased job after an error, to be retried after a backoff or
+        marked failed once out of attempts. Returns False if the lease was lost.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def claim_alert(self, accession: str, claim_seconds: Optional[float] = None) -> bool:
+        """
+        Atomically claims the right to send the alert for a filing.
+
+        Args:
+            accession: The accession number.
+            claim_seconds: Age after which an unconfirmed claim is taken over;
+                None never takes a claim over.
+
+        Returns:
+            True for the first claim of the filing, or when taking over an
+            unconfirmed claim older than claim_seconds; False otherwise.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def confirm_alert(self, accession: str):
+        """
+        Records that the claimed alert for a filing was delivered.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def release_alert(self, accession: str):
+        """
+        Gives up an unconfirmed claim after the send failed, so a retry can claim
+        the alert again.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def alert_delivered(self, accession: str) -> bool:
+        """
+        Tells whether the alert for a filing was confirmed as delivered.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns the number of jobs in each state.
+        """
+        raise NotImplementedError
+
+    @abstractmethod
+    def purge(self, older_than_seconds: float) -> int:
+        """
+        Deletes finished jobs and alert claims older than the given age.
+
+        Returns:
+            The number of jobs deleted.
+        """
+        raise NotImplementedError
+
+    def close(self):
+        """
+        Releases the backend's resources. Not abstract, as a backend may hold
+        none; this default does nothing.
+        """
+        pass
+
+
+class SqliteJobQueue(JobQueue):
+    """
+    A JobQueue in an SQLite file, shared by the processes of one machine.
+
+    Every state change is a single UPDATE guarded by the job's state or lease
+    token, run in an immediate transaction, so concurrent workers never lease the
+    same job at the same time.
+    """
+
+    def __init__(
+        self,
+        db_path: str = "jobs.db",
+        max_attempts: int = 5,
+        retry_delay: float = 30.0,
+        clock: Callable[[], float] = time.time,
+    ):
+        """
+        Initializes the SqliteJobQueue, creating its tables if needed.
+
+        Args:
+            db_path: The path to the SQLite database file.
+            max_attempts: Number of leases a job gets before it is marked failed.
+            retry_delay: Delay before the first retry; it doubles with every
+                further attempt, up to an hour.
+            clock: Wall clock in seconds, replaceable in tests.
+        """
+        self.db_path = db_path
+        self.max_attempts = max(1, max_attempts)
+        self.retry_delay = retry_delay
+        self._clock = clock
+        # Autocommit mode: transactions are opened explicitly with BEGIN IMMEDIATE.
+        self.conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS filing_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                accession TEXT NOT NULL UNIQUE,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                available_at REAL NOT NULL,
+                lease_token TEXT,
+                leased_by TEXT,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_filing_jobs_available
+                ON filing_jobs (status, available_at);
+            CREATE TABLE IF NOT EXISTS sent_alerts (
+                accession TEXT PRIMARY KEY,
+                claimed_at REAL NOT NULL,
+                delivered_at REAL
+            );
+            """
+        )
+        columns = [row[1] for row in self.conn.execute("PRAGMA table_info(sent_alerts)")]
+        if "delivered_at" not in columns:
+            # Claims made before delivery was confirmed were sent right after.
+            with self._transaction():
+                self.conn.execute("ALTER TABLE sent_alerts ADD COLUMN delivered_at REAL")
+                self.conn.execute("UPDATE sent_alerts SET delivered_at = claimed_at")
+
+    def enqueue(self, jobs: Iterable[Tuple[str, Dict]]) -> int:
+        """
+        Inserts the jobs in one transaction; see JobQueue.enqueue.
+        """
+        now = self._clock()
+        rows = [(accession, json.dumps(payload), now, now, now) for accession, payload in jobs]
+        with self._transaction():
+            before = self.conn.total_changes
+            self.conn.executemany(
+                "INSERT OR IGNORE INTO filing_jobs (accession, payload, available_at, created_at, updated_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            return self.conn.total_changes - before
+
+    def contains(self, accession: str) -> bool:
+        """
+        Looks the accession number up; see JobQueue.contains.
+        """
+        row = self.conn.execute("SELECT 1 FROM filing_jobs WHERE accession = ?", (accession,)).fetchone()
+        return row is not None
+
+    def filter_known(self, accessions: Iterable[str]) -> Set[str]:
+        """
+        Selects the queued accession numbers with one IN (...) query per
+        MAX_QUERY_PARAMETERS of them; see JobQueue.filter_known.
+        """
+        unique_accessions = list(dict.fromkeys(accessions))
+        known = set()
+        for i in range(0, len(unique_accessions), MAX_QUERY_PARAMETERS):
+            batch = unique_accessions[i:i + MAX_QUERY_PARAMETERS]
+            placeholders = ",".join("?" * len(batch))
+            rows = self.conn.execute(f"SELECT accession FROM filing_jobs WHERE accession IN ({placeholders})", batch)
+            known.update(row[0] for row in rows)
+        return known
+
+    def lease(self, worker_id: str, lease_seconds: float) -> Optional[Job]:
+        """
+        Leases the job available longest, failing expired leases out of
+        attempts first; see JobQueue.lease.
+        """
+        now = self._clock()
+        token = uuid.uuid4().hex
+        with self._transaction():
+            # Expired leases that used up their attempts are not handed out again.
+            self.conn.execute(
+                "UPDATE filing_jobs SET status = ?, last_error = 'lease expired', updated_at = ? "
+                "WHERE status = ? AND available_at <= ? AND attempts >= ?",
+                (FAILED, now, LEASED, now, self.max_attempts),
+            )
+            row = self.conn.execute(
+                "SELECT id, accession, payload, attempts FROM filing_jobs "
+                "WHERE status IN (?, ?) AND available_at <= ? ORDER BY available_at, id LIMIT 1",
+                (PENDING, LEASED, now),
+            ).fetchone()
+            if row is None:
+                return None
+            job_id, accession, payload, attempts = row
+            # For a leased job available_at is the lease expiry.
+            self.conn.execute(
+                "UPDATE filing_jobs SET status = ?, attempts = attempts + 1, available_at = ?, "
+                "lease_token = ?, leased_by = ?, updated_at = ? WHERE id = ?",
+                (LEASED, now + lease_seconds, token, worker_id, now, job_id),
+            )
+        return Job(job_id, accession, json.loads(payload), attempts + 1, token)
+
+    def extend(self, job: Job, lease_seconds: float) -> bool:
+        """
+        Moves the lease expiry forward; see JobQueue.extend.
+        """
+        now = self._clock()
+        return self._update_leased(job, "available_at = ?, updated_at = ?", (now + lease_seconds, now))
+
+    def complete(self, job: Job) -> bool:
+        """
+        Marks the job done; see JobQueue.complete.
+        """
+        return self._update_leased(
+            job, "status = ?, lease_token = NULL, updated_at = ?", (DONE, self._clock())
+        )
+
+    def fail(self, job: Job, error: str) -> bool:
+        """
+        Schedules a retry after an exponential backoff, or marks the job failed
+        after max_attempts; see JobQueue.fail.
+        """
+        now = self._clock()
+        if job.attempts >= self.max_attempts:
+            logging.error(f"Giving up on filing {job.accession} after {job.attempts} attempts: {error}")
+            return self._update_leased(
+                job, "status = ?, lease_token = NULL, last_error = ?, updated_at = ?", (FAILED, error, now)
+            )
+        delay = min(self.retry_delay * 2 ** (job.attempts - 1), 3600.0)
+        logging.warning(f"Retrying filing {job.accession} in {delay:.0f}s: {error}")
+        return self._update_leased(
+            job,
+            "status = ?, available_at = ?, lease_token = NULL, last_error = ?, updated_at = ?",
+            (PENDING, now + delay, error, now),
+        )
+
+    def claim_alert(self, accession: str, claim_seconds: Optional[float] = None) -> bool:
+        """
+        Inserts the claim, or takes over an unconfirmed one that is too old;
+        see JobQueue.claim_alert.
+        """
+        now = self._clock()
+        with self._transaction():
+            try:
+                self.conn.execute("INSERT INTO sent_alerts (accession, claimed_at) VALUES (?, ?)", (accession, now))
+                return True
+            except sqlite3.IntegrityError:
+                if claim_seconds is None:
+                    return False
+            cursor = self.conn.execute(
+                "UPDATE sent_alerts SET claimed_at = ? "
+                "WHERE accession = ? AND delivered_at IS NULL AND claimed_at <= ?",
+                (now, accession, now - claim_seconds),
+            )
+        if cursor.rowcount:
+            logging.warning(f"Taking over the unconfirmed alert claim for {accession}.")
+        return cursor.rowcount > 0
+
+    def confirm_alert(self, accession: str):
+        """
+        Sets the delivery time of the claim; see JobQueue.confirm_alert.
+        """
+        with self._transaction():
+            self.conn.execute(
+                "UPDATE sent_alerts SET delivered_at = ? WHERE accession = ?", (self._clock(), accession)
+            )
+
+    def release_alert(self, accession: str):
+        """
+        Deletes the unconfirmed claim; see JobQueue.release_alert.
+        """
+        with self._transaction():
+            self.conn.execute("DELETE FROM sent_alerts WHERE accession = ? AND delivered_at IS NULL", (accession,))
+
+    def alert_delivered(self, accession: str) -> bool:
+        """
+        Looks for a confirmed claim; see JobQueue.alert_delivered.
+        """
+        row = self.conn.execute(
+            "SELECT 1 FROM sent_alerts WHERE accession = ? AND delivered_at IS NOT NULL", (accession,)
+        ).fetchone()
+        return row is not None
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Counts the jobs per state; see JobQueue.get_stats.
+        """
+        stats = dict.fromkeys((PENDING, LEASED, DONE, FAILED), 0)
+        for status, count in self.conn.execute("SELECT status, COUNT(*) FROM filing_jobs GROUP BY status"):
+            stats[status] = count
+        return stats
+
+    def purge(self, older_than_seconds: float) -> int:
+        """
+        Deletes old finished jobs and alert claims; see JobQueue.purge.
+        """
+        cutoff = self._clock() - older_than_seconds
+        with self._transaction():
+            deleted = self.conn.execute(
+                "DELETE FROM filing_jobs WHERE status IN (?, ?) AND updated_at < ?", (DONE, FAILED, cutoff)
+            ).rowcount
+            self.conn.execute("DELETE FROM sent_alerts WHERE claimed_at < ?", (cutoff,))
+        return deleted
+
+    def close(self):
+        """
+        Closes the database connection.
+        """
+        self.conn.close()
+
+    def _update_leased(self, job: Job, assignments: str, values: Tuple) -> bool:
+        """
+        Applies an update to a job only while this lease still holds it.
+        """
+        with self._transaction():
+            cursor = self.conn.execute(
+                f"UPDATE filing_jobs SET {assignments} WHERE id = ? AND status = ? AND lease_token = ?",
+                values + (job.id, LEASED, job.lease_token),
+            )
+        if cursor.rowcount == 0:
+            logging.warning(f"Lease on filing {job.accession} was lost; another worker took it over.")
+            return False
+        return True
+
+    @contextmanager
+    def _transaction(self) -> Iterator[None]:
+        """
+        Runs a with block in a BEGIN IMMEDIATE transaction, which takes the write
+        lock up front so two processes cannot both read a job as available.
+        """
+        self.conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield
+        except BaseException:
+            self.conn.execute("ROLLBACK")
+            raise
+        self.conn.execute("COMMIT")
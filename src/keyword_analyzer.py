@@ -1,10 +1,131 @@
+import codecs
 import logging
+import mmap
+import os
 import re
-from typing import Dict, Optional
+import time
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from src import metrics
+from src.filing_cache import GZIP_SUFFIX, ZSTD_SUFFIX, open_filing_file
+from src.sgml_parser import DEFAULT_EXCLUDED_TYPES, DocumentFilter, Segment, iter_segments
+from src.text_extraction import HtmlTextExtractor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Every character str.splitlines() treats as a line boundary.
+LINE_BREAKS = '\n\r\x0b\x0c\x1c\x1d\x1e\x85\u2028\u2029'
+LINE_BREAK_PATTERN = re.compile('[' + LINE_BREAKS + ']')
+HTML_TAG_PATTERN = re.compile(r'<[^>]*>')
+# Line boundaries in byte-level scans: the ASCII subset of LINE_BREAKS.
+BYTES_LINE_BREAKS = (b'\n', b'\r', b'\x0b', b'\x0c', b'\x1c', b'\x1d', b'\x1e')
+BYTES_LINE_BREAK_PATTERN = re.compile(rb'[\n\r\x0b\x0c\x1c-\x1e]')
+# Bytes of a memory-mapped filing copied out (and lowercased) at a time.
+WINDOW_SIZE = 4 * 1024 * 1024
+READ_CHUNK_SIZE = 1024 * 1024
+# A line longer than this (e.g. an inline XBRL document without line breaks) is
+# scanned in pieces cut after a tag or a space, so it is not held in memory.
+MAX_PENDING_CHARS = 1024 * 1024
+# Matching lines quoted in the summary, and offsets kept per keyword; counts are
+# exact however many hits a filing has.
+SUMMARY_SNIPPETS = 3
+MAX_KEYWORD_OFFSETS = 100
+
+
+class LineMatch(NamedTuple):
+    """
+    A line containing at least one keyword.
+
+    keyword is the first keyword of the line in keyword list order, which the
+    summary reports; hits holds (keyword, offset) for every occurrence of any
+    keyword in the line.
+    """
+
+    keyword: str
+    snippet: str
+    hits: List[Tuple[str, int]]
+
+
+class AnalysisResult(dict):
+    """
+    The outcome of a keyword analysis.
+
+    As a dictionary it holds 'crypto_detected' and 'summary', exactly as the plain
+    dictionaries analyze_filing used to return, so callers that only alert keep
+    working unchanged. The attributes tell where and how often each keyword
+    occurred:
+
+    keyword_counts: Occurrences of each keyword, in order of first occurrence.
+    keyword_offsets: Offsets of the first MAX_KEYWORD_OFFSETS occurrences of each
+        keyword into the filing: bytes for files scanned by feed_path, characters
+        for text (the same for ASCII filings). In HTML documents they are estimated
+        from the position in the extracted text.
+    matched_lines: Number of lines containing a keyword.
+    truncated: True if the analysis stopped at its early-exit limit, in which case
+        the counts only cover the part of the filing read until then.
+    """
+
+    def __init__(
+        self,
+        summary: Optional[str] = None,
+        keyword_counts: Optional[Dict[str, int]] = None,
+        keyword_offsets: Optional[Dict[str, List[int]]] = None,
+        matched_lines: int = 0,
+        truncated: bool = False,
+    ):
+        super().__init__(crypto_detected=summary is not None, summary=summary)
+        self.keyword_counts = keyword_counts or {}
+        self.keyword_offsets = keyword_offsets or {}
+        self.matched_lines = matched_lines
+        self.truncated = truncated
+
+    @property
+    def total_hits(self) -> int:
+        """
+        The number of keyword occurrences found.
+        """
+        return sum(self.keyword_counts.values())
+
+    def ranked_keywords(self) -> List[Tuple[str, int]]:
+        """
+        Returns (keyword, count) pairs, most frequent first; ties keep the order
+        of first occurrence.
+        """
+        return sorted(self.keyword_counts.items(), key=lambda item: -item[1])
+
+
+def _trie_alternation(words: Iterable[str]) -> str:
+    """
+    Builds a regex alternation shaped like a prefix trie of the given words.
+
+    The regex engine tries alternatives one by one, so ['bitcoin', 'bittensor'] as
+    'bit(?:coin|tensor)' is far cheaper to reject than 'bitcoin|bittensor'.
+
+    Args:
+        words: The literal words to match.
+
+    Returns:
+        A non-capturing regex group matching exactly the given words.
+    """
+    trie: Dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def build(node: Dict[str, dict]) -> str:
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        if len(branches) == 1 and '' not in node:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')' + ('?' if '' in node else '')
+
+    return '(?:' + build(trie) + ')'
+
+
 class KeywordAnalyzer:
     """
     A client for analyzing text content for crypto-related keywords.
@@ -27,39 +148,554 @@ class KeywordAnalyzer:
         'Elon Musk', 'Donald Trump', 'Cynthia Lummis', 'Larry Fink',
         # 'ETC' gives too many false positives 
     ]
-    
-    def analyze_filing(self, filing_text: str) -> Dict[str, Optional[str]]:
+
+    def __init__(
+        self,
+        include_types: Optional[Iterable[str]] = None,
+        exclude_types: Iterable[str] = DEFAULT_EXCLUDED_TYPES,
+        keywords: Optional[Iterable[str]] = None,
+    ):
+        """
+        Compiles the keyword matchers once so they can be reused for every filing.
+
+        Args:
+            include_types: If given, only documents of these <TYPE>s (e.g. '8-K',
+                'EX-99') of an SGML submission are analyzed.
+            exclude_types: Document types that are never analyzed. Binary (uuencoded)
+                documents are always skipped.
+            keywords: Keywords to look for instead of CRYPTO_KEYWORDS, in the order
+                they are reported (e.g. a candidate list being backtested).
+        """
+        self.keywords = list(self.CRYPTO_KEYWORDS if keywords is None else keywords)
+        if not self.keywords:
+            raise ValueError("At least one keyword is required.")
+        self.include_types = include_types
+        self.exclude_types = exclude_types
+        # All keywords are merged into one trie-shaped alternation, so a single pass
+        # finds candidate lines. Backtracking means a position matches if and only if
+        # some individual keyword pattern would match there.
+        alternation = _trie_alternation(keyword.lower() for keyword in self.keywords)
+        self._combined_pattern = re.compile(r'\b' + alternation + r'\b', re.IGNORECASE)
+        # Case-sensitive twin for ASCII text, which is searched lowercased instead.
+        self._lowercase_pattern = re.compile(r'\b' + alternation + r'\b')
+        # Bytes twin of the above for memory-mapped files; bytes.lower() only folds
+        # ASCII letters, which keeps offsets intact whatever the encoding.
+        self._bytes_pattern = re.compile(rb'\b' + alternation.encode('utf-8') + rb'\b')
+        # Per-keyword patterns, only used on the (rare) lines that contain a hit, to
+        # report the first keyword in list order just like a keyword loop.
+        self._keyword_patterns = [
+            (keyword, re.compile(r'\b' + re.escape(keyword) + r'\b', re.IGNORECASE))
+            for keyword in self.keywords
+        ]
+        # Maps a lowercased match of the combined pattern back to its keyword; the
+        # first keyword in list order wins if two only differ in case.
+        self._keywords_by_match = {keyword.lower(): keyword for keyword in reversed(self.keywords)}
+
+    def analyze_filing(
+        self, filing_text: str, max_snippets: Optional[int] = None, max_keywords: Optional[int] = None
+    ) -> AnalysisResult:
         """
         Analyzes the filing text for crypto-related keywords and generates a snippet.
 
         Args:
             filing_text: The full text of the SEC filing.
+            max_snippets: Stop after this many matching lines; None scans everything.
+            max_keywords: Stop once this many distinct keywords were found; None
+                scans everything.
 
         Returns:
-            A dictionary containing the analysis result.
-            If crypto content is found, it returns {'crypto_detected': True, 'summary': '...'}.
-            If not, it returns {'crypto_detected': False, 'summary': None}.
-        """
-        detected_keywords = []
-        snippet = []
-        lines = filing_text.splitlines()
-
-        for line in lines:
-            for keyword in self.CRYPTO_KEYWORDS:
-                if re.search(r'\b' + re.escape(keyword) + r'\b', line, re.IGNORECASE):
-                    detected_keywords.append(keyword)
-                    cleaned_line = re.sub(r'<[^>]*>', '', line.strip())
-                    snippet.append(cleaned_line)
-                    break  # Move to the next line once a keyword is found in the current line
-
-        if detected_keywords:
-            # Create a unique list of detected keywords
-            unique_keywords = list(set(detected_keywords))
-            summary_text = f"Crypto keywords detected: {', '.join(unique_keywords)}. " \
-                           f"Snippet: {' '.join(snippet[:3])}..."
-            return {'crypto_detected': True, 'summary': summary_text}
+            An AnalysisResult. As a dictionary, if crypto content is found it is
+            {'crypto_detected': True, 'summary': '...'}, and if not
+            {'crypto_detected': False, 'summary': None}.
+        """
+        analysis = IncrementalAnalysis(self, max_snippets, max_keywords)
+        return analysis.finish(filing_text)
+
+    def analyze_stream(
+        self, chunks: Iterable[str], max_snippets: Optional[int] = 3, max_keywords: Optional[int] = None
+    ) -> AnalysisResult:
+        """
+        Analyzes a filing delivered in text chunks, stopping as soon as possible.
+
+        Chunks are fed to an IncrementalAnalysis, so memory use does not grow with the
+        size of the filing. Once max_snippets matching lines (or max_keywords distinct
+        keywords) have been found the remaining chunks are not consumed, and the chunk
+        iterator is closed (which stops the download when it comes from
+        SecEdgarClient.stream_full_filing_text).
+
+        Args:
+            chunks: The filing text, in chunks of any size.
+            max_snippets: Stop after this many matching lines; None scans everything.
+            max_keywords: Stop once this many distinct keywords were found.
+
+        Returns:
+            The same result as analyze_filing. With early stopping, the keyword
+            list and counts only cover the lines read before stopping.
+        """
+        analysis = IncrementalAnalysis(self, max_snippets, max_keywords)
+        try:
+            for chunk in chunks:
+                if analysis.feed(chunk):
+                    break
+        finally:
+            close = getattr(chunks, 'close', None)
+            if close is not None:
+                close()
+        return analysis.finish()
+
+    def analyze_path(
+        self, path: str, max_snippets: Optional[int] = None, max_keywords: Optional[int] = None
+    ) -> AnalysisResult:
+        """
+        Analyzes a filing stored on disk without loading it into memory.
+
+        See IncrementalAnalysis.feed_path; memory use does not depend on the size
+        of the file.
+
+        Args:
+            path: A plain .txt submission or a FilingCache entry.
+            max_snippets: Stop after this many matching lines; None scans everything.
+            max_keywords: Stop once this many distinct keywords were found.
+
+        Returns:
+            The same result as analyze_filing, with byte offsets for plain files.
+        """
+        analysis = IncrementalAnalysis(self, max_snippets, max_keywords)
+        analysis.feed_path(path)
+        return analysis.finish()
+
+    def new_document_filter(self) -> DocumentFilter:
+        """
+        Creates a DocumentFilter selecting the document types this analyzer scans.
+        """
+        return DocumentFilter(self.include_types, self.exclude_types)
+
+    def _iter_segment_lines(
+        self, text: str, segments: Iterable[Segment], extractors: Dict[int, HtmlTextExtractor], base: int = 0
+    ) -> Iterator[LineMatch]:
+        """
+        Yields a LineMatch for every matching line of the segments.
+
+        HTML segments are converted to text before they are scanned, so entities,
+        tags spread over several lines and hidden inline XBRL facts neither produce
+        nor pollute matches. Other segments are scanned as they are and only their
+        matching lines are stripped of tags.
+
+        Args:
+            text: The text the segments refer to.
+            segments: Segments from a DocumentFilter.
+            extractors: The HtmlTextExtractor of the HTML document being converted,
+                by document number; kept between calls for a filing fed in blocks.
+            base: Offset of text in the filing, added to the hit offsets.
+        """
+        for segment in segments:
+            # Each segment is scanned on its own, so only its slice gets lowercased.
+            block = text[segment.start:segment.end]
+            offset = base + segment.start
+            if not segment.html:
+                for keyword, line_start, line_end in self._iter_keyword_spans(block, [(0, len(block))]):
+                    line = block[line_start:line_end]
+                    yield self._line_match(keyword, line, HTML_TAG_PATTERN.sub('', line.strip()), offset + line_start)
+                continue
+            extractor = extractors.get(segment.document)
+            if extractor is None:
+                extractors.clear()
+                extractor = extractors[segment.document] = HtmlTextExtractor()
+            yield from self._iter_html_lines(extractor.feed(block), offset, len(block))
+
+    def _iter_html_lines(self, plain_text: str, offset: int, source_length: int) -> Iterator[LineMatch]:
+        """
+        Yields a LineMatch for every matching line of text extracted from HTML.
+
+        Offsets are estimated by scaling positions in the text to the length of
+        the HTML it was extracted from.
+
+        Args:
+            plain_text: The extracted text.
+            offset: Offset of the HTML block in the filing.
+            source_length: Length of the HTML block.
+        """
+        scale = source_length / len(plain_text) if plain_text else 0.0
+        for keyword, line_start, line_end in self._iter_keyword_spans(plain_text, [(0, len(plain_text))]):
+            line = plain_text[line_start:line_end]
+            yield self._line_match(keyword, line, line.strip(), offset + line_start * scale, scale)
+
+    def _iter_keyword_lines(
+        self, text: str, ranges: Iterable[Tuple[int, int]]
+    ) -> Iterator[Tuple[str, str]]:
+        """
+        Yields (keyword, line) for every line within the ranges containing a keyword.
+
+        Args:
+            text: The text to scan.
+            ranges: (start, end) offsets to scan, each starting and ending at a line
+                boundary.
+        """
+        for keyword, line_start, line_end in self._iter_keyword_spans(text, ranges):
+            yield keyword, text[line_start:line_end]
+
+    def _iter_keyword_spans(
+        self, text: str, ranges: Iterable[Tuple[int, int]]
+    ) -> Iterator[Tuple[str, int, int]]:
+        """
+        Yields (keyword, line start, line end) for every line within the ranges
+        containing a keyword.
+
+        The combined pattern is run over each range as a whole instead of over a list
+        of lines, so lines without a keyword are never materialized. Only one keyword
+        is reported per line: the first one in keyword list order.
+
+        Args:
+            text: The text to scan.
+            ranges: (start, end) offsets to scan, each starting and ending at a line
+                boundary.
+        """
+        # Lowercasing ASCII text keeps every offset intact and lets the regex engine
+        # skip its (much slower) case-insensitive matching.
+        if text.isascii():
+            haystack = text.lower()
+            search = self._lowercase_pattern.search
         else:
-            return {'crypto_detected': False, 'summary': None}
+            haystack = text
+            search = self._combined_pattern.search
+        for pos, endpos in ranges:
+            while True:
+                match = search(haystack, pos, endpos)
+                if match is None:
+                    break
+                line_start = max(pos, max(text.rfind(char, pos, match.start()) for char in LINE_BREAKS) + 1)
+                line_break = LINE_BREAK_PATTERN.search(text, match.end(), endpos)
+                line_end = line_break.start() if line_break else endpos
+                yield self._first_keyword(text[line_start:line_end]), line_start, line_end
+                pos = line_end + 1
+
+    def _iter_keyword_bytes_lines(self, window: bytes, base: int = 0) -> Iterator[LineMatch]:
+        """
+        Yields a LineMatch for every line of a bytes window containing a keyword;
+        only those lines are decoded.
+
+        Args:
+            window: UTF-8 (or ASCII compatible) text starting and ending at a line
+                boundary.
+            base: Offset of the window in the file, added to the hit offsets.
+        """
+        haystack = window.lower()
+        pos = 0
+        while True:
+            match = self._bytes_pattern.search(haystack, pos)
+            if match is None:
+                break
+            line_start = max(pos, max(window.rfind(char, pos, match.start()) for char in BYTES_LINE_BREAKS) + 1)
+            line_break = BYTES_LINE_BREAK_PATTERN.search(window, match.end())
+            line_end = line_break.start() if line_break else len(window)
+            line = window[line_start:line_end].decode('utf-8', errors='replace')
+            pos = line_end + 1
+            # Byte-level word boundaries are ASCII-only, so a match next to a
+            # non-ASCII letter is not a match for the text patterns.
+            keyword = self._find_keyword(line)
+            if keyword is not None:
+                snippet = HTML_TAG_PATTERN.sub('', line.strip())
+                yield self._line_match(keyword, line, snippet, base + line_start, encoded=True)
+
+    def _line_match(
+        self, keyword: str, line: str, snippet: str, offset: float, scale: float = 1.0, encoded: bool = False
+    ) -> LineMatch:
+        """
+        Builds the LineMatch of a matching line, locating every keyword in it.
+
+        Args:
+            keyword: The first keyword of the line in list order.
+            line: The line as scanned.
+            snippet: The line as quoted in the summary.
+            offset: Offset of the line in the filing.
+            scale: Filing units per character of the line (see _iter_html_lines).
+            encoded: Whether offsets count UTF-8 bytes rather than characters.
+        """
+        hits = []
+        for match in self._combined_pattern.finditer(line):
+            text = match.group()
+            hit = self._keywords_by_match.get(text.lower()) or self._find_keyword(text)
+            if hit is None:
+                continue
+            position = match.start()
+            if encoded and not line.isascii():
+                position = len(line[:position].encode('utf-8'))
+            hits.append((hit, int(offset + position * scale)))
+        return LineMatch(keyword, snippet, hits)
+
+    def _first_keyword(self, line: str) -> str:
+        """
+        Returns the first keyword in keyword list order that occurs in the line.
+
+        Args:
+            line: A line already known to contain at least one keyword.
+        """
+        keyword = self._find_keyword(line)
+        if keyword is None:
+            raise AssertionError('combined pattern matched a line no keyword pattern matches')
+        return keyword
+
+    def _find_keyword(self, line: str) -> Optional[str]:
+        """
+        Returns the first keyword in keyword list order that occurs in the line, if any.
+        """
+        for keyword, pattern in self._keyword_patterns:
+            if pattern.search(line):
+                return keyword
+        return None
+
+
+def _iter_windows(data: mmap.mmap, start: int, end: int) -> Iterator[Tuple[int, int]]:
+    """
+    Splits data[start:end] into windows of at most WINDOW_SIZE bytes ending at a
+    line break (unless a single line is longer than a window).
+    """
+    pos = start
+    while pos < end:
+        stop = min(end, pos + WINDOW_SIZE)
+        if stop < end:
+            cut = data.rfind(b'\n', pos, stop)
+            if cut != -1:
+                stop = cut + 1
+        yield pos, stop
+        pos = stop
+
+
+class IncrementalAnalysis:
+    """
+    Keyword analysis state for a filing that arrives in chunks.
+
+    Only the trailing partial line of the previous chunks is kept between calls to
+    feed(), so lines (and keywords) split across chunk boundaries are still found.
+    A partial line longer than MAX_PENDING_CHARS is scanned up to its last tag end
+    or space outside a keyword instead.
+
+    The early-exit policy decides how much of the filing is read: an alert needs
+    only a few matching lines (max_snippets) or distinct keywords (max_keywords),
+    while ranking or backtesting sets neither and gets complete counts.
+    """
+
+    def __init__(
+        self, analyzer: KeywordAnalyzer, max_snippets: Optional[int] = 3, max_keywords: Optional[int] = None
+    ):
+        """
+        Initializes an empty analysis.
+
+        Args:
+            analyzer: The analyzer whose compiled patterns are used.
+            max_snippets: Number of matching lines after which the analysis is done;
+                None never finishes early.
+            max_keywords: Number of distinct keywords after which the analysis is
+                done; None never finishes early.
+        """
+        self.analyzer = analyzer
+        self.max_snippets = max_snippets
+        self.max_keywords = max_keywords
+        self.matched_lines = 0
+        # First keyword of each matching line, in order of first occurrence
+        self.line_keywords: Dict[str, int] = {}
+        self.snippet: List[str] = []
+        self.keyword_counts: Dict[str, int] = {}
+        self.keyword_offsets: Dict[str, List[int]] = {}
+        # Pieces of the trailing partial line, joined only once it is complete
+        self._pending: List[str] = []
+        self._pending_chars = 0
+        # Offset of _pending in the filing
+        self._offset = 0
+        # Longest keyword, the text a forced cut of a long line must not fall into
+        self._keyword_chars = max(len(keyword) for keyword in analyzer.keywords)
+        self._document_filter = analyzer.new_document_filter()
+        self._html_extractors: Dict[int, HtmlTextExtractor] = {}
+        # Time spent scanning, excluding waits for the next chunk
+        self.analysis_seconds = 0.0
+
+    @property
+    def done(self) -> bool:
+        """
+        Whether the early-exit policy is satisfied and no more text is needed.
+        """
+        if self.max_snippets is not None and self.matched_lines >= self.max_snippets:
+            return True
+        return self.max_keywords is not None and len(self.keyword_counts) >= self.max_keywords
+
+    def feed(self, chunk: str) -> bool:
+        """
+        Scans every line completed by this chunk.
+
+        Args:
+            chunk: The next piece of the filing text.
+
+        Returns:
+            True once the analysis is done and no more chunks are needed.
+        """
+        if self.done:
+            return True
+        start = time.perf_counter()
+        # Only the new chunk is searched, so feeding stays linear in the filing size.
+        cut = max(chunk.rfind(char) for char in LINE_BREAKS) + 1
+        if not cut and self._pending_chars + len(chunk) >= MAX_PENDING_CHARS:
+            cut = self._forced_cut(chunk)
+        if cut:
+            self._pending.append(chunk[:cut])
+            buffer = ''.join(self._pending)
+            self._pending = [chunk[cut:]] if cut < len(chunk) else []
+            self._pending_chars = len(chunk) - cut
+            self._scan(buffer, len(buffer), self._offset)
+            self._offset += len(buffer)
+        elif chunk:
+            self._pending.append(chunk)
+            self._pending_chars += len(chunk)
+        self.analysis_seconds += time.perf_counter() - start
+        return self.done
+
+    def feed_path(self, path: str) -> int:
+        """
+        Scans a filing file; use it instead of feed(), on a fresh analysis.
+
+        Plain files are memory-mapped and scanned as bytes, WINDOW_SIZE bytes at a
+        time. Documents are located with iter_segments, so skipped documents are
+        never read. Plain-text windows are matched with the bytes pattern and only
+        matching lines are decoded. HTML documents are decoded and converted to
+        text one window at a time. Compressed cache entries cannot be mapped; they
+        are decompressed and fed in chunks. Either way, memory use does not depend
+        on the size of the file.
+
+        Args:
+            path: A plain .txt submission or a FilingCache entry.
+
+        Returns:
+            The number of uncompressed bytes read.
+        """
+        if path.endswith((GZIP_SUFFIX, ZSTD_SUFFIX)):
+            return self._feed_compressed(path)
+        with open(path, 'rb') as f:
+            size = os.fstat(f.fileno()).st_size
+            if size:
+                start = time.perf_counter()
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    self._scan_mapped(data)
+                self.analysis_seconds += time.perf_counter() - start
+        return size
+
+    def finish(self, final_text: str = '') -> AnalysisResult:
+        """
+        Scans the final unterminated line, if any, and returns the analysis result.
+
+        Args:
+            final_text: Text following the last chunk, scanned without looking for
+                line breaks first (analyze_filing passes the whole filing here).
+
+        Returns:
+            The same result as KeywordAnalyzer.analyze_filing.
+        """
+        start = time.perf_counter()
+        text = ''.join(self._pending) + final_text
+        if text and not self.done:
+            self._scan(text, len(text), self._offset)
+        self._offset += len(text)
+        self._pending = []
+        self._pending_chars = 0
+        self.analysis_seconds += time.perf_counter() - start
+        metrics.ANALYSIS_SECONDS.observe(self.analysis_seconds)
+
+        if not self.matched_lines:
+            return AnalysisResult()
+        summary = f"Crypto keywords detected: {', '.join(self.line_keywords)}. " \
+                  f"Snippet: {' '.join(self.snippet[:SUMMARY_SNIPPETS])}..."
+        return AnalysisResult(
+            summary, self.keyword_counts, self.keyword_offsets, self.matched_lines, truncated=self.done
+        )
+
+    def _forced_cut(self, chunk: str) -> int:
+        """
+        Returns where to split a line longer than MAX_PENDING_CHARS within chunk:
+        after its last tag end or space that no keyword spans, or 0 for nowhere.
+
+        Keywords may contain spaces ('digital assets'), so a cut needs a whole
+        keyword's length of text after it to be checked, and moves back to the
+        start of any keyword found across it.
+        """
+        span = self._keyword_chars
+        limit = len(chunk) - span
+        if limit <= 0:
+            return 0
+        cut = max(chunk.rfind('>', 0, limit), chunk.rfind(' ', 0, limit)) + 1
+        while cut:
+            crossing = next(
+                (m for m in self.analyzer._combined_pattern.finditer(chunk, max(0, cut - span), cut + span)
+                 if m.start() < cut < m.end()),
+                None,
+            )
+            if crossing is None:
+                break
+            cut = crossing.start()
+        return cut
+
+    def _record(self, match: LineMatch):
+        """
+        Adds a matching line to the counts, offsets and snippets.
+        """
+        self.matched_lines += 1
+        self.line_keywords[match.keyword] = self.line_keywords.get(match.keyword, 0) + 1
+        # Only the snippets quoted in the summary are kept.
+        if len(self.snippet) < SUMMARY_SNIPPETS:
+            self.snippet.append(match.snippet)
+        for keyword, offset in match.hits:
+            self.keyword_counts[keyword] = self.keyword_counts.get(keyword, 0) + 1
+            offsets = self.keyword_offsets.setdefault(keyword, [])
+            if len(offsets) < MAX_KEYWORD_OFFSETS:
+                offsets.append(offset)
+
+    def _feed_compressed(self, path: str) -> int:
+        """
+        Feeds a compressed filing file chunk by chunk.
+        """
+        decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        total = 0
+        with open_filing_file(path) as f:
+            while not self.done:
+                chunk = f.read(READ_CHUNK_SIZE)
+                if not chunk:
+                    self.feed(decoder.decode(b'', final=True))
+                    break
+                total += len(chunk)
+                self.feed(decoder.decode(chunk))
+        return total
+
+    def _scan_mapped(self, data: mmap.mmap):
+        """
+        Records the matching lines of a memory-mapped submission until done.
+        """
+        analyzer = self.analyzer
+        for segment in iter_segments(data, analyzer.include_types, analyzer.exclude_types):
+            extractor = HtmlTextExtractor() if segment.html else None
+            for window_start, window_end in _iter_windows(data, segment.start, segment.end):
+                window = data[window_start:window_end]
+                if extractor is None:
+                    matches = analyzer._iter_keyword_bytes_lines(window, window_start)
+                else:
+                    text = extractor.feed(window.decode('utf-8', errors='replace'))
+                    matches = analyzer._iter_html_lines(text, window_start, len(window))
+                for match in matches:
+                    self._record(match)
+                    if self.done:
+                        return
+
+    def _scan(self, text: str, endpos: int, base: int):
+        """
+        Records the matching lines of text[:endpos] until the analysis is done.
+
+        Args:
+            text: The text to scan.
+            endpos: End of the complete lines in text.
+            base: Offset of text in the filing.
+        """
+        segments = self._document_filter.segments(text, endpos)
+        for match in self.analyzer._iter_segment_lines(text, segments, self._html_extractors, base):
+            self._record(match)
+            if self.done:
+                return
+
 
 if __name__ == '__main__':
     analyzer = KeywordAnalyzer()
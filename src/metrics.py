@@ -0,0 +1,324 @@
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, List, Sequence, Tuple, Union
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+# NFR-001: alerts within 10 minutes of a filing appearing in the feed
+LATENCY_BUCKETS = (15, 30, 60, 120, 180, 300, 450, 600, 900, 1800, 3600, 7200)
+SIZE_BUCKETS = tuple(4 ** n * 1024 for n in range(2, 11))  # 16 KB to 1 GB
+
+
+class Registry:
+    """
+    The set of metrics exposed together on one endpoint.
+    """
+
+    def __init__(self):
+        self._metrics: List[Union['Histogram', 'Gauge']] = []
+        self._lock = threading.Lock()
+
+    def register(self, metric: Union['Histogram', 'Gauge']):
+        """
+        Adds a metric to the registry.
+        """
+        with self._lock:
+            if any(m.name == metric.name for m in self._metrics):
+                raise ValueError(f"Metric {metric.name} is already registered.")
+            self._metrics.append(metric)
+
+    def render(self) -> str:
+        """
+        Returns every metric in the Prometheus text exposition format.
+        """
+        with self._lock:
+            metrics = list(self._metrics)
+        lines: List[str] = []
+        for metric in metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+class _HistogramValues:
+    """
+    Bucket counts, sum and count of one label combination of a histogram.
+    """
+
+    def __init__(self, histogram: 'Histogram'):
+        self._histogram = histogram
+        self.bucket_counts = [0] * len(histogram.buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """
+        Records one observation.
+        """
+        with self._histogram._lock:
+            for i, bound in enumerate(self._histogram.buckets):
+                if value <= bound:
+                    self.bucket_counts[i] += 1
+                    break
+            self.sum += value
+            self.count += 1
+
+    @contextmanager
+    def time(self) -> Iterator[None]:
+        """
+        Observes the duration of the with block, in seconds.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start)
+
+
+class Histogram:
+    """
+    A thread-safe Prometheus histogram, optionally split by labels.
+
+    Observations are counted in the first bucket whose upper bound they do not
+    exceed; cumulative counts are computed when the histogram is rendered.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        buckets: Sequence[float] = DURATION_BUCKETS,
+        labelnames: Sequence[str] = (),
+        registry: Registry = REGISTRY,
+    ):
+        """
+        Initializes the Histogram and registers it.
+
+        Args:
+            name: The metric name, e.g. 'edgar_feed_fetch_seconds'.
+            documentation: The HELP text.
+            buckets: Upper bounds of the buckets; +Inf is implied.
+            labelnames: Names of the labels observations are split by.
+            registry: The registry exposing the metric.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.buckets = tuple(sorted(float(b) for b in buckets))
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._values: Dict[Tuple[str, ...], _HistogramValues] = {}
+        if not self.labelnames:
+            self._values[()] = _HistogramValues(self)
+        registry.register(self)
+
+    def labels(self, *labelvalues: str) -> _HistogramValues:
+        """
+        Returns the histogram of one label combination.
+
+        Args:
+            *labelvalues: One value per label name, in order.
+        """
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}.")
+        key = tuple(str(value) for value in labelvalues)
+        with self._lock:
+            values = self._values.get(key)
+            if values is None:
+                values = self._values[key] = _HistogramValues(self)
+        return values
+
+    def observe(self, value: float):
+        """
+        Records one observation of an unlabeled histogram.
+        """
+        self.labels().observe(value)
+
+    def time(self):
+        """
+        Observes the duration of a with block on an unlabeled histogram.
+        """
+        return self.labels().time()
+
+    def get_count(self, *labelvalues: str) -> int:
+        """
+        Returns the number of observations of a label combination.
+        """
+        with self._lock:
+            values = self._values.get(tuple(str(value) for value in labelvalues))
+            return values.count if values is not None else 0
+
+    def collect(self) -> List[str]:
+        """
+        Returns the HELP, TYPE and sample lines of the histogram.
+        """
+        lines = [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} histogram",
+        ]
+        with self._lock:
+            snapshot = [
+                (key, list(values.bucket_counts), values.sum, values.count)
+                for key, values in sorted(self._values.items())
+            ]
+        for key, bucket_counts, total, count in snapshot:
+            labels = ''.join(f'{name}="{_escape(value)}",' for name, value in zip(self.labelnames, key, strict=True))
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, bucket_counts, strict=True):
+                cumulative += bucket_count
+                lines.append(f'{self.name}_bucket{{{labels}le="{_format_value(bound)}"}} {cumulative}')
+            lines.append(f'{self.name}_bucket{{{labels}le="+Inf"}} {count}')
+            suffix = '{' + labels.rstrip(',') + '}' if labels else ''
+            lines.append(f"{self.name}_sum{suffix} {_format_value(total)}")
+            lines.append(f"{self.name}_count{suffix} {count}")
+        return lines
+
+
+class Gauge:
+    """
+    A thread-safe Prometheus gauge: a value that goes up and down.
+    """
+
+    def __init__(self, name: str, documentation: str, registry: Registry = REGISTRY):
+        """
+        Initializes the Gauge at zero and registers it.
+
+        Args:
+            name: The metric name, e.g. 'edgar_analysis_queue_depth'.
+            documentation: The HELP text.
+            registry: The registry exposing the metric.
+        """
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        self._value = 0.0
+        registry.register(self)
+
+    def set(self, value: float):
+        """
+        Sets the gauge to a value.
+        """
+        with self._lock:
+            self._value = float(value)
+
+    def inc(self, amount: float = 1):
+        """
+        Increases the gauge.
+        """
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1):
+        """
+        Decreases the gauge.
+        """
+        with self._lock:
+            self._value -= amount
+
+    def get(self) -> float:
+        """
+        Returns the current value.
+        """
+        with self._lock:
+            return self._value
+
+    def collect(self) -> List[str]:
+        """
+        Returns the HELP, TYPE and sample lines of the gauge.
+        """
+        return [
+            f"# HELP {self.name} {_escape(self.documentation)}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {_format_value(self.get())}",
+        ]
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    registry: Registry = REGISTRY
+
+    def do_GET(self):
+        if self.path.split('?', 1)[0] not in ('/', '/metrics'):
+            self.send_error(404)
+            return
+        body = self.registry.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes would flood the application log
+
+
+def start_http_server(port: int, host: str = '127.0.0.1', registry: Registry = REGISTRY) -> ThreadingHTTPServer:
+    """
+    Serves the registry on http://host:port/metrics from a daemon thread.
+
+    Args:
+        port: The port to listen on; 0 picks a free one.
+        host: The interface to bind; local only by default.
+        registry: The metrics to expose.
+
+    Returns:
+        The running server; call shutdown() to stop it.
+    """
+    handler = type('MetricsHandler', (_MetricsHandler,), {'registry': registry})
+    server = ThreadingHTTPServer((host, port), handler)
+    thread = threading.Thread(target=server.serve_forever, name='metrics-server', daemon=True)
+    thread.start()
+    logging.info(f"Serving metrics on http://{host}:{server.server_address[1]}/metrics")
+    return server
+
+
+# Metrics of the alert service
+CYCLE_SECONDS = Histogram(
+    'edgar_cycle_seconds', 'Duration of a complete polling cycle.'
+)
+FEED_FETCH_SECONDS = Histogram(
+    'edgar_feed_fetch_seconds', 'Time to fetch and parse one page of the EDGAR feed.'
+)
+DOCUMENT_DOWNLOAD_SECONDS = Histogram(
+    'edgar_document_download_seconds',
+    'Time from requesting a full submission until its body was read or abandoned.',
+)
+DOCUMENT_BYTES = Histogram(
+    'edgar_document_bytes', 'Bytes of a full submission read before it was analyzed or abandoned.',
+    buckets=SIZE_BUCKETS,
+)
+ANALYSIS_SECONDS = Histogram(
+    'edgar_analysis_seconds', 'Time spent in keyword analysis per filing, excluding download waits.'
+)
+DB_SECONDS = Histogram(
+    'edgar_db_seconds', 'Time spent in SQLite per database operation.', labelnames=('operation',)
+)
+TELEGRAM_SEND_SECONDS = Histogram(
+    'edgar_telegram_send_seconds', 'Time to send one Telegram message, including rate-limit waits.'
+)
+ALERT_LATENCY_SECONDS = Histogram(
+    'edgar_alert_latency_seconds', "Time from a filing's published timestamp until its alert was sent.",
+    buckets=LATENCY_BUCKETS,
+)
+ANALYSIS_QUEUE_DEPTH = Gauge(
+    'edgar_analysis_queue_depth', 'Filings submitted to the analysis process pool and not finished yet.'
+)
@@ -0,0 +1,360 @@
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Optional
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# Circuit breaker states of RateGovernor
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class RateLimiter:
+    """
+    A thread-safe token bucket limiting how often an action may happen.
+
+    Every caller of acquire() reserves the next free slot under a lock and then
+    sleeps outside of it, so concurrent threads are spaced out fairly instead of
+    all waking up at once.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        """
+        Initializes the RateLimiter with a full bucket.
+
+        Args:
+            rate: Sustained number of acquisitions allowed per second.
+            burst: Number of acquisitions allowed back to back after an idle period.
+                The default of 1 spaces every acquisition 1/rate seconds apart, so
+                no one-second window ever holds more than rate acquisitions.
+            clock: Monotonic time source, replaceable in tests.
+            sleep: Sleep function, replaceable in tests.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        self.rate = rate
+        self.burst = max(1, burst)
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = float(self.burst)
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        """
+        Blocks until the caller may proceed.
+
+        Returns:
+            The number of seconds the caller waited.
+        """
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            # Going negative reserves a future slot for this caller.
+            self._tokens -= 1
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+    def set_rate(self, rate: float):
+        """
+        Changes the sustained rate; slots already reserved keep their time.
+
+        Args:
+            rate: New number of acquisitions allowed per second.
+        """
+        if rate <= 0:
+            raise ValueError("rate must be positive.")
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+            self._updated = now
+            self.rate = rate
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised by RateGovernor.acquire() while the circuit breaker is open.
+    """
+
+
+def parse_retry_after(value: Optional[str], now: Optional[float] = None) -> Optional[float]:
+    """
+    Reads a Retry-After header: a number of seconds or an HTTP date.
+
+    Args:
+        value: The header value, if any.
+        now: Current Unix time, for HTTP dates; defaults to time.time().
+
+    Returns:
+        The number of seconds to wait (at least 0), or None if absent or invalid.
+    """
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if moment is None or moment.tzinfo is None:
+        return None
+    return max(0.0, moment.timestamp() - (time.time() if now is None else now))
+
+
+class RateGovernor:
+    """
+    Adapts a RateLimiter to how a server responds, for every request to it.
+
+    The rate follows additive increase, multiplicative decrease: each fast
+    response adds increase_step requests per second, up to max_rate; a 429 or
+    503 halves it and a slow response (latency above latency_target) trims it,
+    down to min_rate. The rate is lowered at most once per window of
+    max(1 / rate, latency_target) seconds, since the responses to requests
+    already in flight report the same congestion. A Retry-After from the server
+    pauses every caller until it has passed. Retries of transient errors wait a
+    jittered exponential backoff.
+
+    failure_threshold consecutive failures (server errors or no response) open
+    the circuit breaker: for cooldown seconds acquire() raises CircuitOpenError
+    instead of sending anything. After that one probe request is let through; its
+    success closes the circuit, its failure opens it for another cooldown, and so
+    does its silence for a cooldown (e.g. a caller that never recorded the
+    outcome).
+    """
+
+    def __init__(
+        self,
+        limiter: RateLimiter,
+        max_rate: Optional[float] = None,
+        min_rate: float = 0.5,
+        increase_step: float = 0.1,
+        decrease_factor: float = 0.5,
+        latency_target: float = 2.0,
+        failure_threshold: int = 5,
+        cooldown: float = 60.0,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initializes the RateGovernor at the limiter's current rate.
+
+        Args:
+            limiter: The limiter whose rate is adjusted; shared by all callers.
+            max_rate: Highest rate ever set, e.g. SEC's fair-access limit;
+                defaults to the limiter's current rate.
+            min_rate: Lowest rate ever set.
+            increase_step: Requests per second added after each fast response.
+            decrease_factor: Factor applied to the rate on a 429 or 503, at most
+                once per window (see above).
+            latency_target: Response time in seconds above which the rate is
+                trimmed instead of raised.
+            failure_threshold: Consecutive failures that open the circuit.
+            cooldown: Seconds the circuit stays open.
+            backoff_base: Upper bound of the first retry delay, in seconds; it
+                doubles with every attempt.
+            backoff_max: Largest retry delay, in seconds.
+            clock: Monotonic time source, replaceable in tests.
+            sleep: Sleep function, replaceable in tests.
+            rng: Random generator for the backoff jitter.
+        """
+        self.limiter = limiter
+        self.max_rate = max_rate or limiter.rate
+        self.min_rate = min(min_rate, self.max_rate)
+        self.increase_step = increase_step
+        self.decrease_factor = decrease_factor
+        self.latency_target = latency_target
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown = cooldown
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._clock = clock
+        self._sleep = sleep
+        self._rng = rng or random.Random()
+        self._lock = threading.Lock()
+        self._paused_until = 0.0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_sent_at = 0.0
+        self._decreased_at = float('-inf')
+        self._consecutive_failures = 0
+        self._stats = {'throttled': 0, 'failures': 0, 'circuit_opened': 0, 'rejected': 0}
+
+    @property
+    def rate(self) -> float:
+        """
+        The current number of requests allowed per second.
+        """
+        return self.limiter.rate
+
+    @property
+    def state(self) -> str:
+        """
+        The circuit breaker state: 'closed', 'open' or 'half_open'.
+        """
+        with self._lock:
+            return self._state
+
+    def get_stats(self) -> Dict:
+        """
+        Returns the current rate and breaker state, and the number of throttling
+        responses, failures, circuit openings and requests rejected while open.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+            stats['state'] = self._state
+        stats['rate'] = self.limiter.rate
+        return stats
+
+    def acquire(self) -> float:
+        """
+        Blocks until a request may be sent: after any Retry-After pause, at the
+        current rate.
+
+        Returns:
+            The number of seconds the caller waited.
+
+        Raises:
+            CircuitOpenError: If the circuit breaker is open, or half open with
+                its probe request already under way.
+        """
+        with self._lock:
+            now = self._clock()
+            if self._state == OPEN:
+                if now - self._opened_at < self.cooldown:
+                    self._stats['rejected'] += 1
+                    raise CircuitOpenError(
+                        f"Circuit open for another {self.cooldown - (now - self._opened_at):.0f}s"
+                    )
+                self._state = HALF_OPEN
+                self._probe_sent_at = now
+                logging.info("Circuit half open; sending a probe request.")
+            elif self._state == HALF_OPEN:
+                self._stats['rejected'] += 1
+                if now - self._probe_sent_at >= self.cooldown:
+                    # The probe's outcome was never recorded; treat it as failed.
+                    self._state = OPEN
+                    self._opened_at = now
+                    self._stats['circuit_opened'] += 1
+                    logging.error(f"Probe request unanswered; no requests for {self.cooldown:.0f}s.")
+                    raise CircuitOpenError("Circuit reopened; the probe request was never answered")
+                raise CircuitOpenError("Circuit half open; waiting for the probe request")
+            pause = max(0.0, self._paused_until - now)
+        if pause > 0:
+            self._sleep(pause)
+        return pause + self.limiter.acquire()
+
+    def record_success(self, latency: float):
+        """
+        Records a response that was neither throttled nor an error.
+
+        Args:
+            latency: Seconds from sending the request to receiving the response.
+        """
+        with self._lock:
+            self._consecutive_failures = 0
+            if self._state != CLOSED:
+                logging.info("Circuit closed; requests resumed.")
+                self._state = CLOSED
+            if latency > self.latency_target:
+                self._decrease((1 + self.decrease_factor) / 2)
+            else:
+                rate = min(self.max_rate, self.limiter.rate + self.increase_step)
+                if rate != self.limiter.rate:
+                    self.limiter.set_rate(rate)
+
+    def record_throttle(self, retry_after: Optional[float] = None):
+        """
+        Records a 429 or 503 response: lowers the rate and pauses every caller
+        for retry_after seconds, if the server said so.
+        """
+        with self._lock:
+            self._stats['throttled'] += 1
+            if self._state == HALF_OPEN:
+                self._state = OPEN  # The probe was turned away; wait another cooldown
+                self._opened_at = self._clock()
+            rate = self._decrease(self.decrease_factor)
+            if rate is not None:
+                logging.warning(f"Throttled by the server; lowering the request rate to {rate:.2f}/s.")
+            if retry_after:
+                self._paused_until = max(self._paused_until, self._clock() + retry_after)
+
+    def record_failure(self):
+        """
+        Records a server error or a request without response, opening the
+        circuit after failure_threshold of them in a row or a failed probe.
+        """
+        with self._lock:
+            self._stats['failures'] += 1
+            self._consecutive_failures += 1
+            if self._state == HALF_OPEN or (
+                self._state == CLOSED and self._consecutive_failures >= self.failure_threshold
+            ):
+                self._state = OPEN
+                self._opened_at = self._clock()
+                self._stats['circuit_opened'] += 1
+                logging.error(
+                    f"Circuit opened after {self._consecutive_failures} consecutive failures; "
+                    f"no requests for {self.cooldown:.0f}s."
+                )
+
+    def _decrease(self, factor: float) -> Optional[float]:
+        """
+        Multiplies the rate by factor, unless it was lowered less than a window
+        ago; called with the lock held.
+
+        Returns:
+            The new rate, or None if it was left unchanged.
+        """
+        now = self._clock()
+        rate = self.limiter.rate
+        if now - self._decreased_at < max(1 / rate, self.latency_target):
+            return None
+        new_rate = max(self.min_rate, rate * factor)
+        if new_rate == rate:
+            return None
+        self._decreased_at = now
+        self.limiter.set_rate(new_rate)
+        return new_rate
+
+    def backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        """
+        Sleeps before retrying a request.
+
+        Args:
+            attempt: Number of attempts made so far (1 after the first).
+            retry_after: The server's Retry-After, used instead of the backoff.
+
+        Returns:
+            The number of seconds slept: retry_after if given, otherwise a random
+            delay up to backoff_base * 2 ** (attempt - 1), capped at backoff_max
+            ("full jitter", so that concurrent retries spread out).
+        """
+        if retry_after is not None:
+            delay = retry_after
+        else:
+            delay = self._rng.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** (attempt - 1)))
+        if delay > 0:
+            self._sleep(delay)
+        return delay
@@ -0,0 +1,195 @@
+import logging
+import math
+import random
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+try:
+    from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+    EDGAR_TIMEZONE = ZoneInfo('America/New_York')
+except (ImportError, ZoneInfoNotFoundError):  # No tz database: assume EST all year
+    EDGAR_TIMEZONE = timezone(timedelta(hours=-5), 'EST')
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
+)
+
+# EDGAR accepts and disseminates filings from 6:00 a.m. to 10:00 p.m. Eastern on
+# business days; outside of that the feed barely changes.
+BUSINESS_HOURS_START = 6
+BUSINESS_HOURS_END = 22
+
+OVERRUN_SKIP = 'skip'
+OVERRUN_RUN_NOW = 'run_now'
+
+
+def is_business_hours(moment: datetime) -> bool:
+    """
+    Tells whether EDGAR is disseminating filings at the given time.
+
+    Args:
+        moment: A timezone-aware time.
+    """
+    local = moment.astimezone(EDGAR_TIMEZONE)
+    return local.weekday() < 5 and BUSINESS_HOURS_START <= local.hour < BUSINESS_HOURS_END
+
+
+def seconds_until_business_hours(moment: datetime) -> float:
+    """
+    Returns the number of seconds until EDGAR's next business hours start, or 0
+    during business hours. Holidays are treated as business days.
+
+    Args:
+        moment: A timezone-aware time.
+    """
+    if is_business_hours(moment):
+        return 0.0
+    local = moment.astimezone(EDGAR_TIMEZONE)
+    opening = local.replace(hour=BUSINESS_HOURS_START, minute=0, second=0, microsecond=0)
+    if local.hour >= BUSINESS_HOURS_START:
+        opening += timedelta(days=1)
+    while opening.weekday() >= 5:
+        opening += timedelta(days=1)
+    # Compare in UTC so a daylight saving change overnight is accounted for.
+    return (opening.astimezone(timezone.utc) - moment.astimezone(timezone.utc)).total_seconds()
+
+
+class PollScheduler:
+    """
+    Decides when the next feed poll is due.
+
+    The interval follows an exponentially weighted moving average of the rate of
+    new filings: it is chosen so that about target_new_filings accumulate between
+    polls, within [min_interval, max_interval]. Outside EDGAR business hours the
+    off-hours interval applies, cut short when business hours start.
+
+    Deadlines are kept on a fixed cadence: each one is the previous deadline plus
+    the interval, not the end of the cycle plus the interval, so the cycle's own
+    duration does not stretch the period. Each wake-up is jittered around its
+    deadline so that several instances do not hit sec.gov in lockstep. A cycle
+    that ends after its next deadline is an overrun, handled by overrun_policy:
+    'skip' drops the missed slots and keeps the cadence, 'run_now' polls again
+    right away and restarts the cadence from there.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = 60.0,
+        max_interval: float = 300.0,
+        off_hours_interval: float = 1800.0,
+        target_new_filings: float = 10.0,
+        smoothing: float = 0.3,
+        jitter: float = 0.1,
+        overrun_policy: str = OVERRUN_SKIP,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+        now: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        rng: Optional[random.Random] = None,
+    ):
+        """
+        Initializes the PollScheduler; the first poll is due immediately.
+
+        Args:
+            min_interval: Shortest interval between polls, in seconds.
+            max_interval: Longest interval between polls during business hours.
+            off_hours_interval: Interval between polls outside business hours.
+            target_new_filings: Number of new filings to let accumulate per poll.
+            smoothing: Weight of the newest rate sample in the moving average.
+            jitter: Largest random shift of a wake-up, as a fraction of the interval.
+            overrun_policy: 'skip' or 'run_now', see the class documentation.
+            clock: Monotonic time source, replaceable in tests.
+            sleep: Sleep function, replaceable in tests.
+            now: Wall clock returning an aware datetime, replaceable in tests.
+            rng: Random generator for the jitter.
+        """
+        if not 0 < min_interval <= max_interval:
+            raise ValueError("Intervals must satisfy 0 < min_interval <= max_interval.")
+        if overrun_policy not in (OVERRUN_SKIP, OVERRUN_RUN_NOW):
+            raise ValueError(f"Unknown overrun policy: {overrun_policy}")
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.off_hours_interval = max(min_interval, off_hours_interval)
+        self.target_new_filings = target_new_filings
+        self.smoothing = smoothing
+        self.jitter = jitter
+        self.overrun_policy = overrun_policy
+        self._clock = clock
+        self._sleep = sleep
+        self._now = now
+        self._rng = rng or random.Random()
+
+        self.filing_rate: Optional[float] = None  # New filings per second (EWMA)
+        self.overruns = 0
+        self._nominal_deadline: Optional[float] = None
+        self._wake_at: Optional[float] = None
+        self._poll_started: Optional[float] = None
+        self._previous_poll_started: Optional[float] = None
+
+    def wait(self) -> float:
+        """
+        Sleeps until the next poll is due and marks the poll as started.
+
+        Returns:
+            The number of seconds slept.
+        """
+        delay = 0.0
+        if self._wake_at is not None:
+            delay = max(0.0, self._wake_at - self._clock())
+            if delay > 0:
+                self._sleep(delay)
+        self._poll_started = self._clock()
+        return delay
+
+    def current_interval(self) -> float:
+        """
+        Returns the interval the next deadline would be set with right now.
+        """
+        moment = self._now()
+        if not is_business_hours(moment):
+            until_open = seconds_until_business_hours(moment)
+            return max(self.min_interval, min(self.off_hours_interval, until_open))
+        if not self.filing_rate:
+            return self.max_interval
+        return min(self.max_interval, max(self.min_interval, self.target_new_filings / self.filing_rate))
+
+    def record_poll(self, new_filings: int) -> float:
+        """
+        Updates the filing rate with a finished poll and sets the next deadline.
+
+        Args:
+            new_filings: Number of filings the poll found that were not seen before.
+
+        Returns:
+            The number of seconds until the next poll.
+        """
+        now = self._clock()
+        started = self._poll_started if self._poll_started is not None else now
+        if self._previous_poll_started is not None:
+            # The filings found appeared since the previous poll started.
+            window = started - self._previous_poll_started
+            if window > 0:
+                sample = new_filings / window
+                if self.filing_rate is None:
+                    self.filing_rate = sample
+                else:
+                    self.filing_rate = self.smoothing * sample + (1 - self.smoothing) * self.filing_rate
+        self._previous_poll_started = started
+
+        interval = self.current_interval()
+        anchor = self._nominal_deadline if self._nominal_deadline is not None else started
+        deadline = anchor + interval
+        shift = self._rng.uniform(-self.jitter, self.jitter) * interval
+        if deadline <= now:
+            self.overruns += 1
+            if self.overrun_policy == OVERRUN_SKIP:
+                missed = math.floor((now - deadline) / interval) + 1
+                deadline += missed * interval
+                logging.warning(f"Poll cycle overran its slot; skipping {missed} missed slot(s).")
+            else:
+                deadline, shift = now, 0.0
+                logging.warning("Poll cycle overran its slot; polling again right away.")
+        self._nominal_deadline = deadline
+        self._wake_at = max(now, deadline + shift)
+        return self._wake_at - now
@@ -1,13 +1,23 @@
+import codecs
 import logging
 import os
-from typing import Dict, List, Optional
+import threading
+import time
+import zlib
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
 
 import feedparser
 import requests
 from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
 from urllib.parse import urlparse
 from dotenv import load_dotenv
 
+from src import metrics
+from src.filing_cache import FilingCache, FilingCacheWriter
+from src.filing_index import DEFAULT_EXHIBIT_TYPES, IndexDocument, parse_filing_index, select_documents
+from src.rate_limiter import CircuitOpenError, RateGovernor, RateLimiter, parse_retry_after
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -16,40 +26,368 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+# Responses retried after a backoff; 429 and 503 also lower the request rate
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+THROTTLE_STATUSES = (429, 503)
+
+# Fetch modes: the complete submission, or the documents worth scanning only
+FETCH_FULL = 'full'
+FETCH_PRIMARY = 'primary'
+
 
 class SecEdgarClient:
     """
     A client for interacting with the SEC EDGAR system to retrieve company filings.
     """
 
-    SEC_RSS_URL = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&CIK=&type=&company=&dateb=&owner=only&start=0&count=100&output=atom"
+    SEC_RSS_URL = "https://www.sec.gov/cgi-bin/browse-edgar?action=getcurrent&CIK=&type=&company=&dateb=&owner=only&start={start}&count={count}&output=atom"
+    FEED_PAGE_SIZE = 100  # The largest page the getcurrent feed serves
+    ARCHIVES_URL = "https://www.sec.gov/Archives"
 
-    def __init__(self):
+    def __init__(
+        self,
+        rate_limiter: Optional[RateLimiter] = None,
+        max_feed_pages: Optional[int] = None,
+        cache: Optional[FilingCache] = None,
+        fetch_mode: Optional[str] = None,
+        exhibit_types: Optional[Iterable[str]] = None,
+        max_document_bytes: Optional[int] = None,
+        archives_url: Optional[str] = None,
+        governor: Optional[RateGovernor] = None,
+        max_retries: Optional[int] = None,
+        cache_drain_bytes: Optional[int] = None,
+    ):
         """
         Initializes the SecEdgarClient with a User-Agent header.
+
+        Args:
+            rate_limiter: Limiter applied to every request to sec.gov. Share one
+                between clients used concurrently; by default a new one allowing
+                SEC_MAX_REQUESTS_PER_SECOND (10, SEC's fair-access limit) is created.
+            max_feed_pages: Most feed pages read by one get_latest_filings call when
+                catching up; defaults to SEC_FEED_MAX_PAGES or 10.
+            cache: On-disk cache of full submission texts. By default one is created
+                in FILING_CACHE_DIR, capped at FILING_CACHE_MAX_MB (1024), when that
+                variable is set; otherwise filings are not cached.
+            fetch_mode: What stream_filing_text downloads: 'full' for the complete
+                submission .txt, 'primary' for the primary document and the
+                exhibit_types listed on the filing's index page. Defaults to
+                SEC_FETCH_MODE or 'full'.
+            exhibit_types: Exhibits fetched in 'primary' mode; defaults to the
+                comma-separated SEC_EXHIBIT_TYPES or EX-99.
+            max_document_bytes: In 'primary' mode, most bytes read from any one
+                document; defaults to SEC_MAX_DOCUMENT_MB (10) megabytes.
+            archives_url: Base URL of the EDGAR archives, where the index files
+                are read from; defaults to SEC_ARCHIVES_URL or ARCHIVES_URL.
+            governor: Adapts the rate_limiter's rate to sec.gov's responses and
+                holds the circuit breaker; by default one is created around
+                rate_limiter, never exceeding its rate. Share it along with the
+                limiter.
+            max_retries: Retries of a request after a 429, a 5xx or a connection
+                error; defaults to SEC_MAX_RETRIES or 3.
+            cache_drain_bytes: When an analysis stops reading a filing early (as
+                for every alert), up to this many more bytes are downloaded in the
+                background to complete its cache entry; larger filings are not
+                cached. Defaults to FILING_CACHE_DRAIN_MB megabytes, 0 (off) unless
+                set, as the extra downloads use the SEC request budget.
         """
         user_agent = os.getenv('USER_AGENT', 'BlackHatMedia/1.0 (daniel@blackhatmedia.com)')
         from_email = os.getenv('FROM_EMAIL', 'daniel@blackhatmedia.com')
         self.headers = {'User-Agent': user_agent, 'From': from_email}
+        if rate_limiter is None:
+            rate_limiter = RateLimiter(float(os.getenv('SEC_MAX_REQUESTS_PER_SECOND', '10')))
+        self.rate_limiter = rate_limiter
+        if governor is None:
+            governor = RateGovernor(
+                rate_limiter, cooldown=float(os.getenv('SEC_CIRCUIT_COOLDOWN_SECONDS', '60'))
+            )
+        self.governor = governor
+        if max_retries is None:
+            max_retries = int(os.getenv('SEC_MAX_RETRIES', '3'))
+        self.max_retries = max(0, max_retries)
+        if max_feed_pages is None:
+            max_feed_pages = int(os.getenv('SEC_FEED_MAX_PAGES', '10'))
+        self.max_feed_pages = max(1, max_feed_pages)
+        if cache is None and os.getenv('FILING_CACHE_DIR'):
+            cache = FilingCache(
+                os.environ['FILING_CACHE_DIR'],
+                max_bytes=int(float(os.getenv('FILING_CACHE_MAX_MB', '1024')) * 1024 * 1024),
+            )
+        self.cache = cache
+        if cache_drain_bytes is None:
+            cache_drain_bytes = int(float(os.getenv('FILING_CACHE_DRAIN_MB', '0')) * 1024 * 1024)
+        self.cache_drain_bytes = cache_drain_bytes
+        self.fetch_mode = fetch_mode or os.getenv('SEC_FETCH_MODE', FETCH_FULL)
+        if self.fetch_mode not in (FETCH_FULL, FETCH_PRIMARY):
+            raise ValueError(f"Unknown fetch mode: {self.fetch_mode}")
+        if exhibit_types is None:
+            exhibit_types = os.getenv('SEC_EXHIBIT_TYPES', ','.join(DEFAULT_EXHIBIT_TYPES)).split(',')
+        self.exhibit_types = tuple(t.strip() for t in exhibit_types if t.strip())
+        if max_document_bytes is None:
+            max_document_bytes = int(float(os.getenv('SEC_MAX_DOCUMENT_MB', '10')) * 1024 * 1024)
+        self.max_document_bytes = max_document_bytes
+        self.archives_url = (archives_url or os.getenv('SEC_ARCHIVES_URL') or self.ARCHIVES_URL).rstrip('/')
+
+        # One pooled session keeps connections to sec.gov alive between requests;
+        # the pool is sized for the concurrent filing workers.
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        self.session.headers['Accept-Encoding'] = 'gzip, deflate'
+        pool_size = int(os.getenv('SEC_WORKERS', '8')) + 1
+        adapter = HTTPAdapter(pool_connections=2, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        # Validators and result of the last full feed download, for conditional GETs.
+        self._feed_etag: Optional[str] = None
+        self._feed_last_modified: Optional[str] = None
+        self._feed_filings: List[Dict[str, str]] = []
+        self._feed_size = 0
+        # Oldest filing read by a catch-up that stopped early, see get_latest_filings
+        self._feed_resume_link: Optional[str] = None
+
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            'requests': 0,
+            'bytes_received': 0,
+            'bytes_decoded': 0,
+            'feed_not_modified': 0,
+            'bytes_saved_not_modified': 0,
+            'documents_truncated': 0,
+            'index_fallbacks': 0,
+            'retries': 0,
+        }
+
+    def get_stats(self) -> Dict[str, int]:
+        """
+        Returns transfer counters for this client.
+
+        Returns:
+            A dictionary with the number of requests sent, connections opened and
+            reused, bytes received on the wire and after decompression, feed polls
+            answered with 304 Not Modified, and the bytes saved by compression and
+            by 304 responses together. In 'primary' mode also the documents cut
+            at max_document_bytes and the filings whose index page could not be
+            used, so the full submission was read instead. 'retries' counts requests
+            sent again after a 429, a 5xx or a connection error, and 'governor'
+            holds RateGovernor.get_stats().
+        """
+        with self._stats_lock:
+            stats = dict(self._stats)
+        connections_opened = 0
+        for adapter in {id(a): a for a in self.session.adapters.values()}.values():
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is not None:
+                    connections_opened += pool.num_connections
+        stats['governor'] = self.governor.get_stats()
+        stats['connections_opened'] = connections_opened
+        stats['connections_reused'] = max(0, stats['requests'] - connections_opened)
+        stats['bytes_saved'] = (
+            stats['bytes_decoded'] - stats['bytes_received'] + stats['bytes_saved_not_modified']
+        )
+        return stats
+
+    def _get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Sends a GET request to sec.gov through the pooled session, paced and
+        retried by the rate governor.
+
+        429 and 5xx responses and connection errors are retried up to max_retries
+        times, after the server's Retry-After or a jittered exponential backoff.
+        Every outcome is reported to the governor, which adapts the rate and
+        opens its circuit breaker during outages.
+
+        Args:
+            url: The URL to fetch.
+            **kwargs: Passed on to requests.Session.get.
+
+        Returns:
+            The response; after the last retry possibly still an error response,
+            for the caller's raise_for_status().
+
+        Raises:
+            requests.exceptions.RequestException: If no response was received, or
+                the circuit breaker is open.
+        """
+        attempt = 0
+        while True:
+            try:
+                self.governor.acquire()
+            except CircuitOpenError as e:
+                raise requests.exceptions.ConnectionError(f"Not requesting {url}: {e}") from e
+            attempt += 1
+            sent = time.monotonic()
+            try:
+                response = self.session.get(url, timeout=10, **kwargs)
+            except requests.exceptions.RequestException as e:
+                self.governor.record_failure()
+                if attempt > self.max_retries:
+                    raise
+                logging.warning(f"Request to {url} failed ({e}); retrying.")
+                retry_after = None
+            else:
+                with self._stats_lock:
+                    self._stats['requests'] += 1
+                if response.status_code not in RETRY_STATUSES:
+                    self.governor.record_success(time.monotonic() - sent)
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code in THROTTLE_STATUSES:
+                    self.governor.record_throttle(retry_after)
+                if response.status_code >= 500:
+                    self.governor.record_failure()
+                # A Retry-After longer than any backoff is left to the governor's
+                # pause instead of holding this request.
+                if attempt > self.max_retries or (retry_after or 0) > self.governor.backoff_max:
+                    return response
+                logging.warning(f"Request to {url} answered {response.status_code}; retrying.")
+                response.close()
+            with self._stats_lock:
+                self._stats['retries'] += 1
+            self.governor.backoff(attempt, retry_after)
 
-    def get_latest_filings(self) -> List[Dict[str, str]]:
+    def _record_transfer(self, response: requests.Response, decoded_bytes: int):
+        """
+        Adds a finished response body to the transfer counters.
+
+        Args:
+            response: The response whose body has been read.
+            decoded_bytes: Size of the body after content decoding.
+        """
+        try:
+            wire_bytes = int(response.raw.tell())
+        except (AttributeError, TypeError, ValueError):
+            wire_bytes = decoded_bytes
+        with self._stats_lock:
+            self._stats['bytes_received'] += wire_bytes
+            self._stats['bytes_decoded'] += decoded_bytes
+
+    def get_latest_filings(
+        self, any_processed: Optional[Callable[[List[Dict[str, str]]], bool]] = None
+    ) -> List[Dict[str, str]]:
         """
         Retrieves the latest filings from the SEC EDGAR RSS feed.
 
+        The first page is revalidated with If-None-Match / If-Modified-Since. When
+        the server answers 304 Not Modified, the filings parsed from the last
+        download are returned again without parsing anything.
+
+        With any_processed, older pages are requested (start=100, 200, ...) until a
+        page contains an already processed filing, so bursts of more than one page
+        of filings between polls are not lost. At most max_feed_pages pages of
+        unread filings are read per call.
+
+        If paging stops early, because a page could not be fetched or the page
+        limit was reached, the oldest filing read is remembered. The next calls
+        then page past it, through filings processed in the meantime, before a
+        processed filing ends paging again, so the catch-up continues where it
+        stopped instead of leaving a gap.
+
+        Args:
+            any_processed: Tells whether any filing of a list from the feed was
+                already handled. Without it only the first page is read.
+
         Returns:
             A list of dictionaries, where each dictionary represents a filing
             and contains details such as title, link, summary, and filing date.
             Returns an empty list if the feed cannot be fetched or parsed.
         """
+        with metrics.FEED_FETCH_SECONDS.time():
+            page = self._get_feed_page(0)
+        if page is None:
+            return []
+        filings = list(page)
+        if any_processed is None:
+            return filings
+
+        # Oldest filing read by an unfinished catch-up, until paging passes it
+        resume_link = self._feed_resume_link
+        seen_links = {filing["link"] for filing in filings}
+        pages = 1
+        unread_pages = 0  # Pages read past resume_link, limited by max_feed_pages
+        while True:
+            older = page
+            if resume_link is not None:
+                links = [filing["link"] for filing in page]
+                if resume_link in links:
+                    older, resume_link = page[links.index(resume_link) + 1:], None
+                else:
+                    older = []
+            if older and any_processed(older):
+                self._feed_resume_link = None
+                break
+            # A short page is the end of the feed. Filings that shifted onto this
+            # page are counted, so a burst does not end paging early.
+            if len(page) < self.FEED_PAGE_SIZE:
+                if resume_link is not None:
+                    logging.warning("The feed no longer reaches the unfinished catch-up; older filings were missed.")
+                self._feed_resume_link = None
+                break
+            if resume_link is None:
+                unread_pages += 1
+                if unread_pages >= self.max_feed_pages:
+                    logging.warning(
+                        f"No processed filing found in {unread_pages} feed pages; "
+                        "the next call continues from the oldest filing read."
+                    )
+                    self._feed_resume_link = filings[-1]["link"]
+                    break
+            with metrics.FEED_FETCH_SECONDS.time():
+                page = self._get_feed_page(pages * self.FEED_PAGE_SIZE)
+            if page is None:
+                logging.warning("Feed paging failed; the next call continues from the oldest filing read.")
+                # An unfinished catch-up not passed yet reaches further back.
+                if resume_link is None:
+                    self._feed_resume_link = filings[-1]["link"]
+                break
+            pages += 1
+            # Filings published while paging shift entries onto the next page.
+            filings.extend(filing for filing in page if filing["link"] not in seen_links)
+            seen_links.update(filing["link"] for filing in page)
+
+        if pages > 1:
+            logging.info(f"Read {pages} feed pages ({len(filings)} filings) to catch up.")
+        return filings
+
+    def _get_feed_page(self, start: int) -> Optional[List[Dict[str, str]]]:
+        """
+        Fetches and parses one page of the SEC EDGAR RSS feed.
+
+        Only the first page (start=0) is requested conditionally and cached.
+
+        Args:
+            start: Offset of the first filing on the page.
+
+        Returns:
+            The filings on the page, or None if it cannot be fetched or parsed.
+        """
+        conditional_headers = {}
+        if start == 0:
+            if self._feed_etag:
+                conditional_headers['If-None-Match'] = self._feed_etag
+            if self._feed_last_modified:
+                conditional_headers['If-Modified-Since'] = self._feed_last_modified
+
         try:
-            response = requests.get(self.SEC_RSS_URL, headers=self.headers, timeout=10)
+            url = self.SEC_RSS_URL.format(start=start, count=self.FEED_PAGE_SIZE)
+            response = self._get(url, headers=conditional_headers)
+            if response.status_code == 304:
+                with self._stats_lock:
+                    self._stats['feed_not_modified'] += 1
+                    self._stats['bytes_saved_not_modified'] += self._feed_size
+                logging.info("SEC EDGAR RSS feed not modified since the last check.")
+                return list(self._feed_filings)
             response.raise_for_status()  # Raise an exception for bad status codes
 
-            feed = feedparser.parse(response.content)
+            content = response.content
+            self._record_transfer(response, len(content))
+            feed = feedparser.parse(content)
 
             if feed.bozo:
                 logging.error(f"Error parsing RSS feed: {feed.bozo_exception}")
-                return []
+                return None
 
             filings = []
             for entry in feed.entries:
@@ -58,18 +396,25 @@ class SecEdgarClient:
                         "title": entry.title,
                         "link": entry.link,
                         "summary": entry.summary,
-                        "published": entry.get("published"),
+                        # EDGAR's own feed only has <updated> timestamps.
+                        "published": entry.get("published") or entry.get("updated"),
                     }
                 )
-            return filings
+
+            if start == 0:
+                self._feed_etag = response.headers.get('ETag')
+                self._feed_last_modified = response.headers.get('Last-Modified')
+                self._feed_filings = filings
+                self._feed_size = len(content)
+            return list(filings)
 
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching SEC EDGAR RSS feed: {e}")
-            return []
+            return None
 
     def get_full_filing_text(self, filing_url: str) -> Optional[str]:
         """
-        Retrieves the full text of a filing from its URL.
+        Retrieves the full text of a filing from its URL, or from the filing cache.
 
         Args:
             filing_url: The URL of the filing's index page.
@@ -77,30 +422,382 @@ class SecEdgarClient:
         Returns:
             The full text of the filing, or None if it cannot be retrieved.
         """
+        doc_url = self._get_document_url(filing_url)
+        if doc_url is None:
+            return None
+        accession = self._accession_from_document_url(doc_url)
+        if self.cache is not None:
+            text = self.cache.get(accession)
+            if text is not None:
+                return text
+
         try:
-            parsed_url = urlparse(filing_url)
-            path_parts = parsed_url.path.split('/')
-            if len(path_parts) < 7: # Ensure there are enough parts for CIK and accession number
-                logging.warning(f"Invalid filing URL format: {filing_url}")
+            # Fetch the document content
+            download_start = time.perf_counter()
+            doc_response = self._get(doc_url)
+            doc_response.raise_for_status()
+            self._record_transfer(doc_response, len(doc_response.content))
+            metrics.DOCUMENT_DOWNLOAD_SECONDS.observe(time.perf_counter() - download_start)
+            metrics.DOCUMENT_BYTES.observe(len(doc_response.content))
+
+            text = doc_response.text
+            if self.cache is not None:
+                self.cache.put(accession, text)
+            return text
+
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching filing text from {filing_url}: {e}")
+            return None
+
+    def stream_filing_text(self, filing_url: str, chunk_size: int = 64 * 1024) -> Optional[Iterator[str]]:
+        """
+        Opens the text of a filing to scan, as selected by the fetch mode.
+
+        In 'full' mode this is stream_full_filing_text. In 'primary' mode it is
+        stream_primary_documents, unless the full submission is cached.
+
+        Args:
+            filing_url: The URL of the filing's index page.
+            chunk_size: Number of bytes to read from the connection per chunk.
+
+        Returns:
+            An iterator over decoded text chunks, or None if the filing cannot be
+            retrieved; see stream_full_filing_text.
+        """
+        if self.fetch_mode == FETCH_PRIMARY:
+            doc_url = self._get_document_url(filing_url)
+            if doc_url is None:
                 return None
+            if self.cache is not None:
+                chunks = self.cache.iter_chunks(self._accession_from_document_url(doc_url), chunk_size)
+                if chunks is not None:
+                    return chunks
+            return self.stream_primary_documents(filing_url, chunk_size)
+        return self.stream_full_filing_text(filing_url, chunk_size)
 
-            cik = path_parts[4]
-            accession_no_dashes = path_parts[5]
-            accession_no_with_dashes = path_parts[6].replace('-index.htm', '')
+    def stream_primary_documents(
+        self, filing_url: str, chunk_size: int = 64 * 1024
+    ) -> Optional[Iterator[str]]:
+        """
+        Opens the primary document and selected exhibits of a filing for
+        incremental reading, instead of the complete submission.
 
-            # Construct the full URL for the .txt document
-            doc_url = f"https://www.sec.gov/Archives/edgar/data/{cik}/{accession_no_dashes}/{accession_no_with_dashes}.txt"
+        The filing's index page is read first; documents are then downloaded one
+        after the other as the returned iterator is consumed, so an analysis that
+        stops early never requests the remaining exhibits. Each document is cut
+        after max_document_bytes. The documents are wrapped in <DOCUMENT>, <TYPE>
+        and <TEXT> lines like in a full submission, so DocumentFilter selects and
+        converts them as usual.
 
-            # Fetch the document content
-            doc_response = requests.get(doc_url, headers=self.headers, timeout=10)
-            doc_response.raise_for_status()
+        Args:
+            filing_url: The URL of the filing's index page.
+            chunk_size: Number of bytes to read from the connection per chunk.
+
+        Returns:
+            An iterator over decoded text chunks, or None if the index page cannot
+            be fetched. If it lists no document, the full submission is streamed
+            instead. The iterator raises requests.exceptions.RequestException if a
+            document cannot be read.
+        """
+        download_start = time.perf_counter()
+        try:
+            response = self._get(filing_url)
+            response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error fetching filing index {filing_url}: {e}")
+            return None
+        self._record_transfer(response, len(response.content))
+        documents = select_documents(parse_filing_index(response.text, filing_url), self.exhibit_types)
+        if not documents:
+            logging.warning(f"No documents listed on {filing_url}; reading the full submission.")
+            with self._stats_lock:
+                self._stats['index_fallbacks'] += 1
+            return self.stream_full_filing_text(filing_url, chunk_size)
+        return self._iter_documents(documents, chunk_size, download_start)
+
+    def _iter_documents(
+        self, documents: List[IndexDocument], chunk_size: int, download_start: float
+    ) -> Iterator[str]:
+        """
+        Downloads documents one by one, each wrapped like in a full submission.
+
+        Args:
+            documents: The documents to read, from select_documents.
+            chunk_size: Number of bytes to read per chunk.
+            download_start: perf_counter() value when the index was requested, for
+                the download time metric.
+        """
+        total_bytes = 0
+        try:
+            for document in documents:
+                yield (
+                    f"<DOCUMENT>\n<TYPE>{document.type}\n<SEQUENCE>{document.sequence}\n"
+                    f"<FILENAME>{document.filename}\n<TEXT>\n"
+                )
+                response = self._get(document.url, stream=True)
+                decoded_bytes = 0
+                try:
+                    response.raise_for_status()
+                    decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(errors="replace")
+                    for raw_chunk in response.iter_content(chunk_size=chunk_size):
+                        raw_chunk = raw_chunk[:self.max_document_bytes - decoded_bytes]
+                        decoded_bytes += len(raw_chunk)
+                        text = decoder.decode(raw_chunk)
+                        if text:
+                            yield text
+                        if decoded_bytes >= self.max_document_bytes:
+                            logging.info(
+                                f"Read only the first {decoded_bytes} bytes of {document.url} "
+                                f"({document.size or 'unknown'} bytes listed)."
+                            )
+                            with self._stats_lock:
+                                self._stats['documents_truncated'] += 1
+                            break
+                    text = decoder.decode(b"", final=True)
+                    if text:
+                        yield text
+                except requests.exceptions.RequestException as e:
+                    logging.error(f"Error streaming filing document {document.url}: {e}")
+                    raise
+                finally:
+                    self._record_transfer(response, decoded_bytes)
+                    response.close()
+                    total_bytes += decoded_bytes
+                yield "\n</TEXT>\n</DOCUMENT>\n"
+        finally:
+            metrics.DOCUMENT_DOWNLOAD_SECONDS.observe(time.perf_counter() - download_start)
+            metrics.DOCUMENT_BYTES.observe(total_bytes)
 
-            return doc_response.text
+    def stream_full_filing_text(
+        self, filing_url: str, chunk_size: int = 64 * 1024
+    ) -> Optional[Iterator[str]]:
+        """
+        Opens the full text of a filing for incremental reading.
 
+        The request is made (and its status checked) before returning, but the body
+        is only downloaded as the returned iterator is consumed, one chunk at a time.
+        Closing the iterator early closes the connection and stops the download.
+        Cached filings are read from disk. A downloaded filing is added to the cache
+        once its body has been read completely; when the iterator is closed early,
+        up to cache_drain_bytes more are read in the background to complete the
+        entry, so closing never waits for the rest of the download.
+
+        Args:
+            filing_url: The URL of the filing's index page.
+            chunk_size: Number of bytes to read from the connection per chunk.
+
+        Returns:
+            An iterator over decoded text chunks, or None if the filing cannot be
+            retrieved. The iterator raises requests.exceptions.RequestException if
+            the connection fails part way through the body.
+        """
+        doc_url = self._get_document_url(filing_url)
+        if doc_url is None:
+            return None
+        accession = self._accession_from_document_url(doc_url)
+        if self.cache is not None:
+            chunks = self.cache.iter_chunks(accession, chunk_size)
+            if chunks is not None:
+                return chunks
+
+        doc_response = None
+        download_start = time.perf_counter()
+        try:
+            doc_response = self._get(doc_url, stream=True)
+            doc_response.raise_for_status()
         except requests.exceptions.RequestException as e:
             logging.error(f"Error fetching filing text from {filing_url}: {e}")
+            if doc_response is not None:
+                doc_response.close()
+            return None
+
+        writer = self.cache.open_writer(accession) if self.cache is not None else None
+        return self._iter_text_chunks(doc_response, chunk_size, writer, download_start)
+
+    def _iter_text_chunks(
+        self,
+        response: requests.Response,
+        chunk_size: int,
+        writer: Optional[FilingCacheWriter] = None,
+        download_start: Optional[float] = None,
+    ) -> Iterator[str]:
+        """
+        Decodes a streamed response body chunk by chunk, then closes the response.
+
+        Args:
+            response: A response opened with stream=True.
+            chunk_size: Number of bytes to read per chunk.
+            writer: Cache writer receiving the text; committed only if the whole
+                body is read (see _drain_to_cache), discarded otherwise.
+            download_start: perf_counter() value when the request was sent, for
+                the download time metric.
+        """
+        # Same encoding requests would pick for response.text, minus the slow
+        # whole-body charset detection.
+        decoder = codecs.getincrementaldecoder(response.encoding or "utf-8")(
+            errors="replace"
+        )
+        decoded_bytes = 0
+        raw_chunks = response.iter_content(chunk_size=chunk_size)
+        draining = False
+        try:
+            for raw_chunk in raw_chunks:
+                decoded_bytes += len(raw_chunk)
+                text = decoder.decode(raw_chunk)
+                if text:
+                    if writer is not None:
+                        writer.write(text)
+                    yield text
+            text = decoder.decode(b"", final=True)
+            if writer is not None:
+                writer.write(text)
+                writer.commit()
+            if text:
+                yield text
+        except GeneratorExit:
+            if writer is not None and self.cache_drain_bytes > 0:
+                # The caller (e.g. an alert) does not wait for the rest of the body.
+                draining = True
+                threading.Thread(
+                    target=self._drain_to_cache,
+                    args=(response, raw_chunks, decoder, writer, decoded_bytes, download_start),
+                    name="cache-drain",
+                    daemon=True,
+                ).start()
+            raise
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error streaming filing text from {response.url}: {e}")
+            raise
+        finally:
+            if not draining:
+                self._finish_download(response, writer, decoded_bytes, download_start)
+
+    def _drain_to_cache(
+        self,
+        response: requests.Response,
+        raw_chunks: Iterator[bytes],
+        decoder: codecs.IncrementalDecoder,
+        writer: FilingCacheWriter,
+        decoded_bytes: int,
+        download_start: Optional[float],
+    ):
+        """
+        Reads the rest of a body the analysis no longer needs into the cache
+        writer, so filings that stopped early (those with an alert) are cached
+        too. Gives up after cache_drain_bytes, leaving the entry uncommitted.
+        Runs on its own thread and closes the response.
+        """
+        drained = 0
+        try:
+            for raw_chunk in raw_chunks:
+                drained += len(raw_chunk)
+                if drained > self.cache_drain_bytes:
+                    return
+                writer.write(decoder.decode(raw_chunk))
+            writer.write(decoder.decode(b"", final=True))
+            writer.commit()
+        except (requests.exceptions.RequestException, OSError) as e:
+            logging.warning(f"Could not complete the cache entry of a filing: {e}")
+        finally:
+            self._finish_download(response, writer, decoded_bytes + drained, download_start)
+
+    def _finish_download(
+        self,
+        response: requests.Response,
+        writer: Optional[FilingCacheWriter],
+        decoded_bytes: int,
+        download_start: Optional[float],
+    ):
+        """
+        Discards an uncommitted cache entry, closes the response and records the
+        download metrics.
+        """
+        if writer is not None:
+            writer.abort()  # No-op once committed
+        self._record_transfer(response, decoded_bytes)
+        response.close()
+        if download_start is not None:
+            metrics.DOCUMENT_DOWNLOAD_SECONDS.observe(time.perf_counter() - download_start)
+        metrics.DOCUMENT_BYTES.observe(decoded_bytes)
+
+    def iter_index_lines(self, index_url: str, chunk_size: int = 64 * 1024) -> Iterator[str]:
+        """
+        Streams the lines of an EDGAR index file (e.g. master.gz), decompressing
+        it on the fly when it is gzipped, so the file is never held in memory.
+
+        Args:
+            index_url: The URL of the index file.
+            chunk_size: Number of bytes to read from the connection per chunk.
+
+        Yields:
+            The lines of the file, without line breaks. Nothing if the file does
+            not exist, as for the daily index of a holiday.
+
+        Raises:
+            requests.exceptions.RequestException: If the file cannot be read.
+        """
+        response = self._get(index_url, stream=True)
+        decoded_bytes = 0
+        try:
+            if response.status_code == 404:
+                logging.info(f"No index file at {index_url}")
+                return
+            response.raise_for_status()
+            decompressor = None
+            pending = ''
+            for raw_chunk in response.iter_content(chunk_size=chunk_size):
+                if decompressor is None and decoded_bytes == 0 and raw_chunk.startswith(b'\x1f\x8b'):
+                    decompressor = zlib.decompressobj(wbits=31)  # gzip container
+                decoded_bytes += len(raw_chunk)
+                data = decompressor.decompress(raw_chunk) if decompressor is not None else raw_chunk
+                # Index files are ASCII; latin-1 never fails on a stray byte.
+                lines = (pending + data.decode('latin-1')).split('\n')
+                pending = lines.pop()
+                yield from lines
+            if decompressor is not None:
+                pending += decompressor.flush().decode('latin-1')
+            if pending:
+                yield pending
+        except requests.exceptions.RequestException as e:
+            logging.error(f"Error reading index file {index_url}: {e}")
+            raise
+        finally:
+            self._record_transfer(response, decoded_bytes)
+            response.close()
+
+    @staticmethod
+    def _accession_from_document_url(doc_url: str) -> str:
+        """
+        Returns the dashed accession number from a full submission .txt URL.
+        """
+        return doc_url.rsplit('/', 1)[-1][:-len('.txt')]
+
+    def _get_document_url(self, filing_url: str) -> Optional[str]:
+        """
+        Builds the URL of a filing's full submission .txt from its index page URL.
+
+        Args:
+            filing_url: The URL of the filing's index page.
+
+        Returns:
+            The .txt URL, or None if the index URL does not have the expected format.
+        """
+        parsed_url = urlparse(filing_url)
+        path_parts = parsed_url.path.split('/')
+        if len(path_parts) < 7: # Ensure there are enough parts for CIK and accession number
+            logging.warning(f"Invalid filing URL format: {filing_url}")
             return None
 
+        cik = path_parts[4]
+        accession_no_dashes = path_parts[5]
+        accession_no_with_dashes = path_parts[6].replace('-index.htm', '')
+
+        # Construct the full URL for the .txt document, on the index page's host
+        return (
+            f"{parsed_url.scheme}://{parsed_url.netloc}/Archives/edgar/data/"
+            f"{cik}/{accession_no_dashes}/{accession_no_with_dashes}.txt"
+        )
+
 
 if __name__ == "__main__":
     client = SecEdgarClient()
@@ -0,0 +1,290 @@
+import re
+from typing import AnyStr, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+# Document types that never carry prose worth scanning: images, archives, PDFs and
+# spreadsheets (uuencoded), plus XBRL instance/schema/linkbase files and the
+# generated XML/JSON rendering metadata. 'EX-101' also covers 'EX-101.INS' etc.
+DEFAULT_EXCLUDED_TYPES = ('GRAPHIC', 'ZIP', 'PDF', 'EXCEL', 'XML', 'JSON', 'EX-101')
+
+_STR_PATTERNS = {
+    'document_start': '<DOCUMENT>',
+    'document_end': '</DOCUMENT>',
+    'text_start': '<TEXT>',
+    'text_end': '</TEXT>',
+    'field': re.compile(r'^<(TYPE|FILENAME)>[ \t]*([^\r\n]*?)[ \t]*$', re.MULTILINE),
+    'line_break': re.compile(r'\r?\n'),
+}
+_BYTES_PATTERNS = {
+    'document_start': b'<DOCUMENT>',
+    'document_end': b'</DOCUMENT>',
+    'text_start': b'<TEXT>',
+    'text_end': b'</TEXT>',
+    'field': re.compile(rb'^<(TYPE|FILENAME)>[ \t]*([^\r\n]*?)[ \t]*$', re.MULTILINE),
+    'line_break': re.compile(rb'\r?\n'),
+}
+_BINARY_BODY_PATTERN = re.compile(r'\s*(?:<PDF>|begin [0-7]{3} )')
+_BINARY_BODY_BYTES_PATTERN = re.compile(rb'\s*(?:<PDF>|begin [0-7]{3} )')
+# HTML documents, including inline XBRL wrapped in <XBRL> and an XML declaration
+_HTML_BODY_PATTERN = re.compile(r'\s*(?:<XBRL>\s*)?(?:<\?xml[^>]*>\s*)?(?:<!DOCTYPE\s+html|<html)', re.IGNORECASE)
+_HTML_BODY_BYTES_PATTERN = re.compile(
+    rb'\s*(?:<XBRL>\s*)?(?:<\?xml[^>]*>\s*)?(?:<!DOCTYPE\s+html|<html)', re.IGNORECASE
+)
+_TAG_LINE_PATTERN = re.compile(r'^<(DOCUMENT|/DOCUMENT|TYPE|TEXT|/TEXT)>([^\r\n]*)', re.MULTILINE)
+
+# States of DocumentFilter
+_OUTSIDE, _HEAD, _BODY = range(3)
+
+
+class Segment(NamedTuple):
+    """
+    An analyzable part of a block given to DocumentFilter.
+
+    document numbers the <DOCUMENT> the segment belongs to (0 before the first
+    one), so consecutive segments of one document can be told apart from the
+    next document's.
+    """
+
+    start: int
+    end: int
+    html: bool
+    document: int
+
+
+class FilingDocument(NamedTuple):
+    """
+    One <DOCUMENT> block of a full submission .txt file.
+
+    start and end delimit the document body between <TEXT> and </TEXT>. They are
+    byte offsets when the submission was given as bytes, character offsets for str.
+    """
+
+    type: str
+    filename: Optional[str]
+    start: int
+    end: int
+    binary: bool
+    html: bool
+
+
+def iter_documents(data: AnyStr) -> Iterator[FilingDocument]:
+    """
+    Splits an EDGAR full submission (an SGML container) into its documents.
+
+    Only the few tag lines delimiting each document are searched for, so the cost is
+    a handful of substring searches per document whatever the document size.
+
+    Args:
+        data: The full submission text, as str or bytes (e.g. a memory map).
+
+    Yields:
+        A FilingDocument for each <DOCUMENT> block, in order.
+    """
+    if isinstance(data, str):
+        patterns, binary_pattern, html_pattern = _STR_PATTERNS, _BINARY_BODY_PATTERN, _HTML_BODY_PATTERN
+    else:
+        patterns, binary_pattern, html_pattern = _BYTES_PATTERNS, _BINARY_BODY_BYTES_PATTERN, _HTML_BODY_BYTES_PATTERN
+    pos = 0
+    while True:
+        doc_start = data.find(patterns['document_start'], pos)
+        if doc_start == -1:
+            return
+        doc_end = data.find(patterns['document_end'], doc_start)
+        if doc_end == -1:
+            doc_end = len(data)
+
+        text_tag = data.find(patterns['text_start'], doc_start, doc_end)
+        head_end = text_tag if text_tag != -1 else doc_end
+        fields = {}
+        for match in patterns['field'].finditer(data, doc_start, head_end):
+            name, value = match.group(1), match.group(2)
+            if isinstance(value, bytes):
+                name, value = name.decode('ascii'), value.decode('latin-1')
+            fields.setdefault(name, value)
+
+        if text_tag == -1:
+            body_start = body_end = doc_end
+        else:
+            line_break = patterns['line_break'].match(data, text_tag + len(patterns['text_start']))
+            body_start = line_break.end() if line_break else text_tag + len(patterns['text_start'])
+            body_end = data.find(patterns['text_end'], body_start, doc_end)
+            if body_end == -1:
+                body_end = doc_end
+
+        yield FilingDocument(
+            type=fields.get('TYPE', '').upper(),
+            filename=fields.get('FILENAME') or None,
+            start=body_start,
+            end=body_end,
+            binary=binary_pattern.match(data, body_start, body_end) is not None,
+            html=html_pattern.match(data, body_start, body_end) is not None,
+        )
+        pos = doc_end + 1
+
+
+def iter_segments(
+    data: AnyStr,
+    include_types: Optional[Iterable[str]] = None,
+    exclude_types: Iterable[str] = DEFAULT_EXCLUDED_TYPES,
+) -> Iterator[Segment]:
+    """
+    Yields the analyzable segments of a complete submission, like DocumentFilter
+    but jumping from document to document instead of reading every line.
+
+    The header before the first <DOCUMENT> is one segment (an HTML one if the
+    data is a bare HTML page), followed by the body of every selected, non-binary
+    document. The few tag lines between documents are left out.
+
+    Args:
+        data: The full submission, as str or bytes (e.g. a memory map).
+        include_types: If given, only these document types are analyzed.
+        exclude_types: Document types that are never analyzed.
+    """
+    if isinstance(data, str):
+        document_start, html_pattern = _STR_PATTERNS['document_start'], _HTML_BODY_PATTERN
+    else:
+        document_start, html_pattern = _BYTES_PATTERNS['document_start'], _HTML_BODY_BYTES_PATTERN
+    first_document = data.find(document_start)
+    header_end = len(data) if first_document == -1 else first_document
+    if header_end:
+        bare_html = first_document == -1 and html_pattern.match(data, 0, header_end) is not None
+        yield Segment(0, header_end, bare_html, 0)
+    for number, document in enumerate(iter_documents(data), 1):
+        if document.binary or not type_selected(document.type, include_types, exclude_types):
+            continue
+        yield Segment(document.start, document.end, document.html, number)
+
+
+def type_selected(
+    doc_type: str,
+    include_types: Optional[Iterable[str]] = None,
+    exclude_types: Iterable[str] = DEFAULT_EXCLUDED_TYPES,
+) -> bool:
+    """
+    Decides whether documents of a given <TYPE> should be analyzed.
+
+    A type pattern matches the type itself and its dotted sub-types, so 'EX-101'
+    matches 'EX-101.INS' and 'EX-99' matches 'EX-99.1'.
+
+    Args:
+        doc_type: The document type, e.g. '10-K' or 'EX-99.1'.
+        include_types: If given, only matching types are analyzed.
+        exclude_types: Matching types are never analyzed.
+
+    Returns:
+        True if the document should be analyzed.
+    """
+    doc_type = doc_type.upper()
+
+    def matches(patterns: Iterable[str]) -> bool:
+        return any(doc_type == p.upper() or doc_type.startswith(p.upper() + '.') for p in patterns)
+
+    if include_types is not None and not matches(include_types):
+        return False
+    return not matches(exclude_types)
+
+
+class DocumentFilter:
+    """
+    Incrementally tracks the SGML structure of a submission fed to it line-block by
+    line-block, and reports which parts of each block are worth analyzing.
+
+    Text outside any <DOCUMENT> (the <SEC-HEADER>) and the bodies of selected,
+    non-binary documents are analyzable; document headers, excluded document types
+    and uuencoded bodies are skipped. Bodies starting like an HTML page are marked
+    as HTML, and so is a bare HTML page given without any SGML wrapper.
+    """
+
+    def __init__(
+        self,
+        include_types: Optional[Iterable[str]] = None,
+        exclude_types: Iterable[str] = DEFAULT_EXCLUDED_TYPES,
+    ):
+        """
+        Initializes the filter at the start of a submission.
+
+        Args:
+            include_types: If given, only these document types are analyzed.
+            exclude_types: Document types that are never analyzed.
+        """
+        self.include_types = None if include_types is None else tuple(include_types)
+        self.exclude_types = tuple(exclude_types)
+        self.skipped_chars = 0
+        self._state = _OUTSIDE
+        self._doc_type = ''
+        self._skip_body = False
+        self._check_binary = False
+        self._html = False
+        self._document = 0
+        # Whether the start of the input is still to be checked for a bare HTML page
+        self._check_bare_html = True
+
+    def ranges(self, text: str, endpos: int) -> List[Tuple[int, int]]:
+        """
+        Returns the analyzable (start, end) ranges of text[:endpos].
+
+        Args:
+            text: Text starting at a line start.
+            endpos: End of the block to process; must be at a line boundary. Later
+                calls continue from the state left by this one.
+        """
+        return [(segment.start, segment.end) for segment in self.segments(text, endpos)]
+
+    def segments(self, text: str, endpos: int) -> List[Segment]:
+        """
+        Returns the analyzable segments of text[:endpos], like ranges() but telling
+        which are HTML and which document they belong to.
+
+        Args:
+            text: Text starting at a line start.
+            endpos: End of the block to process; must be at a line boundary. Later
+                calls continue from the state left by this one.
+        """
+        ranges: List[Segment] = []
+        pos = 0
+        for match in _TAG_LINE_PATTERN.finditer(text, 0, endpos):
+            tag = match.group(1)
+            if self._state == _BODY and tag in ('TYPE', 'TEXT'):
+                continue  # Only the end of the text or document ends a body.
+            self._emit(text, pos, match.start(), ranges)
+            self.skipped_chars += match.end() - match.start()
+            pos = match.end()
+            if tag == 'DOCUMENT':
+                self._state, self._doc_type = _HEAD, ''
+                self._document += 1
+                self._html = self._check_bare_html = False
+            elif tag == 'TYPE' and self._state == _HEAD:
+                self._doc_type = match.group(2).strip()
+            elif tag == 'TEXT' and self._state == _HEAD:
+                self._state = _BODY
+                self._html = False
+                self._skip_body = not type_selected(self._doc_type, self.include_types, self.exclude_types)
+                self._check_binary = not self._skip_body
+            elif tag == '/TEXT':
+                self._state = _HEAD
+            elif tag == '/DOCUMENT':
+                self._state = _OUTSIDE
+                self._html = False
+        self._emit(text, pos, endpos, ranges)
+        return ranges
+
+    def _emit(self, text: str, start: int, end: int, ranges: List[Segment]):
+        """
+        Appends text[start:end] to ranges if the current state makes it analyzable.
+        """
+        if start >= end:
+            return
+        if self._state == _BODY and self._check_binary:
+            match = _BINARY_BODY_PATTERN.match(text, start, end)
+            if match is not None:
+                self._skip_body = True
+                self._check_binary = False
+            elif text[start:end].strip():
+                self._check_binary = False
+                self._html = _HTML_BODY_PATTERN.match(text, start, end) is not None
+        elif self._state == _OUTSIDE and self._check_bare_html and text[start:end].strip():
+            self._check_bare_html = False
+            self._html = _HTML_BODY_PATTERN.match(text, start, end) is not None
+        if self._state == _HEAD or (self._state == _BODY and self._skip_body):
+            self.skipped_chars += end - start
+            return
+        ranges.append(Segment(start, end, self._html, self._document))
@@ -1,9 +1,19 @@
 import logging
 import os
+import queue
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from typing import Callable, Deque, List, Optional, Sequence, Set, Tuple
 
 import telebot
+from telebot.apihelper import ApiTelegramException
 from dotenv import load_dotenv
 
+from src import metrics
+from src.rate_limiter import RateLimiter
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -12,15 +22,149 @@ logging.basicConfig(
     level=logging.INFO, format="%(asctime)s - %(levelname)s - %(message)s"
 )
 
+MAX_MESSAGE_LENGTH = 4096  # Telegram rejects longer message texts
+DIGEST_SEPARATOR = "\n\n〰〰〰〰〰\n\n"
+MAX_SEND_ATTEMPTS = 5
+# Appended to a message shortened to MAX_MESSAGE_LENGTH
+TRUNCATION_MARK = "\n…"
+
+# Queue item telling the background sender to stop
+_STOP = object()
+
+
+def format_sec_alert(filing_details: dict, summary: str) -> str:
+    """
+    Formats the alert message for a filing with crypto-related content.
+
+    Args:
+        filing_details: A dictionary containing filing details like company name, form type, etc.
+        summary: The summary of the crypto-related content.
+
+    Returns:
+        The Markdown message text.
+    """
+    company_name = filing_details.get('company_name', 'N/A')
+    form_type = filing_details.get('form_type', 'N/A')
+    filing_date = filing_details.get('filing_date', 'N/A')
+    link = filing_details.get('link', 'N/A')
+
+    return f"""🚨 *New Crypto Filing Alert* 🚨
+
+*Company*: {company_name}
+*Form*: {form_type}
+*Date*: {filing_date}
+*Link*: [{link}]({link})
+
+*Snippet*: {summary}
+        """
+
+
+def parse_published(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parses a feed timestamp such as '2025-07-14T10:00:00-04:00'.
+
+    Returns:
+        The timezone-aware timestamp, or None if it is missing, invalid or naive.
+    """
+    try:
+        published = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    return published if published.tzinfo is not None else None
+
+
+def format_aave_alert(apy_rates: dict) -> str:
+    """
+    Formats the Aave APY rates message.
+
+    Args:
+        apy_rates: A dictionary with stablecoin tickers as keys and their APY rates as values.
+
+    Returns:
+        The Markdown message text.
+    """
+    return f"""📊 *Daily Aave APY Rates* 📊
+
+*USDT*: {apy_rates.get('USDT', 'N/A')}
+*USDC*: {apy_rates.get('USDC', 'N/A')}
+*DAI*: {apy_rates.get('DAI', 'N/A')}
+        """
+
+
+def truncate_message(text: str) -> str:
+    """
+    Shortens a message to MAX_MESSAGE_LENGTH at its last line break that fits (or
+    space, for a single long line), so no Markdown entity is cut in half.
+
+    Args:
+        text: The Markdown message text.
+
+    Returns:
+        The text unchanged if it fits, otherwise its start and TRUNCATION_MARK.
+    """
+    if len(text) <= MAX_MESSAGE_LENGTH:
+        return text
+    limit = MAX_MESSAGE_LENGTH - len(TRUNCATION_MARK)
+    cut = text.rfind("\n", 0, limit + 1)
+    if cut <= 0:
+        cut = text.rfind(" ", 0, limit + 1)
+    if cut <= 0:
+        cut = limit
+    return text[:cut].rstrip() + TRUNCATION_MARK
+
+
+def build_digest(messages: Sequence[str]) -> Tuple[str, int]:
+    """
+    Joins as many queued messages as fit into one Telegram message.
+
+    Args:
+        messages: Pending message texts, oldest first. Nothing is removed.
+
+    Returns:
+        The digest text and the number of messages it contains (at least one; a
+        single over-long message is truncated with truncate_message).
+    """
+    text = truncate_message(messages[0])
+    count = 1
+    while count < len(messages):
+        candidate = text + DIGEST_SEPARATOR + messages[count]
+        if len(candidate) > MAX_MESSAGE_LENGTH:
+            break
+        text = candidate
+        count += 1
+    return text, count
+
 
 class TelegramClient:
     """
     A client for sending messages to a Telegram chat.
+
+    Every message respects a per-chat and a global rate limit and is retried after
+    the delay Telegram asks for on a 429. With background=True, alerts are queued
+    and sent by a daemon thread so callers never wait on Telegram; alerts that pile
+    up while the sender is rate limited are merged into digest messages.
+
+    An alert sent with a key is only reported by take_delivered() once Telegram
+    accepted it, so the caller can record the filing as processed then; until
+    the send succeeds or is given up on, the key is in alerts_in_flight().
     """
 
-    def __init__(self):
+    def __init__(
+        self,
+        background: bool = False,
+        global_limiter: Optional[RateLimiter] = None,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
         """
         Initializes the TelegramClient, configuring the bot.
+
+        Args:
+            background: Send alerts from a background thread instead of the caller.
+            global_limiter: Limiter for every message sent by the bot; share one
+                between clients of the same bot. By default a new one allowing
+                TELEGRAM_MAX_MESSAGES_PER_SECOND (30) is created. The chat itself is
+                limited to TELEGRAM_CHAT_MESSAGES_PER_SECOND (1).
+            sleep: Sleep function used while honoring retry_after, replaceable in tests.
         """
         bot_token = os.getenv("TELEGRAM_BOT_TOKEN")
         self.chat_id = os.getenv("TELEGRAM_CHAT_ID")
@@ -29,63 +173,204 @@ class TelegramClient:
                 "TELEGRAM_BOT_TOKEN or TELEGRAM_CHAT_ID environment variables not set."
             )
         self.bot = telebot.TeleBot(bot_token)
+        if global_limiter is None:
+            global_limiter = RateLimiter(float(os.getenv("TELEGRAM_MAX_MESSAGES_PER_SECOND", "30")))
+        self.global_limiter = global_limiter
+        self.chat_limiter = RateLimiter(float(os.getenv("TELEGRAM_CHAT_MESSAGES_PER_SECOND", "1")))
+        self._sleep = sleep
+        self._alerts_lock = threading.Lock()
+        self._in_flight: Set[str] = set()
+        self._delivered: List[str] = []
+
+        self._queue: Optional[queue.Queue] = None
+        self._worker: Optional[threading.Thread] = None
+        if background:
+            self._queue = queue.Queue()
+            self._worker = threading.Thread(target=self._run, name="telegram-sender", daemon=True)
+            self._worker.start()
 
-    def send_sec_alert(self, filing_details: dict, summary: str):
+    def send_sec_alert(self, filing_details: dict, summary: str, key: Optional[str] = None):
         """
         Sends a formatted alert message to the configured Telegram chat.
 
         Args:
             filing_details: A dictionary containing filing details like company name, form type, etc.
             summary: The summary of the crypto-related content from the LLM.
+            key: Identifies the alert (e.g. the accession number) in
+                take_delivered() and alerts_in_flight().
         """
-        company_name = filing_details.get('company_name', 'N/A')
-        form_type = filing_details.get('form_type', 'N/A')
-        filing_date = filing_details.get('filing_date', 'N/A')
-        link = filing_details.get('link', 'N/A')
+        company_name = filing_details.get('company_name')
+        published = parse_published(filing_details.get('filing_date'))
+        if key is not None:
+            with self._alerts_lock:
+                self._in_flight.add(key)
+        self._send(format_sec_alert(filing_details, summary), f"alert for {company_name}", published, key)
 
-        message = f"""🚨 *New Crypto Filing Alert* 🚨
+    def send_aave_alert(self, apy_rates: dict):
+        """
+        Sends a formatted alert message with Aave APY rates.
 
-*Company*: {company_name}
-*Form*: {form_type}
-*Date*: {filing_date}
-*Link*: [{link}]({link})
+        Args:
+            apy_rates: A dictionary with stablecoin tickers as keys and their APY rates as values.
+        """
+        self._send(format_aave_alert(apy_rates), "Aave APY rates alert")
 
-*Snippet*: {summary}
+    def take_delivered(self) -> List[str]:
         """
-        try:
-            self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode="Markdown",
-            )
-            logging.info(
-                f"Successfully sent alert for {filing_details.get('company_name')}"
-            )
-        except Exception as e:
-            logging.error(f"Error sending Telegram alert: {e}")
+        Returns the keys of the alerts delivered since the last call.
+        """
+        with self._alerts_lock:
+            delivered, self._delivered = self._delivered, []
+        return delivered
 
-    def send_aave_alert(self, apy_rates: dict):
+    def alerts_in_flight(self) -> Set[str]:
         """
-        Sends a formatted alert message with Aave APY rates.
+        Returns the keys of the alerts queued or being sent.
+        """
+        with self._alerts_lock:
+            return set(self._in_flight)
+
+    def flush(self):
+        """
+        Blocks until every queued message has been sent or given up on.
+        """
+        if self._queue is not None:
+            self._queue.join()
+
+    def close(self):
+        """
+        Sends the remaining queued messages and stops the background sender.
+        """
+        if self._worker is not None:
+            self._queue.put(_STOP)
+            self._worker.join()
+            self._worker = None
+
+    def _send(
+        self, message: str, description: str, published: Optional[datetime] = None, key: Optional[str] = None
+    ):
+        """
+        Queues the message in background mode, or sends it right away.
 
         Args:
-            apy_rates: A dictionary with stablecoin tickers as keys and their APY rates as values.
+            message: The Markdown message text.
+            description: What the message is, for the log.
+            published: When the filing the message is about was published, to
+                record the alert latency.
+            key: Key of the alert, see send_sec_alert.
         """
-        message = f"""📊 *Daily Aave APY Rates* 📊
+        if self._worker is not None:
+            self._queue.put((message, published, key))
+            return
+        delivered = self._deliver(truncate_message(message))
+        if delivered:
+            logging.info(f"Successfully sent {description}")
+            self._record_latency([published])
+        self._settle([key], delivered)
 
-*USDT*: {apy_rates.get('USDT', 'N/A')}
-*USDC*: {apy_rates.get('USDC', 'N/A')}
-*DAI*: {apy_rates.get('DAI', 'N/A')}
+    def _run(self):
         """
-        try:
-            self.bot.send_message(
-                chat_id=self.chat_id,
-                text=message,
-                parse_mode="Markdown",
-            )
-            logging.info("Successfully sent Aave APY rates alert.")
-        except Exception as e:
-            logging.error(f"Error sending Aave APY rates alert: {e}")
+        Background sender: waits for a send slot, then sends everything queued by
+        then as few digest messages as possible.
+        """
+        pending: Deque[Tuple[str, Optional[datetime], Optional[str]]] = deque()
+        stopping = False
+        while pending or not stopping:
+            if not pending:
+                item = self._queue.get()
+                if item is _STOP:
+                    self._queue.task_done()
+                    break
+                pending.append(item)
+            self.chat_limiter.acquire()
+            # Alerts that arrived while waiting for the slot share this message.
+            while True:
+                try:
+                    item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    self._queue.task_done()
+                    stopping = True
+                else:
+                    pending.append(item)
+
+            text, count = build_digest([message for message, _, _ in pending])
+            sent = [pending.popleft() for _ in range(count)]
+            delivered = self._deliver(text, chat_slot_taken=True)
+            if delivered:
+                logging.info(f"Successfully sent a Telegram message with {count} alert(s)")
+                self._record_latency([published for _, published, _ in sent])
+            self._settle([key for _, _, key in sent], delivered)
+            for _ in range(count):
+                self._queue.task_done()
+
+    def _settle(self, keys: List[Optional[str]], delivered: bool):
+        """
+        Moves the keys of sent or given up alerts out of the in-flight set.
+        """
+        keys = [key for key in keys if key is not None]
+        with self._alerts_lock:
+            self._in_flight.difference_update(keys)
+            if delivered:
+                self._delivered.extend(keys)
+
+    @staticmethod
+    def _record_latency(published_times: List[Optional[datetime]]):
+        """
+        Records the time from publication to now for each filing just alerted on.
+        """
+        now = datetime.now(timezone.utc)
+        for published in published_times:
+            if published is not None:
+                metrics.ALERT_LATENCY_SECONDS.observe(max(0.0, (now - published).total_seconds()))
+
+    def _deliver(self, text: str, chat_slot_taken: bool = False) -> bool:
+        """
+        Sends one message within the rate limits, retrying after 429 responses.
+
+        Args:
+            text: The Markdown message text.
+            chat_slot_taken: Whether the caller already waited on the chat limiter.
+
+        Returns:
+            True if Telegram accepted the message.
+        """
+        with metrics.TELEGRAM_SEND_SECONDS.time():
+            return self._deliver_with_retries(text, chat_slot_taken)
+
+    def _deliver_with_retries(self, text: str, chat_slot_taken: bool) -> bool:
+        parse_mode = "Markdown"
+        for attempt in range(1, MAX_SEND_ATTEMPTS + 1):
+            if not chat_slot_taken:
+                self.chat_limiter.acquire()
+            chat_slot_taken = False
+            self.global_limiter.acquire()
+            try:
+                self.bot.send_message(
+                    chat_id=self.chat_id,
+                    text=text,
+                    parse_mode=parse_mode,
+                )
+                return True
+            except ApiTelegramException as e:
+                # Filing text in a snippet can hold unbalanced Markdown; send such
+                # a message as plain text rather than lose it.
+                if e.error_code == 400 and parse_mode and "parse entities" in str(e.description) \
+                        and attempt < MAX_SEND_ATTEMPTS:
+                    logging.warning("Telegram could not parse the message as Markdown; sending it as plain text.")
+                    parse_mode = None
+                    continue
+                retry_after = (e.result_json.get("parameters") or {}).get("retry_after")
+                if e.error_code != 429 or retry_after is None or attempt == MAX_SEND_ATTEMPTS:
+                    logging.error(f"Error sending Telegram message: {e}")
+                    return False
+                logging.warning(f"Telegram flood limit hit; retrying in {retry_after}s.")
+                self._sleep(float(retry_after))
+            except Exception as e:
+                logging.error(f"Error sending Telegram message: {e}")
+                return False
+        return False
 
 
 if __name__ == "__main__":
@@ -0,0 +1,156 @@
+import html
+import re
+from typing import Dict, Iterable, Optional
+
+from bs4 import BeautifulSoup, SoupStrainer
+
+try:
+    import lxml  # noqa: F401
+    PARSER_BACKEND = 'lxml'
+except ImportError:  # Installs without lxml fall back to BeautifulSoup's slower html.parser
+    PARSER_BACKEND = 'html.parser'
+
+# Elements whose content is never text: code, styling, the document head and the
+# hidden facts of inline XBRL.
+SKIP_START_PATTERN = re.compile(r'<(script|style|head|ix:header)\b[^>]*>', re.IGNORECASE)
+BLOCK_TAG_PATTERN = re.compile(
+    r'</?(?:p|div|br|tr|li|ul|ol|table|h[1-6]|title|center|blockquote|pre|hr)\b[^>]*>', re.IGNORECASE
+)
+CELL_TAG_PATTERN = re.compile(r'</?t[dh]\b[^>]*>', re.IGNORECASE)
+# Only '<' followed by a tag name, '/', '!' or '?' opens a tag, so 'a < b' survives.
+TAG_PATTERN = re.compile(r'<[A-Za-z/!?][^>]*>')
+SPACE_PATTERN = re.compile(r'[ \t]{2,}|\t')
+# Typographic characters common in filings, mapped to ASCII so the cleaned text
+# usually stays ASCII and is matched on KeywordAnalyzer's fast path.
+ASCII_PUNCTUATION = tuple({
+    '\xa0': ' ', '\u2002': ' ', '\u2003': ' ', '\u2009': ' ', '\u200b': '',
+    '\u2018': "'", '\u2019': "'", '\u201c': '"', '\u201d': '"',
+    '\u2010': '-', '\u2011': '-', '\u2013': '-', '\u2014': '-', '\u2022': '*',
+}.items())
+# Longest unterminated tag held back for the next block.
+MAX_PENDING_TAG = 64 * 1024
+
+_SKIP_END_PATTERNS: Dict[str, 're.Pattern[str]'] = {}
+
+
+def _skip_end_pattern(name: str) -> 're.Pattern[str]':
+    pattern = _SKIP_END_PATTERNS.get(name)
+    if pattern is None:
+        pattern = _SKIP_END_PATTERNS[name] = re.compile(r'</' + re.escape(name) + r'\s*>', re.IGNORECASE)
+    return pattern
+
+
+class HtmlTextExtractor:
+    """
+    Converts an HTML document to plain text, one block at a time.
+
+    Block-level tags become line breaks and table cells spaces; every other tag is
+    removed, entities are decoded and script, style, head and ix:header content is
+    dropped. Each block is cleaned with a few whole-block regex passes instead of
+    per line or per tag. A tag or skipped element cut off at the end of a block is
+    carried over to the next one, so blocks may be split at any line boundary.
+    """
+
+    def __init__(self):
+        """
+        Initializes the extractor at the start of a document.
+        """
+        self._pending = ''
+        self._skip_end: Optional['re.Pattern[str]'] = None
+
+    def feed(self, block: str) -> str:
+        """
+        Converts the next block of the document.
+
+        Args:
+            block: HTML following the previous block.
+
+        Returns:
+            The text of the block, except for a trailing unterminated tag.
+        """
+        buffer = self._pending + block
+        self._pending = ''
+        lt = buffer.rfind('<')
+        if lt != -1 and buffer.find('>', lt) == -1 and len(buffer) - lt <= MAX_PENDING_TAG:
+            buffer, self._pending = buffer[:lt], buffer[lt:]
+
+        parts = []
+        pos = 0
+        while pos < len(buffer):
+            if self._skip_end is not None:
+                end = self._skip_end.search(buffer, pos)
+                if end is None:
+                    break
+                self._skip_end = None
+                pos = end.end()
+                parts.append('\n')
+                continue
+            start = SKIP_START_PATTERN.search(buffer, pos)
+            if start is None:
+                parts.append(buffer[pos:])
+                break
+            parts.append(buffer[pos:start.start()])
+            pos = start.end()
+            if not start.group(0).endswith('/>'):
+                self._skip_end = _skip_end_pattern(start.group(1))
+        return self._clean(''.join(parts))
+
+    @staticmethod
+    def _clean(fragment: str) -> str:
+        """
+        Turns HTML without skipped elements into text.
+        """
+        if '<' in fragment:
+            fragment = BLOCK_TAG_PATTERN.sub('\n', fragment)
+            fragment = CELL_TAG_PATTERN.sub(' ', fragment)
+            fragment = TAG_PATTERN.sub('', fragment)
+        if '&' in fragment:
+            fragment = html.unescape(fragment)
+        if not fragment.isascii():
+            # A few str.replace() scans are much faster than str.translate() here.
+            for char, replacement in ASCII_PUNCTUATION:
+                if char in fragment:
+                    fragment = fragment.replace(char, replacement)
+        return SPACE_PATTERN.sub(' ', fragment)
+
+
+def html_to_text(document: str) -> str:
+    """
+    Converts a complete HTML document to plain text (see HtmlTextExtractor).
+    """
+    return HtmlTextExtractor().feed(document)
+
+
+def extract_apy_rates(
+    page_html: str, tickers: Iterable[str], row_prefix: str, parser: str = PARSER_BACKEND
+) -> Dict[str, Optional[str]]:
+    """
+    Reads the APY of each ticker from a saved Aave market list page.
+
+    Only the market rows (div elements whose data-cy starts with row_prefix) are
+    parsed into a tree; the rest of the page is skipped by the parser.
+
+    Args:
+        page_html: The serialized page.
+        tickers: The tickers to read, e.g. ['USDT', 'USDC'].
+        row_prefix: The data-cy prefix of a market row, followed by the ticker.
+        parser: The BeautifulSoup backend; lxml (see requirements.txt) unless it
+            is missing.
+
+    Returns:
+        The APY text per ticker, whitespace removed; None when missing. Like the
+        in-page query, only the first row of each ticker is considered.
+    """
+    apy_rates = dict.fromkeys(tickers)
+    seen = set()
+    rows = SoupStrainer('div', attrs={'data-cy': lambda value: bool(value) and value.startswith(row_prefix)})
+    soup = BeautifulSoup(page_html, parser, parse_only=rows)
+    for row in soup.find_all('div', attrs={'data-cy': True}, recursive=False):
+        ticker = row['data-cy'][len(row_prefix):]
+        if ticker not in apy_rates or ticker in seen:
+            continue
+        seen.add(ticker)
+        apy = row.find('p', attrs={'data-cy': 'apy'})
+        if apy is not None:
+            apy_rates[ticker] = ''.join(apy.get_text().split())
+    return apy_rates
@@ -11,7 +11,7 @@ from src.aave_scraper import AaveScraper
 class TestAaveScraper(unittest.TestCase):
 
     @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
-    @patch('playwright.sync_api.sync_playwright')
+    @patch('src.aave_scraper.sync_playwright')
     def test_get_apy_rates_success(self, mock_sync_playwright):
         """
         Test that get_apy_rates successfully retrieves APY rates using Playwright.
@@ -25,25 +25,24 @@ class TestAaveScraper(unittest.TestCase):
         mock_page.goto.return_value = None # Mock successful navigation
         mock_page.wait_for_selector.return_value = None # Mock waiting for selector
 
-        # Mock the page.content() to return the HTML content
-        mock_page.content.return_value = """
-        <html><body>
-            <div data-cy="marketListItemListItem_USDT"><p data-cy="apy">1.23%</p></div>
-            <div data-cy="marketListItemListItem_USDC"><p data-cy="apy">0.87%</p></div>
-            <div data-cy="marketListItemListItem_DAI"><p data-cy="apy">0.55%</p></div>
-        </body></html>
-        """
+        # Mock the in-page query of the market rows
+        mock_page.eval_on_selector_all.return_value = {
+            'USDT': '1.23%', 'USDC': ' 0.87\n%', 'DAI': '0.55%', 'AAVE': '9.99%'
+        }
 
         scraper = AaveScraper()
         rates = scraper.get_apy_rates()
 
-        self.assertEqual(rates['USDT'], '1.23%')
-        self.assertEqual(rates['USDC'], '0.87%')
-        self.assertEqual(rates['DAI'], '0.55%')
+        self.assertEqual(rates, {'USDT': '1.23%', 'USDC': '0.87%', 'DAI': '0.55%'})
+        mock_page.route.assert_called_once_with('**/*', scraper._route_request)
+        mock_page.content.assert_not_called() # The DOM is never serialized
+        selector, _, arg = mock_page.eval_on_selector_all.call_args[0]
+        self.assertEqual(selector, 'div[data-cy^="marketListItemListItem_"]')
+        self.assertEqual(arg, ['marketListItemListItem_', ['USDT', 'USDC', 'DAI']])
         mock_browser.close.assert_called_once() # Ensure browser is closed
 
     @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
-    @patch('playwright.sync_api.sync_playwright')
+    @patch('src.aave_scraper.sync_playwright')
     def test_get_apy_rates_request_error(self, mock_sync_playwright):
         """
         Test that get_apy_rates handles a request exception (simulated by Playwright error).
@@ -64,7 +63,7 @@ class TestAaveScraper(unittest.TestCase):
         self.assertIsNone(rates['DAI'])
 
     @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
-    @patch('playwright.sync_api.sync_playwright')
+    @patch('src.aave_scraper.sync_playwright')
     def test_get_apy_rates_parsing_error(self, mock_sync_playwright):
         """
         Test that get_apy_rates handles parsing errors (e.g., APY not found).
@@ -77,7 +76,7 @@ class TestAaveScraper(unittest.TestCase):
         mock_browser.new_page.return_value = mock_page
         mock_page.goto.return_value = None # Mock successful navigation
         mock_page.wait_for_selector.return_value = None # Mock waiting for selector
-        mock_page.content.return_value = b"<html><body><p>No APY rates here</p></body></html>"
+        mock_page.eval_on_selector_all.return_value = {}
 
         scraper = AaveScraper()
         rates = scraper.get_apy_rates()
@@ -85,3 +84,86 @@ class TestAaveScraper(unittest.TestCase):
         self.assertIsNone(rates['USDT'])
         self.assertIsNone(rates['USDC'])
         self.assertIsNone(rates['DAI'])
+
+    @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
+    def test_route_request_blocks_heavy_resources(self):
+        """
+        Test that images, fonts, stylesheets and analytics requests are aborted while
+        documents and scripts are let through.
+        """
+        scraper = AaveScraper()
+        cases = [
+            ('image', 'https://app.aave.com/logo.png', True),
+            ('font', 'https://app.aave.com/inter.woff2', True),
+            ('stylesheet', 'https://app.aave.com/app.css', True),
+            ('script', 'https://www.googletagmanager.com/gtag/js', True),
+            ('document', 'https://app.aave.com/', False),
+            ('script', 'https://app.aave.com/_next/static/app.js', False),
+            ('fetch', 'https://api.thegraph.com/subgraphs', False),
+        ]
+        for resource_type, url, blocked in cases:
+            route = MagicMock()
+            route.request.resource_type = resource_type
+            route.request.url = url
+
+            scraper._route_request(route)
+
+            self.assertEqual(route.abort.called, blocked, url)
+            self.assertEqual(route.continue_.called, not blocked, url)
+
+    @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
+    @patch('src.aave_scraper.sync_playwright')
+    def test_persistent_reuses_browser_and_recycles(self, mock_sync_playwright):
+        """
+        Test that a persistent scraper launches Chromium once, reloads the same page
+        on later calls and restarts the browser after max_uses calls.
+        """
+        mock_playwright = mock_sync_playwright.return_value.start.return_value
+        mock_browser = mock_playwright.chromium.launch.return_value
+        mock_browser.is_connected.return_value = True
+        mock_page = mock_browser.new_page.return_value
+        mock_page.is_closed.return_value = False
+        mock_page.eval_on_selector_all.return_value = {'USDT': '1.23%', 'USDC': '0.87%', 'DAI': '0.55%'}
+
+        scraper = AaveScraper(persistent=True, max_uses=2)
+        for _ in range(3):
+            self.assertEqual(scraper.get_apy_rates()['USDT'], '1.23%')
+
+        self.assertEqual(mock_playwright.chromium.launch.call_count, 2)
+        self.assertEqual(mock_page.goto.call_count, 2)
+        mock_page.reload.assert_called_once()
+        mock_browser.close.assert_called_once()  # Recycled after the second call
+        mock_playwright.stop.assert_called_once()
+
+        scraper.close()
+        self.assertEqual(mock_browser.close.call_count, 2)
+        self.assertIsNone(scraper._browser)
+
+    @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com", "AAVE_URL": "http://test.aave.com"})
+    @patch('src.aave_scraper.sync_playwright')
+    def test_persistent_recovers_from_crash(self, mock_sync_playwright):
+        """
+        Test that a persistent scraper restarts a crashed browser and retries once.
+        """
+        mock_playwright = mock_sync_playwright.return_value.start.return_value
+        mock_browser = mock_playwright.chromium.launch.return_value
+        mock_browser.is_connected.return_value = True
+        mock_page = mock_browser.new_page.return_value
+        mock_page.is_closed.return_value = False
+        mock_page.goto.side_effect = [Exception("Target closed"), None]
+        mock_page.eval_on_selector_all.return_value = {'DAI': '0.55%'}
+
+        scraper = AaveScraper(persistent=True)
+        rates = scraper.get_apy_rates()
+
+        self.assertEqual(rates, {'USDT': None, 'USDC': None, 'DAI': '0.55%'})
+        self.assertEqual(mock_playwright.chromium.launch.call_count, 2)
+
+        # A browser that disconnected between calls is replaced before use
+        mock_browser.is_connected.return_value = False
+        mock_page.goto.side_effect = None
+        scraper.get_apy_rates()
+        self.assertEqual(mock_playwright.chromium.launch.call_count, 3)
+
+if __name__ == '__main__':
+    unittest.main()
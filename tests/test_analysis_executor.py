@@ -0,0 +1,128 @@
+import os
+import sys
+import tempfile
+import time
+import unittest
+from concurrent.futures.process import BrokenProcessPool
+from unittest.mock import MagicMock, patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import metrics
+from src.analysis_executor import AnalysisExecutor, analyze_text_file, filing_size_hint
+from src.keyword_analyzer import KeywordAnalyzer
+
+
+def make_chunks(text: str, size: int = 1000):
+    return iter([text[i:i + size] for i in range(0, len(text), size)])
+
+
+class TestAnalysisExecutor(unittest.TestCase):
+
+    def setUp(self):
+        self.spool_dir = tempfile.TemporaryDirectory()
+        self.analyzer = KeywordAnalyzer()
+        self.text = "Filler line without keywords.\n" * 2000 + "We hold Bitcoin in treasury.\n" + "More filler.\n" * 100
+
+    def tearDown(self):
+        self.spool_dir.cleanup()
+
+    def test_filing_size_hint(self):
+        """
+        Test that the size stated in a feed summary is parsed.
+        """
+        summary = " <b>Filed:</b> 2025-07-14 <b>AccNo:</b> 0001234567-25-000001 <b>Size:</b> 12 MB"
+        self.assertEqual(filing_size_hint({"summary": summary}), 12 * 1024 * 1024)
+        self.assertEqual(filing_size_hint({"summary": "Size: 300 KB"}), 300 * 1024)
+        self.assertIsNone(filing_size_hint({"summary": "no size"}))
+        self.assertIsNone(filing_size_hint({}))
+
+    def test_small_filings_are_analyzed_inline(self):
+        """
+        Test that filings below the threshold or of unknown size stay inline.
+        """
+        executor = AnalysisExecutor(self.analyzer, processes=1, size_threshold=10 ** 9, spool_dir=self.spool_dir.name)
+        expected = self.analyzer.analyze_filing(self.text)
+        self.assertEqual(executor.analyze_stream(make_chunks(self.text), size_hint=1000), expected)
+        self.assertEqual(executor.analyze_stream(make_chunks(self.text)), expected)
+        self.assertEqual(executor.get_stats()["inline"], 2)
+        self.assertIsNone(executor._pool)
+
+    def test_large_filings_are_offloaded(self):
+        """
+        Test that a large filing is analyzed by a pool process through a spooled
+        file, with the same result as inline and no file left behind.
+        """
+        executor = AnalysisExecutor(self.analyzer, processes=1, size_threshold=1000, spool_dir=self.spool_dir.name)
+        try:
+            count = metrics.ANALYSIS_SECONDS.get_count()
+            result = executor.analyze_stream(make_chunks(self.text), size_hint=len(self.text))
+        finally:
+            executor.close()
+        self.assertEqual(metrics.ANALYSIS_SECONDS.get_count(), count + 1)
+        self.assertEqual(result, self.analyzer.analyze_filing(self.text))
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+        stats = executor.get_stats()
+        self.assertEqual((stats["offloaded"], stats["inline"], stats["queue_depth"]), (1, 0, 0))
+
+    def test_offloaded_analysis_stops_download_early(self):
+        """
+        Test that the pool process scans the spool file while it is written and
+        that the download is closed once enough lines matched.
+        """
+        state = {"sent": 0, "closed": False}
+
+        def download():
+            try:
+                yield "Bitcoin\n" * 5
+                for _ in range(1000):
+                    state["sent"] += 1
+                    time.sleep(0.01)
+                    yield "Filler line without keywords.\n" * 10
+            finally:
+                state["closed"] = True
+
+        executor = AnalysisExecutor(self.analyzer, processes=1, size_threshold=1000, spool_dir=self.spool_dir.name)
+        try:
+            result = executor.analyze_stream(download(), size_hint=10 ** 6)
+        finally:
+            executor.close()
+        self.assertTrue(result["crypto_detected"])
+        self.assertTrue(state["closed"])
+        self.assertLess(state["sent"], 1000)
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+
+    def test_broken_pool_falls_back_inline(self):
+        """
+        Test that a filing is analyzed inline when the pool is broken, and counted.
+        """
+        executor = AnalysisExecutor(self.analyzer, processes=1, size_threshold=1000, spool_dir=self.spool_dir.name)
+        pool = MagicMock()
+        pool.submit.side_effect = BrokenProcessPool("worker died")
+        expected = self.analyzer.analyze_filing(self.text)
+        count = metrics.ANALYSIS_SECONDS.get_count()
+        with patch.object(executor, "_get_pool", return_value=pool), self.assertLogs(level="ERROR"):
+            result = executor.analyze_stream(make_chunks(self.text), size_hint=len(self.text))
+        self.assertEqual(result, expected)
+        self.assertEqual(metrics.ANALYSIS_SECONDS.get_count(), count + 1)
+        self.assertEqual(os.listdir(self.spool_dir.name), [])
+        stats = executor.get_stats()
+        self.assertEqual((stats["offloaded"], stats["inline"], stats["pool_failures"]), (0, 1, 1))
+        self.assertIsNone(executor._pool)
+
+    def test_analyze_text_file_stops_early(self):
+        """
+        Test that a file scan stops after max_snippets matching lines.
+        """
+        path = os.path.join(self.spool_dir.name, "filing.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("Bitcoin\n" * 10 + "Ethereum\n")
+        result, seconds = analyze_text_file(path, self.analyzer, max_snippets=3)
+        self.assertTrue(result["crypto_detected"])
+        self.assertNotIn("Ethereum", result["summary"])
+        self.assertGreaterEqual(seconds, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
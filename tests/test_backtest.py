@@ -0,0 +1,109 @@
+import gzip
+import json
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import backtest
+from src.keyword_analyzer import KeywordAnalyzer
+
+FILINGS = {
+    "0000000001-25-000001.txt": "We hold Bitcoin in treasury.\nNothing else.\n",
+    "0000000001-25-000002.txt": "Our new product line ships in SOL-gel packaging.\n",
+    "0000000001-25-000003.txt": "Quarterly results were in line with guidance.\n",
+}
+
+
+class TestBacktest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = os.path.join(self.tmp.name, "filings")
+        os.makedirs(os.path.join(self.directory, "nested"))
+        for name, text in FILINGS.items():
+            with open(os.path.join(self.directory, name), "w", encoding="utf-8") as f:
+                f.write(text)
+        with open(os.path.join(self.directory, "nested", "0000000001-25-000004.txt.gz"), "wb") as f:
+            f.write(gzip.compress(b"A stablecoin pilot.\n"))
+        self.labels = os.path.join(self.tmp.name, "labels.csv")
+        with open(self.labels, "w", encoding="utf-8") as f:
+            f.write("accession,label\n0000000001-25-000001,1\n0000000001-25-000002,0\n0000000001-25-000003,0\n")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_keywords_override(self):
+        """
+        Test that KeywordAnalyzer uses an overridden keyword list.
+        """
+        analyzer = KeywordAnalyzer(keywords=["treasury"])
+        self.assertTrue(analyzer.analyze_filing("We hold Bitcoin in treasury.")["crypto_detected"])
+        self.assertFalse(analyzer.analyze_filing("We hold Bitcoin.")["crypto_detected"])
+
+    def test_build_keywords(self):
+        """
+        Test adding and removing keywords from the default list.
+        """
+        keywords = backtest.build_keywords(add=["Memecoin"], remove=["sol", "Bitcoin"])
+        self.assertIn("Memecoin", keywords)
+        self.assertNotIn("SOL", keywords)
+        self.assertNotIn("Bitcoin", keywords)
+        self.assertIn("Ethereum", keywords)
+
+    def test_process_pool_matches_serial_run(self):
+        """
+        Test that the process pool returns the same per-filing results, in order,
+        as analyzing in this process.
+        """
+        paths = backtest.find_filings(self.directory)
+        keywords = backtest.build_keywords()
+        strip = lambda results: [{k: v for k, v in r.items() if k != "seconds"} for r in results]
+
+        serial = list(backtest.run_backtest(paths, keywords, workers=1))
+        parallel = list(backtest.run_backtest(paths, keywords, workers=2))
+
+        self.assertEqual(strip(parallel), strip(serial))
+        self.assertEqual(
+            [(r["accession"], r["crypto_detected"]) for r in serial],
+            [
+                ("0000000001-25-000001", True),
+                ("0000000001-25-000002", True),
+                ("0000000001-25-000003", False),
+                ("0000000001-25-000004", True),
+            ],
+        )
+        self.assertEqual(serial[1]["keywords"], ["SOL"])
+        self.assertEqual(serial[1]["keyword_counts"], {"SOL": 1})
+
+    def test_main_writes_results_and_label_stats(self):
+        """
+        Test the command line: per-filing JSONL output and labeled statistics.
+        """
+        output = os.path.join(self.tmp.name, "results.jsonl")
+        with patch("sys.stdout") as stdout:
+            code = backtest.main(
+                [self.directory, "--labels", self.labels, "--output", output, "--workers", "1"]
+            )
+        self.assertEqual(code, 0)
+        with open(output, encoding="utf-8") as f:
+            self.assertEqual(len([json.loads(line) for line in f]), 4)
+
+        printed = "".join(call.args[0] for call in stdout.write.call_args_list)
+        summary = json.loads(printed)
+        self.assertEqual(summary["filings"], 4)
+        self.assertEqual(summary["alerts"], 3)
+        self.assertEqual(summary["true_positives"], 1)
+        self.assertEqual(summary["false_positives"], 1)
+        self.assertEqual(summary["true_negatives"], 1)
+        self.assertEqual(summary["precision"], 0.5)
+        self.assertEqual(summary["keyword_filings"]["SOL"], 1)
+        self.assertGreater(summary["mb_per_second"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
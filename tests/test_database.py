@@ -1,5 +1,8 @@
 import os
+import sqlite3
 import sys
+import tempfile
+import time
 import unittest
 
 # Add the project root to the Python path
@@ -38,6 +41,160 @@ class TestDatabase(unittest.TestCase):
         self.db.add_filing("test_id_2")
         self.assertTrue(self.db.filing_exists("test_id_2"))
 
+    def test_add_filings(self):
+        """
+        Test that add_filings inserts a batch and ignores IDs already present.
+        """
+        self.db.add_filing("test_id_3")
+        added = self.db.add_filings(["test_id_3", "test_id_4", "test_id_5"])
+
+        self.assertEqual(added, 2)
+        self.assertTrue(self.db.filing_exists("test_id_4"))
+        self.assertTrue(self.db.filing_exists("test_id_5"))
+
+    def test_filter_unprocessed(self):
+        """
+        Test that filter_unprocessed returns unknown IDs once, in order, including
+        batches larger than one query can hold.
+        """
+        self.db.add_filings(["a", "c"])
+        self.assertEqual(self.db.filter_unprocessed(["a", "b", "c", "d", "b"]), ["b", "d"])
+
+        ids = [f"id_{i}" for i in range(1200)]
+        self.db.add_filings(ids[::2])
+        self.assertEqual(self.db.filter_unprocessed(ids), ids[1::2])
+
+    def test_cache_answers_known_filings_without_queries(self):
+        """
+        Test that processed filings are answered from memory, while unknown
+        filings still go to SQLite and are never reported as processed.
+        """
+        self.db.add_filings(["cached_1", "cached_2"])
+        statements = []
+        self.db.conn.set_trace_callback(statements.append)
+
+        self.assertTrue(self.db.filing_exists("cached_1"))
+        self.assertEqual(self.db.filter_unprocessed(["cached_1", "cached_2"]), [])
+        self.assertEqual(statements, [])
+
+        self.assertFalse(self.db.filing_exists("new_1"))
+        self.assertEqual(self.db.filter_unprocessed(["cached_2", "new_2"]), ["new_2"])
+        self.assertEqual(len(statements), 2)
+        self.assertEqual(self.db.cache_hits, 4)
+        self.assertEqual(self.db.cache_misses, 2)
+
+    def test_cache_is_bounded(self):
+        """
+        Test that the cache evicts the least recently used IDs beyond cache_size,
+        and that evicted IDs are still found in SQLite.
+        """
+        db = Database(db_path=":memory:", cache_size=3)
+        db.add_filings(["a", "b", "c"])
+        db.filing_exists("a")  # "b" is now the least recently used
+        db.add_filing("d")
+
+        self.assertEqual(list(db._processed_cache), ["c", "a", "d"])
+        self.assertTrue(db.filing_exists("b"))
+        db.close()
+
+
+class TestDatabaseFile(unittest.TestCase):
+
+    def test_cache_warmed_from_table(self):
+        """
+        Test that the cache is loaded with the most recently added IDs on startup.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "filings.db")
+            db = Database(db_path=db_path)
+            db.add_filings(f"id_{i}" for i in range(10))
+            db.close()
+
+            db = Database(db_path=db_path, cache_size=4)
+            try:
+                self.assertEqual(list(db._processed_cache), ["id_6", "id_7", "id_8", "id_9"])
+            finally:
+                db.close()
+
+    def test_wal_mode(self):
+        """
+        Test that an on-disk database runs in WAL mode with synchronous=NORMAL.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(db_path=os.path.join(tmp_dir, "filings.db"))
+            try:
+                journal_mode = db.conn.execute("PRAGMA journal_mode").fetchone()[0]
+                synchronous = db.conn.execute("PRAGMA synchronous").fetchone()[0]
+                self.assertEqual(journal_mode, "wal")
+                self.assertEqual(synchronous, 1)  # NORMAL
+            finally:
+                db.close()
+
+    def test_migrates_legacy_schema(self):
+        """
+        Test that an id-only database from before migrations is upgraded in place:
+        columns added, existing rows timestamped, index created, auto-vacuum on.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_path = os.path.join(tmp_dir, "legacy.db")
+            conn = sqlite3.connect(db_path)
+            conn.execute("CREATE TABLE processed_filings (id TEXT PRIMARY KEY)")
+            conn.executemany("INSERT INTO processed_filings (id) VALUES (?)", [("old_1",), ("old_2",)])
+            conn.commit()
+            conn.close()
+
+            db = Database(db_path=db_path)
+            try:
+                self.assertEqual(db.conn.execute("PRAGMA user_version").fetchone()[0], 1)
+                self.assertEqual(db.conn.execute("PRAGMA auto_vacuum").fetchone()[0], 2)
+                rows = db.conn.execute(
+                    "SELECT id, processed_at, crypto_detected FROM processed_filings ORDER BY id"
+                ).fetchall()
+                self.assertEqual([row[0] for row in rows], ["old_1", "old_2"])
+                for _, processed_at, crypto_detected in rows:
+                    self.assertAlmostEqual(processed_at, time.time(), delta=60)
+                    self.assertIsNone(crypto_detected)
+                indexes = [row[1] for row in db.conn.execute("PRAGMA index_list(processed_filings)")]
+                self.assertIn("idx_processed_filings_processed_at", indexes)
+                self.assertTrue(db.filing_exists("old_1"))
+            finally:
+                db.close()
+
+            # Reopening applies nothing twice.
+            db = Database(db_path=db_path)
+            self.assertEqual(db.conn.execute("PRAGMA user_version").fetchone()[0], 1)
+            db.close()
+
+    def test_compact(self):
+        """
+        Test that compact deletes filings past retention, keeps recent ones and
+        returns the freed pages to the file system.
+        """
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db = Database(db_path=os.path.join(tmp_dir, "filings.db"), cache_size=0)
+            try:
+                db.add_filings((f"old_{i:05d}" for i in range(5000)), crypto_detected=False)
+                db.add_filing("recent", crypto_detected=True)
+                with db.conn:
+                    db.conn.execute(
+                        "UPDATE processed_filings SET processed_at = ? WHERE id LIKE 'old_%'",
+                        (int(time.time()) - 100 * 86400,),
+                    )
+                pages_before = db.conn.execute("PRAGMA page_count").fetchone()[0]
+
+                deleted = db.compact(retention_days=90)
+
+                self.assertEqual(deleted, 5000)
+                self.assertFalse(db.filing_exists("old_00001"))
+                self.assertTrue(db.filing_exists("recent"))
+                self.assertEqual(
+                    db.conn.execute("SELECT crypto_detected FROM processed_filings").fetchall(), [(1,)]
+                )
+                self.assertEqual(db.conn.execute("PRAGMA freelist_count").fetchone()[0], 0)
+                self.assertLess(db.conn.execute("PRAGMA page_count").fetchone()[0], pages_before)
+            finally:
+                db.close()
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,117 @@
+import os
+import sys
+import tempfile
+import unittest
+from datetime import date
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.edgar_index import (
+    BackfillCheckpoint, form_selected, index_urls, parse_master_index, read_filing_batches, spool_filings,
+)
+
+ARCHIVES_URL = "https://www.sec.gov/Archives"
+
+# Recorded from daily-index/2025/QTR1/master.20250102.idx, trimmed to a few rows
+MASTER_INDEX = """Description:           Daily Index of EDGAR Dissemination Feed by Company Name
+Last Data Received:    January 2, 2025
+Comments:              webmaster@sec.gov
+Anonymous FTP:         ftp://ftp.sec.gov/edgar/
+
+
+
+
+CIK|Company Name|Form Type|Date Filed|File Name
+--------------------------------------------------------------------------------
+1000045|NICHOLAS FINANCIAL INC|8-K|20250102|edgar/data/1000045/0000950170-25-000101.txt
+1000209|MEDALLION FINANCIAL CORP|8-K/A|20250102|edgar/data/1000209/0001000209-25-000002.txt
+1000228|HENRY SCHEIN INC|4|20250102|edgar/data/1000228/0001209191-25-000311.txt
+1000694|NOVAVAX INC|10-K|20250102|edgar/data/1000694/0001000694-25-000004.txt
+"""
+
+
+class TestEdgarIndex(unittest.TestCase):
+
+    def test_parse_master_index(self):
+        """
+        Test that entries are read after the header, with their accession numbers
+        and feed-shaped filing entries.
+        """
+        entries = list(parse_master_index(MASTER_INDEX.splitlines() + ["garbage|line"]))
+
+        self.assertEqual([e.form_type for e in entries], ["8-K", "8-K/A", "4", "10-K"])
+        self.assertEqual(entries[0].date_filed, date(2025, 1, 2))
+        self.assertEqual(entries[0].accession, "0000950170-25-000101")
+        filing = entries[0].to_filing(ARCHIVES_URL)
+        self.assertEqual(
+            filing["link"],
+            "https://www.sec.gov/Archives/edgar/data/1000045/000095017025000101/0000950170-25-000101-index.htm",
+        )
+        self.assertEqual(filing["title"], "8-K - NICHOLAS FINANCIAL INC (1000045)")
+
+    def test_spooled_filings_are_read_in_batches(self):
+        """
+        Test that spooled filings come back unchanged, batch_size at a time.
+        """
+        entries = list(parse_master_index(MASTER_INDEX.splitlines()))
+        with tempfile.TemporaryFile("w+", encoding="utf-8") as spool:
+            self.assertEqual(spool_filings(entries, ARCHIVES_URL, spool), 4)
+            spool.seek(0)
+            batches = list(read_filing_batches(spool, 3))
+        self.assertEqual([len(batch) for batch in batches], [3, 1])
+        self.assertEqual(batches[0] + batches[1], [entry.to_filing(ARCHIVES_URL) for entry in entries])
+
+    def test_form_selected(self):
+        """
+        Test that a form type also selects its amendments, and None selects all.
+        """
+        self.assertTrue(form_selected("8-K/A", ["8-k"]))
+        self.assertFalse(form_selected("8-K12B", ["8-K"]))
+        self.assertTrue(form_selected("4", None))
+
+    def test_index_urls(self):
+        """
+        Test the quarterly files spanning a range and the daily files of its weekdays.
+        """
+        self.assertEqual(
+            index_urls(ARCHIVES_URL, date(2024, 11, 20), date(2025, 2, 1)),
+            [
+                f"{ARCHIVES_URL}/edgar/full-index/2024/QTR4/master.gz",
+                f"{ARCHIVES_URL}/edgar/full-index/2025/QTR1/master.gz",
+            ],
+        )
+        self.assertEqual(
+            index_urls(ARCHIVES_URL, date(2025, 3, 28), date(2025, 3, 31), "daily"),
+            [
+                f"{ARCHIVES_URL}/edgar/daily-index/2025/QTR1/master.20250328.idx",
+                f"{ARCHIVES_URL}/edgar/daily-index/2025/QTR1/master.20250331.idx",
+            ],
+        )
+        with self.assertRaises(ValueError):
+            index_urls(ARCHIVES_URL, date(2025, 1, 1), date(2025, 1, 2), "hourly")
+
+    def test_checkpoint_resumes_only_same_parameters(self):
+        """
+        Test that completed index files survive a reload with the same parameters
+        and are forgotten for different ones.
+        """
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "checkpoint.json")
+            checkpoint = BackfillCheckpoint(path, {"start": "2025-01-02", "forms": ["8-K"]})
+            checkpoint.stats["filings"] = 3
+            checkpoint.mark_completed("https://example.com/a")
+
+            resumed = BackfillCheckpoint(path, {"start": "2025-01-02", "forms": ["8-K"]})
+            self.assertTrue(resumed.is_completed("https://example.com/a"))
+            self.assertEqual(resumed.stats["filings"], 3)
+            self.assertFalse(BackfillCheckpoint(path, {"start": "2025-01-03", "forms": ["8-K"]}).completed)
+
+            with open(path, "w") as f:
+                f.write("{torn")
+            self.assertEqual(BackfillCheckpoint(path, {}).completed, [])
+            self.assertEqual(os.listdir(directory), ["checkpoint.json"])
+
+
+if __name__ == "__main__":
+    unittest.main()
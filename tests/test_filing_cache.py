@@ -0,0 +1,120 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.filing_cache import GZIP_SUFFIX, FilingCache
+
+
+class TestFilingCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.directory = self.tmp.name
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_put_and_get(self):
+        """
+        Test that a stored filing is read back and counted as a hit, and that an
+        unknown accession number is a miss.
+        """
+        cache = FilingCache(self.directory)
+        text = "<SEC-DOCUMENT>Café bitcoin\n" * 100
+        cache.put("0001234567-25-000001", text)
+
+        self.assertEqual(cache.get("0001234567-25-000001"), text)
+        self.assertIsNone(cache.get("0001234567-25-000002"))
+        self.assertEqual("".join(cache.iter_chunks("0001234567-25-000001", 7)), text)
+
+        stats = cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"], stats["stores"]), (2, 1, 1))
+        self.assertLess(stats["bytes"], len(text))  # Stored compressed
+
+    def test_reads_gzip_entries(self):
+        """
+        Test that gzip entries are read whatever format new entries are written in.
+        """
+        with open(os.path.join(self.directory, "0001234567-25-000001" + GZIP_SUFFIX), "wb") as f:
+            f.write(gzip.compress("legacy entry".encode("utf-8")))
+
+        cache = FilingCache(self.directory)
+
+        self.assertEqual(cache.get("0001234567-25-000001"), "legacy entry")
+        self.assertGreater(cache.get_stats()["bytes"], 0)
+
+    def test_iter_chunks_drops_corrupt_entry(self):
+        """
+        Test that an entry found truncated while streaming raises and is dropped.
+        """
+        data = gzip.compress(os.urandom(100000).hex().encode("utf-8"))
+        with open(os.path.join(self.directory, "0001234567-25-000001" + GZIP_SUFFIX), "wb") as f:
+            f.write(data[:len(data) // 2])
+        cache = FilingCache(self.directory)
+
+        chunks = cache.iter_chunks("0001234567-25-000001", 4096)
+        with self.assertLogs(level="WARNING"), self.assertRaises(EOFError):
+            for _ in chunks:
+                pass
+
+        self.assertEqual(os.listdir(self.directory), [])
+        self.assertEqual(cache.get_stats()["bytes"], 0)
+
+    def test_evicts_least_recently_used(self):
+        """
+        Test that the least recently used filings are evicted once the cap is exceeded.
+        """
+        cache = FilingCache(self.directory)
+        for index in range(3):
+            cache.put(f"a-{index}", os.urandom(2000).hex())
+            path = cache._path(f"a-{index}", cache.suffix)
+            os.utime(path, (1000 + index, 1000 + index))
+        os.utime(cache._path("a-0", cache.suffix), (2000, 2000))  # a-0 used last
+        # Room for less than one more entry (each is about 2 KB compressed)
+        cache.max_bytes = cache.get_stats()["bytes"] + 500
+
+        cache.put("a-3", os.urandom(2000).hex())
+
+        self.assertIsNotNone(cache.get("a-0"))
+        self.assertIsNone(cache.get("a-1"))
+        self.assertIsNotNone(cache.get("a-3"))
+        self.assertEqual(cache.get_stats()["evictions"], 1)
+        self.assertLessEqual(cache.get_stats()["bytes"], cache.max_bytes)
+
+    def test_aborted_writer_leaves_no_entry(self):
+        """
+        Test that a filing whose writer is aborted is not cached and leaves no
+        temporary file behind.
+        """
+        cache = FilingCache(self.directory)
+        writer = cache.open_writer("0001234567-25-000001")
+        writer.write("partial")
+        writer.abort()
+
+        self.assertIsNone(cache.get("0001234567-25-000001"))
+        self.assertEqual(os.listdir(self.directory), [])
+
+    def test_stale_temporary_files_are_removed(self):
+        """
+        Test that a new cache deletes temporary files of writers that died long
+        ago and keeps those that may still be written.
+        """
+        live = FilingCache(self.directory).open_writer("0001234567-25-000002")
+        stale = os.path.join(self.directory, ".0001234567-25-000001.x1y2z3.tmp")
+        with open(stale, "wb") as f:
+            f.write(b"partial")
+        os.utime(stale, (0, 0))
+
+        FilingCache(self.directory)
+
+        self.assertEqual(os.listdir(self.directory), [os.path.basename(live._temp_path)])
+        live.abort()
+
+
+if __name__ == "__main__":
+    unittest.main()
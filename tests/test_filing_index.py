@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.filing_index import parse_filing_index, select_documents
+
+INDEX_URL = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+
+INDEX_PAGE = """<html><body>
+<div id="formName"><strong>Form 8-K</strong> - Current report:</div>
+<table class="tableFile" summary="Document Format Files">
+<tr><th scope="col">Seq</th><th scope="col">Description</th><th scope="col">Document</th>
+<th scope="col">Type</th><th scope="col">Size</th></tr>
+<tr><td scope="row">1</td><td scope="row">8-K</td>
+<td scope="row"><a href="/ix?doc=/Archives/edgar/data/1234567/000123456725000001/exco-8k.htm">exco-8k.htm</a>
+ &nbsp;&nbsp;<span>iXBRL</span></td><td scope="row">8-K</td><td scope="row">45210</td></tr>
+<tr class="evenRow"><td scope="row">2</td><td scope="row">PRESS RELEASE</td>
+<td scope="row"><a href="/Archives/edgar/data/1234567/000123456725000001/ex99-1.htm">ex99-1.htm</a></td>
+<td scope="row">EX-99.1</td><td scope="row">12034</td></tr>
+<tr><td scope="row">3</td><td scope="row">MATERIAL CONTRACT</td>
+<td scope="row"><a href="/Archives/edgar/data/1234567/000123456725000001/ex10-1.htm">ex10-1.htm</a></td>
+<td scope="row">EX-10.1</td><td scope="row">981233</td></tr>
+<tr class="evenRow"><td scope="row">4</td><td scope="row">GRAPHIC</td>
+<td scope="row"><a href="/Archives/edgar/data/1234567/000123456725000001/logo.jpg">logo.jpg</a></td>
+<td scope="row">GRAPHIC</td><td scope="row">5120</td></tr>
+<tr><td scope="row">&nbsp;</td><td scope="row">Complete submission text file</td>
+<td scope="row"><a href="/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001.txt">0001234567-25-000001.txt</a></td>
+<td scope="row">&nbsp;</td><td scope="row">1324200</td></tr>
+</table>
+<table class="tableFile" summary="Data Files">
+<tr><td scope="row">5</td><td scope="row">XBRL SCHEMA FILE</td>
+<td scope="row"><a href="/Archives/edgar/data/1234567/000123456725000001/exco-20250714.xsd">exco-20250714.xsd</a></td>
+<td scope="row">EX-101.SCH</td><td scope="row">3012</td></tr>
+</table>
+</body></html>"""
+
+
+class TestFilingIndex(unittest.TestCase):
+
+    def test_parse_filing_index(self):
+        """
+        Test that the document table is read with absolute links, unwrapping inline
+        XBRL viewer links and leaving out the data files and the submission file.
+        """
+        documents = parse_filing_index(INDEX_PAGE, INDEX_URL)
+
+        self.assertEqual([d.type for d in documents], ["8-K", "EX-99.1", "EX-10.1", "GRAPHIC"])
+        self.assertEqual(
+            documents[0].url, "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/exco-8k.htm"
+        )
+        self.assertEqual(documents[0].filename, "exco-8k.htm")
+        self.assertEqual(documents[1].description, "PRESS RELEASE")
+        self.assertEqual(documents[2].size, 981233)
+        self.assertEqual(parse_filing_index("<html><body>Not found</body></html>", INDEX_URL), [])
+
+    def test_select_documents(self):
+        """
+        Test that the primary document and the requested exhibit types are kept.
+        """
+        documents = parse_filing_index(INDEX_PAGE, INDEX_URL)
+
+        self.assertEqual([d.type for d in select_documents(documents)], ["8-K", "EX-99.1"])
+        self.assertEqual([d.type for d in select_documents(documents, ["EX-10"])], ["8-K", "EX-10.1"])
+        self.assertEqual([d.type for d in select_documents(documents, [])], ["8-K"])
+        self.assertEqual(select_documents([]), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,166 @@
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.job_queue import JobQueue, SqliteJobQueue
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestSqliteJobQueue(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "jobs.db")
+        self.clock = FakeClock()
+        self.queue = SqliteJobQueue(self.path, max_attempts=3, retry_delay=10, clock=self.clock)
+
+    def tearDown(self):
+        self.queue.close()
+        self.tmp_dir.cleanup()
+
+    def test_enqueue_ignores_known_accessions(self):
+        """
+        Test that an accession number is only queued once.
+        """
+        self.assertEqual(self.queue.enqueue([("a", {"link": "x"}), ("b", {})]), 2)
+        self.assertEqual(self.queue.enqueue([("a", {}), ("c", {})]), 1)
+        self.assertTrue(self.queue.contains("a"))
+        self.assertFalse(self.queue.contains("d"))
+        self.assertEqual(self.queue.filter_known(["d", "c", "a", "c"]), {"a", "c"})
+        self.assertEqual(self.queue.filter_known([]), set())
+        self.assertEqual(self.queue.get_stats()["pending"], 3)
+
+    def test_lease_is_exclusive_across_connections(self):
+        """
+        Test that a leased job is not handed to another worker, even through
+        another connection to the same file.
+        """
+        other = SqliteJobQueue(self.path, clock=self.clock)
+        self.queue.enqueue([("a", {"link": "x"})])
+        job = self.queue.lease("w1", 60)
+        self.assertEqual((job.accession, job.payload, job.attempts), ("a", {"link": "x"}, 1))
+        self.assertIsNone(other.lease("w2", 60))
+        self.assertTrue(self.queue.complete(job))
+        self.assertEqual(self.queue.get_stats()["done"], 1)
+        other.close()
+
+    def test_expired_lease_is_taken_over(self):
+        """
+        Test that a job becomes available again when its lease expires, and that
+        the worker which lost the lease can no longer settle it.
+        """
+        self.queue.enqueue([("a", {})])
+        first = self.queue.lease("w1", 60)
+        self.clock.now += 30
+        self.assertTrue(self.queue.extend(first, 60))
+        self.clock.now += 59
+        self.assertIsNone(self.queue.lease("w2", 60))
+        self.clock.now += 2
+        second = self.queue.lease("w2", 60)
+        self.assertEqual(second.attempts, 2)
+        self.assertFalse(self.queue.complete(first))
+        self.assertFalse(self.queue.fail(first, "late"))
+        self.assertTrue(self.queue.complete(second))
+
+    def test_failed_job_is_retried_with_backoff(self):
+        """
+        Test that failures are retried after a doubling delay and the job is
+        marked failed once it is out of attempts.
+        """
+        self.queue.enqueue([("a", {})])
+        job = self.queue.lease("w1", 60)
+        self.assertTrue(self.queue.fail(job, "HTTP 503"))
+        self.clock.now += 9
+        self.assertIsNone(self.queue.lease("w1", 60))
+        self.clock.now += 1
+        job = self.queue.lease("w1", 60)
+        self.assertEqual(job.attempts, 2)
+        self.queue.fail(job, "HTTP 503")
+        self.clock.now += 19
+        self.assertIsNone(self.queue.lease("w1", 60))
+        self.clock.now += 1
+        job = self.queue.lease("w1", 60)
+        self.queue.fail(job, "HTTP 503")
+        self.clock.now += 3600
+        self.assertIsNone(self.queue.lease("w1", 60))
+        self.assertEqual(self.queue.get_stats()["failed"], 1)
+
+    def test_expired_lease_out_of_attempts_fails(self):
+        """
+        Test that a job whose worker keeps dying is not leased forever.
+        """
+        self.queue.enqueue([("a", {})])
+        for _ in range(3):
+            self.assertIsNotNone(self.queue.lease("w1", 60))
+            self.clock.now += 61
+        self.assertIsNone(self.queue.lease("w1", 60))
+        self.assertEqual(self.queue.get_stats()["failed"], 1)
+
+    def test_claim_alert_only_once(self):
+        """
+        Test that only the first claim of a filing's alert succeeds.
+        """
+        other = SqliteJobQueue(self.path, clock=self.clock)
+        self.assertTrue(self.queue.claim_alert("a"))
+        self.assertFalse(other.claim_alert("a"))
+        self.assertFalse(self.queue.claim_alert("a"))
+        self.assertTrue(self.queue.claim_alert("b"))
+        other.close()
+
+    def test_unconfirmed_alert_claim_is_taken_over(self):
+        """
+        Test that an unconfirmed claim can be taken over after the claim timeout
+        or once released, but a confirmed one never.
+        """
+        self.assertTrue(self.queue.claim_alert("a", 60))
+        self.assertFalse(self.queue.claim_alert("a", 60))
+        self.clock.now += 61
+        with self.assertLogs(level="WARNING"):
+            self.assertTrue(self.queue.claim_alert("a", 60))
+
+        self.queue.release_alert("a")
+        self.assertTrue(self.queue.claim_alert("a", 60))
+        self.queue.confirm_alert("a")
+        self.assertTrue(self.queue.alert_delivered("a"))
+        self.clock.now += 1000
+        self.queue.release_alert("a")
+        self.assertFalse(self.queue.claim_alert("a", 60))
+
+    def test_incomplete_backend_cannot_be_created(self):
+        """
+        Test that a JobQueue missing part of the interface fails on creation.
+        """
+        class PartialQueue(JobQueue):
+            def enqueue(self, jobs):
+                return 0
+
+        with self.assertRaises(TypeError):
+            PartialQueue()
+
+    def test_purge_removes_old_finished_jobs(self):
+        """
+        Test that purge deletes finished jobs past the age but keeps the rest.
+        """
+        self.queue.enqueue([("a", {}), ("b", {})])
+        self.queue.complete(self.queue.lease("w1", 60))
+        self.queue.claim_alert("a")
+        self.clock.now += 100
+        self.assertEqual(self.queue.purge(50), 1)
+        self.assertFalse(self.queue.contains("a"))
+        self.assertTrue(self.queue.contains("b"))
+        self.assertTrue(self.queue.claim_alert("a"))
+
+
+if __name__ == "__main__":
+    unittest.main()
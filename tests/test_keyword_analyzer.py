@@ -1,11 +1,17 @@
+import pickle
+import random
+import re
+import tempfile
+import tracemalloc
 import unittest
 import sys
 import os
+from unittest.mock import patch
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.keyword_analyzer import KeywordAnalyzer
+from src.keyword_analyzer import IncrementalAnalysis, KeywordAnalyzer
 
 class TestKeywordAnalyzer(unittest.TestCase):
 
@@ -78,5 +84,236 @@ class TestKeywordAnalyzer(unittest.TestCase):
         self.assertNotIn("<i>", result['summary'])
         self.assertIn("This is a blockchain related sentence with multiple tags.", result['summary'])
 
+    def test_analyze_filing_cleans_html_documents(self):
+        """
+        Test that HTML documents are converted to text before matching: hidden
+        inline XBRL facts and attributes do not match, entities are decoded and
+        tags spanning lines do not reach the snippet, whole or streamed.
+        """
+        submission = (
+            "<SEC-DOCUMENT>\n<DOCUMENT>\n<TYPE>8-K\n<TEXT>\n<html><body>\n"
+            "<ix:header><ix:hidden>Solana</ix:hidden></ix:header>\n"
+            '<p class="Ethereum">Nothing here.</p>\n'
+            "<p>The company&#8217;s <span\n style=\"x\">Bitcoin</span> &amp; cash.</p>\n"
+            "</body></html>\n</TEXT>\n</DOCUMENT>\n</SEC-DOCUMENT>\n"
+        )
+        chunks = submission.splitlines(keepends=True)
+
+        for result in (self.analyzer.analyze_filing(submission), self.analyzer.analyze_stream(chunks)):
+            self.assertTrue(result['crypto_detected'])
+            self.assertNotIn("Solana", result['summary'])
+            self.assertNotIn("Ethereum", result['summary'])
+            self.assertIn("Bitcoin & cash.", result['summary'])
+            self.assertNotIn("<", result['summary'])
+
+    def test_analyze_filing_matches_per_keyword_loop(self):
+        """
+        Test that the single-pass matcher finds the same lines and keywords as running
+        one word-boundary regex per keyword on every line.
+        """
+        rng = random.Random(42)
+        words = ['solder', 'Dotted', 'ADA', 'sol', 'Curve DAO Token', 'curve', 'NFTs', 'café',
+                 'BTC-denominated', 'token', 'tokens', 'Ether', 'eth', 'digital  assets', 'Kelvin']
+        breaks = ['\n', '\r\n', '\r', '\x0c', '\u2028']
+        text = ''.join(
+            ' '.join(rng.choices(words, k=rng.randint(0, 6))) + rng.choice(breaks)
+            for _ in range(500)
+        )
+        for sample in (text, text.encode('ascii', 'ignore').decode('ascii')):
+            expected = []
+            for line in sample.splitlines():
+                for keyword in KeywordAnalyzer.CRYPTO_KEYWORDS:
+                    if re.search(r'\b' + re.escape(keyword) + r'\b', line, re.IGNORECASE):
+                        expected.append((keyword, line))
+                        break
+
+            self.assertEqual(list(self.analyzer._iter_keyword_lines(sample, [(0, len(sample))])), expected)
+
+    def test_analyze_filing_reports_first_keyword_in_list_order(self):
+        """
+        Test that a line with several keywords reports the earliest one in CRYPTO_KEYWORDS.
+        """
+        result = self.analyzer.analyze_filing("Our Ethereum holdings now exceed our crypto holdings.")
+
+        self.assertTrue(result['crypto_detected'])
+        self.assertTrue(result['summary'].startswith("Crypto keywords detected: crypto."))
+
+    def test_analyze_stream_matches_analyze_filing(self):
+        """
+        Test that streaming a filing in small chunks, with keywords and line breaks
+        split across chunk boundaries, gives the same result as analyzing it whole.
+        """
+        sample_text = "Intro line.\r\nWe hold Bitcoin.\nNothing here.\r\nOur stablecoin plans\nlast digital assets"
+        chunks = [sample_text[i:i + 5] for i in range(0, len(sample_text), 5)]
+
+        result = self.analyzer.analyze_stream(chunks, max_snippets=None)
+
+        self.assertEqual(result, self.analyzer.analyze_filing(sample_text))
+
+    def test_analyze_path_matches_analyze_filing(self):
+        """
+        Test that the memory-mapped byte-level scan finds the same lines as the text
+        scan, including lines around window boundaries and non-ASCII text.
+        """
+        rng = random.Random(7)
+        words = ['solder', 'Bitcoin', 'café', 'ÉBTC', 'sol', 'tokens', 'Ether', 'ETH', 'Kelvin', '<b>NFT</b>']
+        text = ''.join(
+            ' '.join(rng.choices(words, k=rng.randint(0, 6))) + rng.choice(['\n', '\r\n'])
+            for _ in range(3000)
+        )
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'filing.txt')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            empty = os.path.join(tmp_dir, 'empty.txt')
+            open(empty, 'w').close()
+
+            with patch('src.keyword_analyzer.WINDOW_SIZE', 1000):
+                result = self.analyzer.analyze_path(path)
+            self.assertEqual(result, self.analyzer.analyze_filing(text))
+            self.assertEqual(self.analyzer.analyze_path(empty), {'crypto_detected': False, 'summary': None})
+
+    def test_analyze_path_memory_does_not_grow_with_size(self):
+        """
+        Test that scanning a file allocates about one window, not the file size.
+        """
+        line = 'The company reported quarterly revenue and operating expenses.\n'
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'filing.txt')
+            with open(path, 'w', encoding='ascii') as f:
+                for _ in range(80000):  # about 5 MB
+                    f.write(line)
+                f.write('We hold Bitcoin.\n')
+
+            with patch('src.keyword_analyzer.WINDOW_SIZE', 64 * 1024):
+                tracemalloc.start()
+                try:
+                    result = self.analyzer.analyze_path(path)
+                    _, peak = tracemalloc.get_traced_memory()
+                finally:
+                    tracemalloc.stop()
+
+        self.assertTrue(result['crypto_detected'])
+        self.assertLess(peak, 1024 * 1024)
+
+    def test_analyze_stream_bounds_lines_without_breaks(self):
+        """
+        Test that a document without line breaks is scanned in pieces as it
+        streams, so neither the held text nor the offsets depend on its length.
+        """
+        body = '<span>revenue</span> ' * 1000 + 'We hold <b>Bitcoin</b>. ' + '<span>revenue</span> ' * 1000
+        chunks = [body[i:i + 1000] for i in range(0, len(body), 1000)]
+
+        with patch('src.keyword_analyzer.MAX_PENDING_CHARS', 4096):
+            analysis = IncrementalAnalysis(self.analyzer, max_snippets=None)
+            for chunk in chunks:
+                analysis.feed(chunk)
+                self.assertLess(analysis._pending_chars, 4096 + 1000)
+            result = analysis.finish()
+
+        self.assertTrue(result['crypto_detected'])
+        self.assertEqual(result.keyword_offsets, {'Bitcoin': [body.index('Bitcoin')]})
+
+    def test_forced_cut_keeps_multi_word_keywords(self):
+        """
+        Test that a line cut for length is not split inside a keyword with a
+        space, even when a chunk ends in the middle of it.
+        """
+        chunks = ['word ' * 200] * 4 + ['word ' * 198 + 'digital ', 'assets ' + 'word ' * 200]
+        text = ''.join(chunks)
+
+        with patch('src.keyword_analyzer.MAX_PENDING_CHARS', 4096):
+            analysis = IncrementalAnalysis(self.analyzer, max_snippets=None)
+            for chunk in chunks:
+                analysis.feed(chunk)
+            self.assertLess(analysis._pending_chars, 4096)  # the line was cut
+            result = analysis.finish()
+
+        expected = self.analyzer.analyze_filing(text)
+        self.assertEqual(result.keyword_counts, {'digital assets': 1})
+        self.assertEqual(result.keyword_offsets, expected.keyword_offsets)
+
+    def test_analyze_stream_stops_early(self):
+        """
+        Test that analyze_stream stops consuming chunks once enough snippets are found
+        and closes the chunk iterator.
+        """
+        consumed = []
+
+        def chunks():
+            for chunk in ["Bitcoin one\n", "Ethereum two\n", "Solana three\n", "never read\n"]:
+                consumed.append(chunk)
+                yield chunk
+
+        generator = chunks()
+        result = self.analyzer.analyze_stream(generator, max_snippets=2)
+
+        self.assertTrue(result['crypto_detected'])
+        self.assertIn("Bitcoin one Ethereum two...", result['summary'])
+        self.assertEqual(len(consumed), 2)
+        self.assertIsNone(generator.gi_frame)  # closed
+
+    def test_analysis_result_counts_and_offsets(self):
+        """
+        Test that the result counts every keyword occurrence and records its offset,
+        in characters for text and in bytes for files, while still comparing equal
+        to the plain result dictionary.
+        """
+        text = "Café intro\nWe hold Bitcoin and bitcoin, plus ETH.\n<p>NFT</p> and Bitcoin again\n"
+
+        result = self.analyzer.analyze_filing(text)
+
+        self.assertEqual(result.keyword_counts, {'Bitcoin': 3, 'ETH': 1, 'NFT': 1})
+        self.assertEqual(result.ranked_keywords()[0], ('Bitcoin', 3))
+        self.assertEqual(result.total_hits, 5)
+        self.assertEqual(result.matched_lines, 2)
+        self.assertFalse(result.truncated)
+        self.assertEqual(
+            [text[offset:offset + 7].lower() for offset in result.keyword_offsets['Bitcoin']], ['bitcoin'] * 3
+        )
+        self.assertEqual(text[result.keyword_offsets['NFT'][0]:][:3], 'NFT')
+        self.assertEqual(result, {'crypto_detected': True, 'summary': result['summary']})
+        self.assertTrue(result['summary'].startswith("Crypto keywords detected: Bitcoin, NFT. "))
+
+        streamed = self.analyzer.analyze_stream([text[i:i + 4] for i in range(0, len(text), 4)], max_snippets=None)
+        self.assertEqual(streamed.keyword_offsets, result.keyword_offsets)
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'filing.txt')
+            with open(path, 'w', encoding='utf-8', newline='') as f:
+                f.write(text)
+            mapped = self.analyzer.analyze_path(path)
+            with open(path, 'rb') as f:
+                data = f.read()
+        self.assertEqual(mapped.keyword_counts, result.keyword_counts)
+        self.assertEqual(
+            [data[offset:offset + 7].lower() for offset in mapped.keyword_offsets['Bitcoin']], [b'bitcoin'] * 3
+        )
+
+        restored = pickle.loads(pickle.dumps(result))
+        self.assertEqual(restored, result)
+        self.assertEqual(restored.keyword_offsets, result.keyword_offsets)
+
+    def test_max_keywords_stops_early(self):
+        """
+        Test that the analysis stops once enough distinct keywords were found and
+        reports that its counts are truncated.
+        """
+        consumed = []
+
+        def chunks():
+            for chunk in ["Bitcoin one\n", "Bitcoin two\n", "Solana three\n", "never read\n"]:
+                consumed.append(chunk)
+                yield chunk
+
+        result = self.analyzer.analyze_stream(chunks(), max_snippets=None, max_keywords=2)
+
+        self.assertEqual(result.keyword_counts, {'Bitcoin': 2, 'Solana': 1})
+        self.assertTrue(result.truncated)
+        self.assertEqual(len(consumed), 3)
+
+        full = self.analyzer.analyze_filing("Bitcoin one\nBitcoin two\nSolana three\n")
+        self.assertFalse(full.truncated)
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
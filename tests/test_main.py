@@ -0,0 +1,346 @@
+import gzip
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import MagicMock
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from main import (
+    enqueue_new_filings, extract_filing_id, fetch_and_analyze, process_filings, process_new_filings,
+    process_next_job, run_backfill,
+)
+from src.database import Database
+from src.edgar_index import BackfillCheckpoint
+from src.job_queue import SqliteJobQueue
+from src.keyword_analyzer import KeywordAnalyzer
+from src.rate_limiter import RateLimiter
+from src.sec_client import FETCH_FULL, FETCH_PRIMARY, SecEdgarClient
+from tests.test_edgar_index import MASTER_INDEX
+
+
+def make_filing(accession: str, form_type: str = "8-K") -> dict:
+    return {
+        "title": f"{form_type} - Example Corp (0001234567) (Filer)",
+        "link": f"https://www.sec.gov/Archives/edgar/data/1234567/{accession.replace('-', '')}/{accession}-index.htm",
+        "summary": "",
+        "published": "2025-07-14T10:00:00-04:00",
+    }
+
+
+class FakeTelegramClient:
+    """
+    Stands in for a TelegramClient: alerts are delivered at once unless failing
+    is set, and the keys of alerts still being sent are in in_flight.
+    """
+
+    def __init__(self):
+        self.send_sec_alert = MagicMock(side_effect=self._send_sec_alert)
+        self.failing = False
+        self.in_flight = set()
+        self._delivered = []
+
+    def _send_sec_alert(self, filing_details, summary, key=None):
+        if key is not None and not self.failing:
+            self._delivered.append(key)
+
+    def take_delivered(self):
+        delivered, self._delivered = self._delivered, []
+        return delivered
+
+    def alerts_in_flight(self):
+        return set(self.in_flight)
+
+    def flush(self):
+        pass
+
+
+class TestProcessNewFilings(unittest.TestCase):
+
+    def setUp(self):
+        self.db = Database(db_path=":memory:")
+        self.sec_client = MagicMock()
+        self.telegram_client = FakeTelegramClient()
+        self.executor = ThreadPoolExecutor(max_workers=4)
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.db.close()
+
+    def test_process_new_filings(self):
+        """
+        Test that new filings are analyzed concurrently, alerted on when crypto is
+        found, and recorded once, while known and repeated entries are skipped.
+        """
+        texts = {
+            "0001234567-25-000001": "We bought Bitcoin.",
+            "0001234567-25-000002": "Nothing to see here.",
+            "0001234567-25-000003": "Already processed Ethereum filing.",
+        }
+        filings = [make_filing(accession) for accession in texts]
+        filings.append(make_filing("0001234567-25-000001"))  # repeated in the feed
+        self.sec_client.get_latest_filings.return_value = filings
+        self.sec_client.stream_filing_text.side_effect = lambda link: iter(
+            [texts[extract_filing_id(link)]]
+        )
+        self.db.add_filing("0001234567-25-000003")
+
+        process_new_filings(
+            self.sec_client, KeywordAnalyzer(), self.telegram_client, self.db, self.executor
+        )
+
+        self.assertEqual(self.sec_client.stream_filing_text.call_count, 2)
+        self.telegram_client.send_sec_alert.assert_called_once()
+        details, summary = self.telegram_client.send_sec_alert.call_args[0]
+        self.assertEqual(details["form_type"], "8-K")
+        self.assertIn("Bitcoin", summary)
+        self.assertTrue(self.db.filing_exists("0001234567-25-000001"))
+        self.assertTrue(self.db.filing_exists("0001234567-25-000002"))
+
+    def test_process_new_filings_download_failure(self):
+        """
+        Test that a filing that cannot be downloaded is not marked as processed.
+        """
+        self.sec_client.get_latest_filings.return_value = [make_filing("0001234567-25-000004")]
+        self.sec_client.stream_filing_text.return_value = None
+
+        process_new_filings(
+            self.sec_client, KeywordAnalyzer(), self.telegram_client, self.db, self.executor
+        )
+
+        self.telegram_client.send_sec_alert.assert_not_called()
+        self.assertFalse(self.db.filing_exists("0001234567-25-000004"))
+
+    def test_alerted_filing_recorded_once_delivered(self):
+        """
+        Test that a filing is recorded only once its alert was delivered: a failed
+        send counts as a failure and is retried, and a filing whose alert is still
+        being sent is not processed again.
+        """
+        filings = [make_filing("0001234567-25-000005"), make_filing("0001234567-25-000006")]
+        self.sec_client.stream_filing_text.side_effect = lambda link: iter(["We bought Bitcoin."])
+        self.telegram_client.failing = True
+
+        counts = process_filings(
+            self.sec_client, KeywordAnalyzer(), self.telegram_client, self.db, self.executor, filings[:1]
+        )
+        self.assertEqual((counts["alerts"], counts["failures"]), (1, 1))
+        self.assertFalse(self.db.filing_exists("0001234567-25-000005"))
+
+        self.telegram_client.failing = False
+        self.telegram_client.in_flight.add("0001234567-25-000006")
+        counts = process_filings(
+            self.sec_client, KeywordAnalyzer(), self.telegram_client, self.db, self.executor, filings
+        )
+        self.assertEqual((counts["new"], counts["failures"]), (1, 0))
+        self.assertTrue(self.db.filing_exists("0001234567-25-000005"))
+        self.assertFalse(self.db.filing_exists("0001234567-25-000006"))
+
+
+    def test_size_hint_only_for_full_submissions(self):
+        """
+        Test that the feed's submission size is passed to the analysis executor
+        only when the full submission is downloaded.
+        """
+        filing = make_filing("0001234567-25-000005")
+        filing["summary"] = "<b>Size:</b> 12 MB"
+        analysis_executor = MagicMock()
+
+        for fetch_mode, size_hint in ((FETCH_FULL, 12 * 1024 * 1024), (FETCH_PRIMARY, None)):
+            self.sec_client.fetch_mode = fetch_mode
+            fetch_and_analyze(self.sec_client, KeywordAnalyzer(), filing, analysis_executor)
+            self.assertEqual(analysis_executor.analyze_stream.call_args[0][1], size_hint)
+
+
+class ArchiveHandler(BaseHTTPRequestHandler):
+    """
+    Stands in for the EDGAR archives: serves the recorded index (gzipped, as a
+    quarterly master.gz) and the submissions in its files dictionary.
+    """
+
+    files = {}
+    requests = []
+
+    def do_GET(self):
+        self.requests.append(self.path)
+        body = self.files.get(self.path)
+        if body is None:
+            self.send_error(404)
+            return
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestBackfill(unittest.TestCase):
+
+    def setUp(self):
+        ArchiveHandler.files = {
+            "/Archives/edgar/full-index/2025/QTR1/master.gz": gzip.compress(MASTER_INDEX.encode()),
+            "/Archives/edgar/data/1000045/000095017025000101/0000950170-25-000101.txt": b"We bought Bitcoin.",
+            "/Archives/edgar/data/1000694/000100069425000004/0001000694-25-000004.txt": b"Annual report.",
+        }
+        ArchiveHandler.requests = []
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), ArchiveHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.sec_client = SecEdgarClient(
+            rate_limiter=RateLimiter(1000),
+            archives_url=f"http://127.0.0.1:{self.server.server_address[1]}/Archives",
+        )
+        self.db = Database(db_path=":memory:")
+        self.executor = ThreadPoolExecutor(max_workers=2)
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.executor.shutdown()
+        self.db.close()
+        self.sec_client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+        self.directory.cleanup()
+
+    def backfill(self, telegram_client=None):
+        checkpoint = BackfillCheckpoint(os.path.join(self.directory.name, "checkpoint.json"), {"forms": ["8-K"]})
+        return run_backfill(
+            self.sec_client, KeywordAnalyzer(), telegram_client, self.db, self.executor,
+            date(2025, 1, 1), date(2025, 1, 31), ["8-K", "10-K"], checkpoint=checkpoint,
+        )
+
+    def test_backfill_resumes_from_checkpoint(self):
+        """
+        Test that a backfill processes the selected forms of the index, leaves the
+        index open while a filing fails, and on resume processes only that filing,
+        then skips the completed index altogether.
+        """
+        telegram_client = FakeTelegramClient()
+        self.db.add_filing("0001000694-25-000004")  # processed by the live service
+
+        stats = self.backfill(telegram_client)
+
+        # The 8-K/A submission is missing from the stand-in archive.
+        self.assertEqual((stats["filings"], stats["alerts"], stats["failures"]), (2, 1, 1))
+        telegram_client.send_sec_alert.assert_called_once()
+        self.assertTrue(self.db.filing_exists("0000950170-25-000101"))
+        self.assertFalse(any("0001209191" in path for path in ArchiveHandler.requests))  # form 4
+
+        ArchiveHandler.files[
+            "/Archives/edgar/data/1000209/000100020925000002/0001000209-25-000002.txt"
+        ] = b"Amended report."
+        ArchiveHandler.requests.clear()
+        stats = self.backfill()
+        self.assertEqual((stats["filings"], stats["failures"]), (3, 1))
+        self.assertEqual(len(ArchiveHandler.requests), 2)  # the index and the missing filing
+        self.assertTrue(self.db.filing_exists("0001000209-25-000002"))
+
+        ArchiveHandler.requests.clear()
+        self.backfill()
+        self.assertEqual(ArchiveHandler.requests, [])
+
+
+class TestJobQueueRoles(unittest.TestCase):
+
+    def setUp(self):
+        self.db = Database(db_path=":memory:")
+        self.job_queue = SqliteJobQueue(db_path=":memory:", max_attempts=2)
+        self.sec_client = MagicMock()
+        self.telegram_client = FakeTelegramClient()
+
+    def tearDown(self):
+        self.job_queue.close()
+        self.db.close()
+
+    def process(self, worker_id: str = "w1") -> bool:
+        return process_next_job(
+            self.sec_client, KeywordAnalyzer(), self.telegram_client, self.db, self.job_queue, worker_id, 60
+        )
+
+    def test_poller_enqueues_unseen_filings(self):
+        """
+        Test that the poller queues new filings once and skips processed ones.
+        """
+        filings = [make_filing(f"0001234567-25-00000{i}") for i in range(1, 4)]
+        self.sec_client.get_latest_filings.return_value = filings
+        self.db.add_filing("0001234567-25-000003")
+
+        self.assertEqual(enqueue_new_filings(self.sec_client, self.db, self.job_queue), 2)
+        self.assertEqual(enqueue_new_filings(self.sec_client, self.db, self.job_queue), 0)
+        self.assertFalse(self.job_queue.contains("0001234567-25-000003"))
+
+    def test_worker_processes_and_alerts_once(self):
+        """
+        Test that a worker alerts on a leased filing, records it and completes the
+        job, that the same filing processed again is not alerted twice, and that
+        a filing whose alert another worker is still sending is retried.
+        """
+        filing = make_filing("0001234567-25-000001")
+        self.sec_client.stream_filing_text.side_effect = lambda link: iter(["We bought Bitcoin."])
+        self.job_queue.enqueue([("0001234567-25-000001", filing)])
+
+        self.assertTrue(self.process())
+        self.assertFalse(self.process())
+        self.telegram_client.send_sec_alert.assert_called_once()
+        self.assertTrue(self.db.filing_exists("0001234567-25-000001"))
+        self.assertEqual(self.job_queue.get_stats()["done"], 1)
+
+        # Redelivered after a worker sent the alert but died before completing the job
+        redelivered = make_filing("0001234567-25-000002")
+        self.job_queue.enqueue([("0001234567-25-000002", redelivered)])
+        self.job_queue.claim_alert("0001234567-25-000002")
+        self.job_queue.confirm_alert("0001234567-25-000002")
+        self.assertTrue(self.process("w2"))
+        self.telegram_client.send_sec_alert.assert_called_once()
+        self.assertEqual(self.job_queue.get_stats()["done"], 2)
+
+        self.job_queue.enqueue([("0001234567-25-000003", make_filing("0001234567-25-000003"))])
+        self.job_queue.claim_alert("0001234567-25-000003")
+        self.assertTrue(self.process("w3"))
+        self.telegram_client.send_sec_alert.assert_called_once()
+        self.assertEqual(self.job_queue.get_stats()["pending"], 1)
+
+    def test_worker_retries_failed_alert(self):
+        """
+        Test that a filing whose alert could not be sent is released for a retry
+        and alerted by the next attempt.
+        """
+        self.sec_client.stream_filing_text.side_effect = lambda link: iter(["We bought Bitcoin."])
+        self.job_queue.enqueue([("0001234567-25-000001", make_filing("0001234567-25-000001"))])
+        self.telegram_client.failing = True
+
+        self.assertTrue(self.process())
+        self.assertEqual(self.job_queue.get_stats()["pending"], 1)
+        self.assertFalse(self.db.filing_exists("0001234567-25-000001"))
+        self.assertFalse(self.job_queue.alert_delivered("0001234567-25-000001"))
+
+        self.telegram_client.failing = False
+        self.job_queue.conn.execute("UPDATE filing_jobs SET available_at = 0")  # Skip the backoff
+        self.assertTrue(self.process())
+        self.assertEqual(self.telegram_client.send_sec_alert.call_count, 2)
+        self.assertTrue(self.job_queue.alert_delivered("0001234567-25-000001"))
+        self.assertEqual(self.job_queue.get_stats()["done"], 1)
+
+    def test_worker_retries_failed_download(self):
+        """
+        Test that a filing that cannot be downloaded is released for a retry and
+        not recorded as processed.
+        """
+        self.sec_client.stream_filing_text.return_value = None
+        self.job_queue.enqueue([("0001234567-25-000004", make_filing("0001234567-25-000004"))])
+
+        self.assertTrue(self.process())
+        self.assertEqual(self.job_queue.get_stats()["pending"], 1)
+        self.assertFalse(self.db.filing_exists("0001234567-25-000004"))
+        self.telegram_client.send_sec_alert.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+import os
+import sys
+import unittest
+import urllib.error
+import urllib.request
+from datetime import datetime, timedelta, timezone
+from unittest.mock import MagicMock, patch
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src import metrics
+from src.database import Database
+from src.keyword_analyzer import KeywordAnalyzer
+from src.telegram_client import TelegramClient
+
+
+class TestMetrics(unittest.TestCase):
+
+    def test_histogram_exposition(self):
+        """
+        Test the Prometheus text format of a labeled histogram.
+        """
+        registry = metrics.Registry()
+        histogram = metrics.Histogram(
+            "test_seconds", "A test histogram.", buckets=(0.1, 1), labelnames=("operation",), registry=registry
+        )
+        histogram.labels("read").observe(0.05)
+        histogram.labels("read").observe(0.5)
+        histogram.labels("read").observe(5)
+
+        self.assertEqual(
+            registry.render().splitlines(),
+            [
+                "# HELP test_seconds A test histogram.",
+                "# TYPE test_seconds histogram",
+                'test_seconds_bucket{operation="read",le="0.1"} 1',
+                'test_seconds_bucket{operation="read",le="1.0"} 2',
+                'test_seconds_bucket{operation="read",le="+Inf"} 3',
+                'test_seconds_sum{operation="read"} 5.55',
+                'test_seconds_count{operation="read"} 3',
+            ],
+        )
+        with self.assertRaises(ValueError):
+            metrics.Histogram("test_seconds", "Duplicate.", registry=registry)
+
+    def test_gauge_exposition(self):
+        """
+        Test that a gauge goes up and down and renders as a single sample.
+        """
+        registry = metrics.Registry()
+        gauge = metrics.Gauge("test_depth", "A test gauge.", registry=registry)
+        gauge.inc()
+        gauge.inc(2)
+        gauge.dec()
+        self.assertEqual(
+            registry.render().splitlines(),
+            ["# HELP test_depth A test gauge.", "# TYPE test_depth gauge", "test_depth 2.0"],
+        )
+        gauge.set(0)
+        self.assertEqual(gauge.get(), 0)
+
+    def test_http_endpoint(self):
+        """
+        Test that the endpoint serves the registry and 404s elsewhere.
+        """
+        registry = metrics.Registry()
+        metrics.Histogram("served_seconds", "Served.", registry=registry).observe(0.2)
+        server = metrics.start_http_server(0, registry=registry)
+        try:
+            base = f"http://127.0.0.1:{server.server_address[1]}"
+            with urllib.request.urlopen(base + "/metrics") as response:
+                body = response.read().decode("utf-8")
+                self.assertEqual(response.headers["Content-Type"], metrics.CONTENT_TYPE)
+            self.assertIn("served_seconds_count 1", body)
+            with self.assertRaises(urllib.error.HTTPError):
+                urllib.request.urlopen(base + "/other")
+        finally:
+            server.shutdown()
+            server.server_close()
+
+    def test_stage_instrumentation(self):
+        """
+        Test that analysis, database operations and streamed analysis are observed.
+        """
+        analysis_count = metrics.ANALYSIS_SECONDS.get_count()
+        KeywordAnalyzer().analyze_filing("We hold Bitcoin.")
+        KeywordAnalyzer().analyze_stream(iter(["We hold ", "Bitcoin.\n"]))
+        self.assertEqual(metrics.ANALYSIS_SECONDS.get_count(), analysis_count + 2)
+
+        db_count = metrics.DB_SECONDS.get_count("add_filings")
+        db = Database(db_path=":memory:")
+        db.add_filings(["0001234567-25-000001"])
+        db.close()
+        self.assertEqual(metrics.DB_SECONDS.get_count("add_filings"), db_count + 1)
+
+    @patch.dict(os.environ, {"TELEGRAM_BOT_TOKEN": "123456:ABC-DEF1234ghIkl-zyx57W2v1u123ew11", "TELEGRAM_CHAT_ID": "12345", "TELEGRAM_CHAT_MESSAGES_PER_SECOND": "1000"})
+    @patch("telebot.TeleBot.send_message", new_callable=MagicMock)
+    def test_alert_latency(self, mock_send_message):
+        """
+        Test that an alert records the time since the filing was published.
+        """
+        published = (datetime.now(timezone.utc) - timedelta(minutes=4)).isoformat()
+        count = metrics.ALERT_LATENCY_SECONDS.get_count()
+        latency_sum = metrics.ALERT_LATENCY_SECONDS.labels().sum
+        send_count = metrics.TELEGRAM_SEND_SECONDS.get_count()
+
+        client = TelegramClient()
+        client.send_sec_alert({"company_name": "Test Corp", "filing_date": published}, "Bitcoin")
+        client.send_sec_alert({"company_name": "Test Corp", "filing_date": "N/A"}, "Bitcoin")
+
+        self.assertEqual(metrics.ALERT_LATENCY_SECONDS.get_count(), count + 1)
+        self.assertAlmostEqual(metrics.ALERT_LATENCY_SECONDS.labels().sum - latency_sum, 240, delta=5)
+        self.assertEqual(metrics.TELEGRAM_SEND_SECONDS.get_count(), send_count + 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,201 @@
+import os
+import sys
+import threading
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.rate_limiter import CircuitOpenError, RateGovernor, RateLimiter, parse_retry_after
+
+
+class FakeClock:
+    """
+    A manually advanced clock whose sleep() simply moves time forward.
+    """
+
+    def __init__(self):
+        self.now = 0.0
+        self.lock = threading.Lock()
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        with self.lock:
+            self.now += seconds
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_acquire_spaces_calls(self):
+        """
+        Test that consecutive acquisitions are spaced 1/rate seconds apart.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(10, clock=clock.time, sleep=clock.sleep)
+
+        waits = [limiter.acquire() for _ in range(5)]
+
+        self.assertEqual(waits[0], 0.0)
+        for wait in waits[1:]:
+            self.assertAlmostEqual(wait, 0.1)
+        self.assertAlmostEqual(clock.now, 0.4)
+
+    def test_acquire_allows_burst_after_idle(self):
+        """
+        Test that an idle limiter allows up to `burst` calls without waiting.
+        """
+        clock = FakeClock()
+        limiter = RateLimiter(2, burst=3, clock=clock.time, sleep=clock.sleep)
+        clock.now = 100.0
+
+        waits = [limiter.acquire() for _ in range(4)]
+
+        self.assertEqual(waits[:3], [0.0, 0.0, 0.0])
+        self.assertAlmostEqual(waits[3], 0.5)
+
+    def test_acquire_is_thread_safe(self):
+        """
+        Test that concurrent callers each reserve a distinct slot.
+        """
+        limiter = RateLimiter(1000)
+        waits = []
+        lock = threading.Lock()
+        barrier = threading.Barrier(20)
+
+        def worker():
+            barrier.wait()  # Acquire together, however slowly the threads start
+            wait = limiter.acquire()
+            with lock:
+                waits.append(wait)
+
+        threads = [threading.Thread(target=worker) for _ in range(20)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(waits), 20)
+        self.assertGreaterEqual(max(waits), 0.015)
+
+    def test_invalid_rate(self):
+        """
+        Test that a non-positive rate is rejected.
+        """
+        with self.assertRaises(ValueError):
+            RateLimiter(0)
+
+
+class TestRateGovernor(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.limiter = RateLimiter(10, clock=self.clock.time, sleep=self.clock.sleep)
+        self.governor = RateGovernor(
+            self.limiter, min_rate=1, failure_threshold=2, cooldown=30,
+            clock=self.clock.time, sleep=self.clock.sleep,
+        )
+
+    def test_rate_follows_responses(self):
+        """
+        Test that throttling halves the rate at most once per window, fast
+        responses raise it additively up to the maximum, and slow responses trim it.
+        """
+        for _ in range(5):  # one burst of congestion
+            self.governor.record_throttle()
+        self.assertEqual(self.governor.rate, 5)
+        for _ in range(3):
+            self.clock.sleep(2)  # latency_target
+            self.governor.record_throttle()
+        self.assertEqual(self.governor.rate, 1)  # min_rate
+
+        for _ in range(5):
+            self.governor.record_success(0.2)
+        self.assertAlmostEqual(self.governor.rate, 1.5)
+        for _ in range(200):
+            self.governor.record_success(0.2)
+        self.assertEqual(self.governor.rate, 10)  # max_rate
+
+        self.clock.sleep(2)
+        self.governor.record_success(5.0)
+        self.assertEqual(self.governor.rate, 7.5)
+        self.governor.record_success(5.0)
+        self.assertEqual(self.governor.rate, 7.5)
+
+    def test_retry_after_pauses_every_caller(self):
+        """
+        Test that a Retry-After delays the next acquisition until it has passed.
+        """
+        self.governor.record_throttle(retry_after=12)
+
+        waited = self.governor.acquire()
+
+        self.assertAlmostEqual(waited, 12)
+        self.assertAlmostEqual(self.governor.acquire(), 0.2)  # at the halved rate
+
+    def test_circuit_breaker(self):
+        """
+        Test that consecutive failures open the circuit, that one probe is let
+        through after the cooldown, and that its outcome closes or reopens it.
+        """
+        self.governor.record_failure()
+        self.governor.acquire()
+        self.governor.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+
+        self.clock.sleep(30)
+        self.governor.acquire()  # the probe
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+        self.governor.record_failure()
+        self.assertEqual(self.governor.state, "open")
+
+        self.clock.sleep(30)
+        self.governor.acquire()
+        self.governor.record_success(0.1)
+        self.assertEqual(self.governor.state, "closed")
+        self.governor.acquire()
+        self.assertEqual(self.governor.get_stats()["circuit_opened"], 2)
+
+    def test_unanswered_probe_reopens_circuit(self):
+        """
+        Test that a probe whose outcome is never recorded reopens the circuit
+        after a cooldown, instead of leaving it half open for good.
+        """
+        self.governor.record_failure()
+        self.governor.record_failure()
+        self.clock.sleep(30)
+        self.governor.acquire()  # the probe, never answered
+
+        self.clock.sleep(30)
+        with self.assertRaises(CircuitOpenError):
+            self.governor.acquire()
+        self.assertEqual(self.governor.state, "open")
+        self.clock.sleep(30)
+        self.governor.acquire()  # a new probe
+        self.assertEqual(self.governor.state, "half_open")
+        self.assertEqual(self.governor.get_stats()["circuit_opened"], 2)
+
+    def test_backoff_is_jittered_and_capped(self):
+        """
+        Test that retry delays stay within the doubling bound and the cap, and
+        that a Retry-After is used as is.
+        """
+        for attempt in range(1, 10):
+            self.assertLessEqual(self.governor.backoff(attempt), min(60.0, 2 ** (attempt - 1)))
+        self.assertEqual(self.governor.backoff(1, retry_after=7), 7)
+
+    def test_parse_retry_after(self):
+        """
+        Test seconds, HTTP dates and invalid Retry-After values.
+        """
+        self.assertEqual(parse_retry_after("120"), 120)
+        self.assertEqual(parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT", now=1445412420), 60)
+        self.assertIsNone(parse_retry_after("soon"))
+        self.assertIsNone(parse_retry_after(None))
+
+
+if __name__ == '__main__':
+    unittest.main()
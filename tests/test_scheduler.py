@@ -0,0 +1,131 @@
+import os
+import random
+import sys
+import unittest
+from datetime import datetime, timezone
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.scheduler import PollScheduler, is_business_hours, seconds_until_business_hours
+
+# Tuesday 15 July 2025, 10:00 EDT
+BUSINESS_HOURS = datetime(2025, 7, 15, 14, 0, tzinfo=timezone.utc)
+
+
+class FakeClock:
+    """
+    A manually advanced clock whose sleep() simply moves time forward.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps = []
+
+    def time(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TestScheduler(unittest.TestCase):
+
+    def make_scheduler(self, clock: FakeClock, wall=BUSINESS_HOURS, **kwargs) -> PollScheduler:
+        kwargs.setdefault("jitter", 0.0)
+        return PollScheduler(clock=clock.time, sleep=clock.sleep, now=lambda: wall, **kwargs)
+
+    def run_cycle(self, scheduler: PollScheduler, clock: FakeClock, duration: float, new_filings: int) -> float:
+        scheduler.wait()
+        clock.now += duration
+        return scheduler.record_poll(new_filings)
+
+    def test_business_hours(self):
+        """
+        Test EDGAR business hours in Eastern time and the wait until they start.
+        """
+        self.assertTrue(is_business_hours(BUSINESS_HOURS))
+        # Tuesday 23:00 EDT
+        late = datetime(2025, 7, 16, 3, 0, tzinfo=timezone.utc)
+        self.assertFalse(is_business_hours(late))
+        self.assertEqual(seconds_until_business_hours(late), 7 * 3600)
+        # Saturday noon EDT waits until Monday 06:00 EDT
+        saturday = datetime(2025, 7, 19, 16, 0, tzinfo=timezone.utc)
+        self.assertEqual(seconds_until_business_hours(saturday), (12 + 24 + 6) * 3600)
+
+    def test_interval_follows_filing_rate(self):
+        """
+        Test that a high rate of new filings shortens the interval down to the
+        minimum and a quiet feed lengthens it back to the maximum.
+        """
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock)
+
+        self.assertEqual(self.run_cycle(scheduler, clock, 5, 40), 295)  # No rate yet
+        self.run_cycle(scheduler, clock, 5, 300)  # 1 filing/s
+        self.assertAlmostEqual(scheduler.filing_rate, 1.0)
+        self.assertEqual(scheduler.current_interval(), 60)
+
+        for _ in range(30):
+            self.run_cycle(scheduler, clock, 5, 0)
+        self.assertEqual(scheduler.current_interval(), 300)
+
+    def test_deadline_cadence(self):
+        """
+        Test that deadlines stay on a fixed cadence whatever the cycle duration.
+        """
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, min_interval=100, max_interval=100)
+        starts = []
+        for duration in (10, 70, 30):
+            scheduler.wait()
+            starts.append(clock.now)
+            clock.now += duration
+            scheduler.record_poll(0)
+        scheduler.wait()
+        starts.append(clock.now)
+
+        self.assertEqual(starts, [1000, 1100, 1200, 1300])
+
+    def test_overrun_policies(self):
+        """
+        Test that 'skip' keeps the cadence by dropping missed slots, while 'run_now'
+        polls again immediately.
+        """
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, min_interval=100, max_interval=100)
+        self.assertEqual(self.run_cycle(scheduler, clock, 250, 0), 50)  # Next slot at 1300
+        self.assertEqual(scheduler.overruns, 1)
+
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, min_interval=100, max_interval=100, overrun_policy="run_now")
+        self.assertEqual(self.run_cycle(scheduler, clock, 250, 0), 0)
+        self.assertEqual(self.run_cycle(scheduler, clock, 10, 0), 90)  # Cadence restarts at 1250
+
+        with self.assertRaises(ValueError):
+            self.make_scheduler(clock, overrun_policy="sometimes")
+
+    def test_jitter_and_off_hours(self):
+        """
+        Test that wake-ups are jittered within bounds, and that off-hours polls use
+        the off-hours interval but wake up when business hours start.
+        """
+        clock = FakeClock()
+        scheduler = self.make_scheduler(clock, jitter=0.1, rng=random.Random(1))
+        delays = [self.run_cycle(scheduler, clock, 0, 0) for _ in range(20)]
+        self.assertTrue(all(240 <= delay <= 360 for delay in delays))
+        self.assertGreater(len(set(delays)), 1)
+
+        # Sunday 23:00 EDT: the off-hours interval applies
+        sunday = datetime(2025, 7, 21, 3, 0, tzinfo=timezone.utc)
+        scheduler = self.make_scheduler(FakeClock(), wall=sunday)
+        self.assertEqual(scheduler.current_interval(), 1800)
+        # Monday 05:50 EDT: wake up at 06:00
+        dawn = datetime(2025, 7, 21, 9, 50, tzinfo=timezone.utc)
+        scheduler = self.make_scheduler(FakeClock(), wall=dawn)
+        self.assertEqual(scheduler.current_interval(), 600)
+
+
+if __name__ == "__main__":
+    unittest.main()
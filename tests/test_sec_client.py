@@ -1,15 +1,25 @@
+import gzip
 import os
 import sys
+import tempfile
+import threading
 import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from unittest.mock import MagicMock, patch
 
+import feedparser
 import requests
 from dotenv import load_dotenv
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
+from src.filing_cache import FilingCache
+from src.keyword_analyzer import KeywordAnalyzer
+from src.rate_limiter import RateGovernor, RateLimiter
 from src.sec_client import SecEdgarClient
+from tests.test_rate_limiter import FakeClock
+from tests.test_filing_index import INDEX_PAGE, INDEX_URL
 
 # Load environment variables for tests
 load_dotenv()
@@ -18,7 +28,7 @@ class TestSecEdgarClient(unittest.TestCase):
 
     @patch.dict(os.environ, {"USER_AGENT": "test_user_agent", "FROM_EMAIL": "test@example.com"})
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_latest_filings_success(self, mock_get):
         """
         Test that get_latest_filings successfully parses a valid RSS feed.
@@ -47,19 +57,19 @@ class TestSecEdgarClient(unittest.TestCase):
             "https://www.sec.gov/Archives/edgar/data/1234567/0001234567-25-000001-index.html",
         )
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_latest_filings_request_error(self, mock_get):
         """
         Test that get_latest_filings handles a request exception.
         """
         mock_get.side_effect = requests.exceptions.RequestException("Test error")
 
-        client = SecEdgarClient()
+        client = SecEdgarClient(max_retries=0)
         filings = client.get_latest_filings()
 
         self.assertEqual(len(filings), 0)
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_latest_filings_parsing_error(self, mock_get):
         """
         Test that get_latest_filings handles an RSS parsing error.
@@ -74,7 +84,7 @@ class TestSecEdgarClient(unittest.TestCase):
 
         self.assertEqual(len(filings), 0)
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_full_filing_text_success(self, mock_get):
         """
         Test that get_full_filing_text successfully extracts text from a filing.
@@ -90,11 +100,11 @@ class TestSecEdgarClient(unittest.TestCase):
         text = client.get_full_filing_text(filing_url)
 
         self.assertEqual(text, "This is the full filing text.")
-        # Verify that requests.get was called with the correct .txt URL
+        # Verify that the session was called with the correct .txt URL
         expected_doc_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001.txt"
-        mock_get.assert_called_once_with(expected_doc_url, headers=client.headers, timeout=10)
+        mock_get.assert_called_once_with(expected_doc_url, timeout=10)
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_full_filing_text_request_error(self, mock_get):
         """
         Test that get_full_filing_text handles a request exception.
@@ -107,7 +117,7 @@ class TestSecEdgarClient(unittest.TestCase):
 
         self.assertIsNone(text)
 
-    @patch("src.sec_client.requests.get")
+    @patch("src.sec_client.requests.Session.get")
     def test_get_full_filing_text_invalid_url(self, mock_get):
         """
         Test that get_full_filing_text handles an invalid filing URL format.
@@ -119,6 +129,456 @@ class TestSecEdgarClient(unittest.TestCase):
         self.assertIsNone(text)
         mock_get.assert_not_called() # Ensure no request is made for invalid URL
 
+    @patch("src.sec_client.requests.Session.get")
+    def test_stream_full_filing_text_success(self, mock_get):
+        """
+        Test that stream_full_filing_text decodes the body chunk by chunk, including
+        multi-byte characters split across chunks, and closes the response.
+        """
+        mock_response = MagicMock()
+        mock_response.encoding = "utf-8"
+        mock_response.iter_content.return_value = iter([b"Caf", b"\xc3", b"\xa9 blockchain\n", b"end"])
+        mock_get.return_value = mock_response
+
+        client = SecEdgarClient()
+        filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+        chunks = client.stream_full_filing_text(filing_url, chunk_size=4)
+
+        self.assertEqual("".join(chunks), "Caf\u00e9 blockchain\nend")
+        expected_doc_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001.txt"
+        mock_get.assert_called_once_with(expected_doc_url, timeout=10, stream=True)
+        mock_response.iter_content.assert_called_once_with(chunk_size=4)
+        mock_response.close.assert_called_once()
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_stream_full_filing_text_closed_early(self, mock_get):
+        """
+        Test that closing the chunk iterator early closes the response.
+        """
+        mock_response = MagicMock()
+        mock_response.encoding = "ISO-8859-1"
+        mock_response.iter_content.return_value = iter([b"first", b"second"])
+        mock_get.return_value = mock_response
+
+        client = SecEdgarClient()
+        filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+        chunks = client.stream_full_filing_text(filing_url)
+
+        self.assertEqual(next(chunks), "first")
+        chunks.close()
+        mock_response.close.assert_called_once()
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_stream_full_filing_text_http_error(self, mock_get):
+        """
+        Test that stream_full_filing_text returns None on an HTTP error status.
+        """
+        mock_response = MagicMock()
+        mock_response.raise_for_status.side_effect = requests.exceptions.HTTPError("404")
+        mock_get.return_value = mock_response
+
+        client = SecEdgarClient()
+        filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+
+        self.assertIsNone(client.stream_full_filing_text(filing_url))
+        mock_response.close.assert_called_once()
+
+    def _governed_client(self, **kwargs) -> SecEdgarClient:
+        self.clock = FakeClock()
+        self.sleeps = []
+
+        def sleep(seconds):
+            self.sleeps.append(seconds)
+            self.clock.sleep(seconds)
+
+        limiter = RateLimiter(10, clock=self.clock.time, sleep=sleep)
+        governor = RateGovernor(limiter, clock=self.clock.time, sleep=sleep, **kwargs)
+        return SecEdgarClient(rate_limiter=limiter, governor=governor)
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_retries_throttling_and_connection_errors(self, mock_get):
+        """
+        Test that a 503 with Retry-After and a connection error are retried, after
+        the server's delay and a jittered backoff, and that the rate is lowered.
+        """
+        throttled = MagicMock(status_code=503, headers={"Retry-After": "2"})
+        ok = MagicMock(status_code=200, headers={})
+        mock_get.side_effect = [throttled, requests.exceptions.ConnectionError("reset"), ok]
+        client = self._governed_client()
+
+        self.assertIs(client._get("https://www.sec.gov/x"), ok)
+
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(self.sleeps[0], 2)  # Retry-After
+        self.assertLessEqual(self.sleeps[-1], 2)  # second attempt: up to 2 * backoff_base
+        throttled.close.assert_called_once()
+        stats = client.get_stats()
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["governor"]["throttled"], 1)
+        self.assertAlmostEqual(client.governor.rate, 5.1)
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_gives_up_and_opens_circuit(self, mock_get):
+        """
+        Test that the last error response is returned once retries run out, and
+        that an outage opens the circuit so later requests are not sent at all.
+        """
+        mock_get.return_value = MagicMock(status_code=500, headers={})
+        client = self._governed_client(failure_threshold=3, cooldown=60)
+        client.max_retries = 1
+
+        self.assertEqual(client._get("https://www.sec.gov/x").status_code, 500)
+        self.assertEqual(mock_get.call_count, 2)
+        # The third failure in a row opens the circuit before the retry.
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client._get("https://www.sec.gov/x")
+        self.assertEqual(client.governor.state, "open")
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            client._get("https://www.sec.gov/x")
+        self.assertEqual(mock_get.call_count, 3)
+
+        self.clock.sleep(60)
+        mock_get.return_value = MagicMock(status_code=200, headers={})
+        self.assertEqual(client._get("https://www.sec.gov/x").status_code, 200)
+        self.assertEqual(client.governor.state, "closed")
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_stream_primary_documents(self, mock_get):
+        """
+        Test that primary mode reads the index page, then only the primary document
+        and the EX-99 exhibit, each cut at the size limit and wrapped so that the
+        keyword analyzer handles them like a full submission.
+        """
+        bodies = {
+            INDEX_URL: INDEX_PAGE.encode(),
+            "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/exco-8k.htm":
+                b"<html><body><p>We bought Bitcoin.</p></body></html>",
+            "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/ex99-1.htm":
+                b"<html><body><p>Our Ethereum plans</p>" + b"x" * 100 + b"Solana</body></html>",
+        }
+
+        def get(url, **kwargs):
+            response = MagicMock()
+            response.encoding = "utf-8"
+            response.content = bodies[url]
+            response.text = bodies[url].decode()
+            response.iter_content.side_effect = lambda chunk_size: (
+                bodies[url][i:i + chunk_size] for i in range(0, len(bodies[url]), chunk_size)
+            )
+            return response
+
+        mock_get.side_effect = get
+        client = SecEdgarClient(fetch_mode="primary", max_document_bytes=80)
+
+        text = "".join(client.stream_filing_text(INDEX_URL, chunk_size=16))
+
+        self.assertEqual([c.args[0] for c in mock_get.call_args_list], list(bodies))
+        self.assertIn("<TYPE>EX-99.1\n", text)
+        self.assertNotIn("Solana", text)
+        self.assertEqual(client.get_stats()["documents_truncated"], 1)
+        result = KeywordAnalyzer().analyze_filing(text)
+        self.assertEqual(result.keyword_counts, {"Bitcoin": 1, "Ethereum": 1})
+
+        # Stopping after the primary document never requests the exhibit.
+        mock_get.reset_mock()
+        chunks = client.stream_filing_text(INDEX_URL, chunk_size=1024)
+        self.assertEqual(KeywordAnalyzer().analyze_stream(chunks, max_snippets=1).keyword_counts, {"Bitcoin": 1})
+        self.assertEqual(mock_get.call_count, 2)
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_stream_primary_documents_falls_back_to_full_submission(self, mock_get):
+        """
+        Test that an index page without a document table leads to the full
+        submission, and a failed index request to None.
+        """
+        index = MagicMock()
+        index.text = "<html><body>Moved</body></html>"
+        index.content = index.text.encode()
+        submission = MagicMock()
+        submission.encoding = "utf-8"
+        submission.iter_content.return_value = iter([b"We hold Bitcoin."])
+        mock_get.side_effect = [index, submission]
+        client = SecEdgarClient(fetch_mode="primary", max_retries=0)
+        filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+
+        self.assertEqual("".join(client.stream_filing_text(filing_url)), "We hold Bitcoin.")
+        self.assertTrue(mock_get.call_args_list[1].args[0].endswith("/0001234567-25-000001.txt"))
+        self.assertEqual(client.get_stats()["index_fallbacks"], 1)
+
+        mock_get.side_effect = requests.exceptions.ConnectionError("down")
+        self.assertIsNone(client.stream_filing_text(filing_url))
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_filing_cache_answers_repeat_requests(self, mock_get):
+        """
+        Test that a filing downloaded once is read from the cache afterwards, both
+        whole and streamed, without another request.
+        """
+        mock_response = MagicMock()
+        mock_response.content = b"Bitcoin treasury"
+        mock_response.text = "Bitcoin treasury"
+        mock_get.return_value = mock_response
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FilingCache(directory)
+            client = SecEdgarClient(cache=cache)
+            filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+
+            self.assertEqual(client.get_full_filing_text(filing_url), "Bitcoin treasury")
+            self.assertEqual(client.get_full_filing_text(filing_url), "Bitcoin treasury")
+            self.assertEqual("".join(client.stream_full_filing_text(filing_url, chunk_size=4)), "Bitcoin treasury")
+
+            mock_get.assert_called_once()
+            self.assertEqual(cache.get("0001234567-25-000001"), "Bitcoin treasury")
+            self.assertEqual(cache.get_stats()["stores"], 1)
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_filing_cache_stores_only_complete_streams(self, mock_get):
+        """
+        Test that a streamed filing is cached once fully read, that a stream
+        closed early is read to the end for the cache unless too much is left, and
+        that a stream broken part way is not cached.
+        """
+        filing_url = "https://www.sec.gov/Archives/edgar/data/1234567/000123456725000001/0001234567-25-000001-index.htm"
+
+        def streamed(chunks):
+            response = MagicMock()
+            response.encoding = "utf-8"
+            response.iter_content.return_value = iter(chunks)
+            return response
+
+        def broken():
+            yield b"first"
+            raise requests.exceptions.ChunkedEncodingError("reset")
+
+        def wait_for_drains():
+            for thread in threading.enumerate():
+                if thread.name == "cache-drain":
+                    thread.join()
+
+        with tempfile.TemporaryDirectory() as directory:
+            cache = FilingCache(directory)
+            client = SecEdgarClient(cache=cache, cache_drain_bytes=5)
+
+            mock_get.return_value = streamed([b"first", b"second"])
+            chunks = client.stream_full_filing_text(filing_url)
+            next(chunks)
+            chunks.close()
+            wait_for_drains()
+            self.assertIsNone(cache.get("0001234567-25-000001"))
+
+            mock_get.return_value = streamed(broken())
+            with self.assertRaises(requests.exceptions.RequestException):
+                "".join(client.stream_full_filing_text(filing_url))
+            self.assertIsNone(cache.get("0001234567-25-000001"))
+
+            mock_get.return_value = streamed([b"first", b"second"])
+            self.assertEqual("".join(client.stream_full_filing_text(filing_url)), "firstsecond")
+            self.assertEqual(cache.get("0001234567-25-000001"), "firstsecond")
+            self.assertEqual([name for name in os.listdir(directory) if name.endswith(".tmp")], [])
+
+            client.cache_drain_bytes = 6
+            mock_get.return_value = streamed([b"first", b"second"])
+            chunks = client.stream_full_filing_text("https://www.sec.gov/Archives/edgar/data/1/000000000125000002/0000000001-25-000002-index.htm")
+            next(chunks)
+            chunks.close()
+            wait_for_drains()
+            self.assertEqual(cache.get("0000000001-25-000002"), "firstsecond")
+
+    def _feed_response(self, start: int, count: int, total: int, numbers=None) -> MagicMock:
+        if numbers is None:
+            numbers = range(total)
+        entries = "".join(
+            f"""<entry><title>8-K - Corp {n} (000{n})</title>
+<link href="https://www.sec.gov/Archives/edgar/data/{n}/000{n}-25-000001-index.htm"/>
+<summary>s</summary></entry>"""
+            for n in numbers[start:start + count]
+        )
+        response = MagicMock()
+        response.status_code = 200
+        response.content = (
+            '<?xml version="1.0" encoding="UTF-8"?><feed xmlns="http://www.w3.org/2005/Atom">'
+            + entries + "</feed>"
+        ).encode()
+        return response
+
+    def _paged_feed(self, total: int):
+        def get(url, **kwargs):
+            query = dict(part.split("=") for part in url.split("?")[1].split("&"))
+            return self._feed_response(int(query["start"]), int(query["count"]), total)
+        return get
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_latest_filings_pages_until_processed(self, mock_get):
+        """
+        Test that older feed pages are read until one contains a processed filing.
+        """
+        mock_get.side_effect = self._paged_feed(total=1000)
+
+        client = SecEdgarClient()
+        filings = client.get_latest_filings(
+            any_processed=lambda filings: any(f["title"] == "8-K - Corp 150 (000150)" for f in filings)
+        )
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(filings), 200)
+        self.assertIn("start=100&count=100", mock_get.call_args_list[1][0][0])
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_latest_filings_page_limit(self, mock_get):
+        """
+        Test that paging stops at max_feed_pages and at a short final page.
+        """
+        mock_get.side_effect = self._paged_feed(total=1000)
+        client = SecEdgarClient(max_feed_pages=3)
+
+        with self.assertLogs(level="WARNING"):
+            filings = client.get_latest_filings(any_processed=lambda filings: False)
+        self.assertEqual(mock_get.call_count, 3)
+        self.assertEqual(len(filings), 300)
+
+        mock_get.reset_mock()
+        mock_get.side_effect = self._paged_feed(total=150)
+        client = SecEdgarClient(max_feed_pages=3)
+        filings = client.get_latest_filings(any_processed=lambda filings: False)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(len(filings), 150)
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_latest_filings_resumes_unfinished_catch_up(self, mock_get):
+        """
+        Test that paging continues when filings shift onto the next page, and that
+        a catch-up stopped by the page limit or a failed page resumes on the next
+        calls below the filings processed meanwhile, until none is missed.
+        """
+        feed = list(range(1000, 0, -1))  # Corp numbers, newest first
+        failing = set()
+
+        def get(url, **kwargs):
+            start = url.split("start=")[1].split("&")[0]
+            if start in failing:
+                raise requests.exceptions.ConnectionError("reset")
+            if start == "100" and feed[0] == 1000:
+                feed.insert(0, 1001)  # Published while paging: 901 shifts onto page 2
+            return self._feed_response(int(start), 100, 0, feed)
+
+        def number(filing):
+            return int(filing["title"].split("(")[1].strip(")"))
+
+        mock_get.side_effect = get
+        processed = set(range(1, 401))
+        client = SecEdgarClient(rate_limiter=RateLimiter(1000), max_feed_pages=3, max_retries=0)
+
+        def poll():
+            filings = client.get_latest_filings(lambda filings: any(number(f) in processed for f in filings))
+            processed.update(number(f) for f in filings)
+            return filings
+
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(len(poll()), 299)  # Page limit reached
+
+        feed[:0] = range(1051, 1001, -1)
+        failing.add("300")
+        with self.assertLogs(level="WARNING"):
+            self.assertEqual(len(poll()), 300)  # Stopped by the failed page
+
+        failing.clear()
+        with self.assertLogs(level="WARNING"):
+            poll()  # Past the first catch-up, then three pages until the limit
+        with self.assertNoLogs(level="WARNING"):
+            poll()
+        self.assertEqual(processed, set(range(1, 1052)))
+
+    @patch("src.sec_client.requests.Session.get")
+    def test_get_latest_filings_single_page_by_default(self, mock_get):
+        """
+        Test that without any_processed only the first page is read.
+        """
+        mock_get.side_effect = self._paged_feed(total=1000)
+
+        filings = SecEdgarClient().get_latest_filings()
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(filings), 100)
+
+
+FEED_XML = b"""<?xml version="1.0" encoding="UTF-8"?>
+<feed xmlns="http://www.w3.org/2005/Atom">
+  <entry>
+    <title>8-K - Example Corp (0001234567)</title>
+    <link href="https://www.sec.gov/Archives/edgar/data/1234567/0001234567-25-000001-index.html"/>
+    <summary>Report of unscheduled material events or corporate changes.</summary>
+    <published>2025-07-14T10:00:00-04:00</published>
+  </entry>
+</feed>""" + b"<!-- padding -->" * 200
+
+
+class FeedHandler(BaseHTTPRequestHandler):
+    """
+    Serves FEED_XML gzip-encoded with an ETag, honoring If-None-Match.
+    """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        if self.headers.get("If-None-Match") == '"v1"':
+            self.send_response(304)
+            self.send_header("ETag", '"v1"')
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        body = gzip.compress(FEED_XML)
+        self.send_response(200)
+        self.send_header("Content-Type", "application/atom+xml")
+        self.send_header("Content-Encoding", "gzip")
+        self.send_header("ETag", '"v1"')
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TestSecEdgarClientSession(unittest.TestCase):
+
+    def setUp(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), FeedHandler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = SecEdgarClient()
+        self.client.SEC_RSS_URL = (
+            f"http://127.0.0.1:{self.server.server_address[1]}/feed?start={{start}}&count={{count}}"
+        )
+
+    def tearDown(self):
+        self.client.session.close()
+        self.server.shutdown()
+        self.server.server_close()
+
+    @patch("src.sec_client.feedparser.parse", wraps=feedparser.parse)
+    def test_conditional_get_and_connection_reuse(self, mock_parse):
+        """
+        Test that an unchanged feed is answered with 304 and served from the last
+        parse, over a single kept-alive, gzip-encoded connection.
+        """
+        first = self.client.get_latest_filings()
+        second = self.client.get_latest_filings()
+
+        self.assertEqual(len(first), 1)
+        self.assertEqual(first, second)
+        mock_parse.assert_called_once()
+
+        stats = self.client.get_stats()
+        self.assertEqual(stats["requests"], 2)
+        self.assertEqual(stats["connections_opened"], 1)
+        self.assertEqual(stats["connections_reused"], 1)
+        self.assertEqual(stats["feed_not_modified"], 1)
+        self.assertEqual(stats["bytes_decoded"], len(FEED_XML))
+        self.assertLess(stats["bytes_received"], len(FEED_XML))
+        self.assertEqual(
+            stats["bytes_saved"], 2 * len(FEED_XML) - stats["bytes_received"]
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
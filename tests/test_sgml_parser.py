@@ -0,0 +1,217 @@
+import gzip
+import os
+import sys
+import tempfile
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.keyword_analyzer import KeywordAnalyzer
+from src.sgml_parser import DocumentFilter, iter_documents, iter_segments, type_selected
+
+SUBMISSION = """<SEC-DOCUMENT>0001234567-25-000001.txt : 20250714
+<SEC-HEADER>0001234567-25-000001.hdr.sgml : 20250714
+COMPANY CONFORMED NAME:\t\t\tEXAMPLE CORP
+</SEC-HEADER>
+<DOCUMENT>
+<TYPE>8-K
+<SEQUENCE>1
+<FILENAME>form8-k.htm
+<DESCRIPTION>8-K
+<TEXT>
+<html><body><p>We purchased Bitcoin during the quarter.</p></body></html>
+</TEXT>
+</DOCUMENT>
+<DOCUMENT>
+<TYPE>GRAPHIC
+<SEQUENCE>2
+<FILENAME>logo.jpg
+<TEXT>
+begin 644 logo.jpg
+M_]C_X  02D9)1@ ! 0$ 2 !( #_VP!# SOL ADA DOT
+end
+</TEXT>
+</DOCUMENT>
+<DOCUMENT>
+<TYPE>EX-101.INS
+<SEQUENCE>3
+<FILENAME>exco-20250714.xml
+<TEXT>
+<XBRL>
+<dei:TradingSymbol>DOT</dei:TradingSymbol>
+</XBRL>
+</TEXT>
+</DOCUMENT>
+<DOCUMENT>
+<TYPE>EX-99.1
+<SEQUENCE>4
+<FILENAME>ex99-1.pdf
+<TEXT>
+<PDF>
+begin 644 ex99-1.pdf
+M)5!$1BTQ+C0*)>+CS],*,2 P(&]B:@H I4>7!E("]#871A;&]G"B]086=E SOL
+end
+</PDF>
+</TEXT>
+</DOCUMENT>
+<DOCUMENT>
+<TYPE>EX-99.2
+<SEQUENCE>5
+<FILENAME>ex99-2.htm
+<TEXT>
+<p>Our stablecoin pilot continues.</p>
+</TEXT>
+</DOCUMENT>
+</SEC-DOCUMENT>
+"""
+
+
+class TestSgmlParser(unittest.TestCase):
+
+    def test_iter_documents(self):
+        """
+        Test that iter_documents yields every document with its type, filename,
+        body range and binary flag.
+        """
+        documents = list(iter_documents(SUBMISSION))
+
+        self.assertEqual(
+            [(doc.type, doc.filename, doc.binary) for doc in documents],
+            [
+                ("8-K", "form8-k.htm", False),
+                ("GRAPHIC", "logo.jpg", True),
+                ("EX-101.INS", "exco-20250714.xml", False),
+                ("EX-99.1", "ex99-1.pdf", True),
+                ("EX-99.2", "ex99-2.htm", False),
+            ],
+        )
+        first = documents[0]
+        self.assertEqual(
+            SUBMISSION[first.start:first.end],
+            "<html><body><p>We purchased Bitcoin during the quarter.</p></body></html>\n",
+        )
+
+    def test_iter_documents_bytes_offsets(self):
+        """
+        Test that iter_documents accepts bytes and reports byte offsets.
+        """
+        data = SUBMISSION.replace("EXAMPLE CORP", "EXAMPLE CORP é").encode("utf-8")
+        documents = list(iter_documents(data))
+
+        self.assertEqual(len(documents), 5)
+        self.assertEqual(documents[-1].type, "EX-99.2")
+        self.assertEqual(
+            data[documents[-1].start:documents[-1].end],
+            b"<p>Our stablecoin pilot continues.</p>\n",
+        )
+
+    def test_type_selected(self):
+        """
+        Test type matching, including dotted sub-types and include lists.
+        """
+        self.assertTrue(type_selected("10-K"))
+        self.assertFalse(type_selected("EX-101.INS"))
+        self.assertFalse(type_selected("graphic"))
+        self.assertTrue(type_selected("EX-99.1", include_types=["8-K", "EX-99"]))
+        self.assertFalse(type_selected("EX-10.1", include_types=["8-K", "EX-99"]))
+
+    def test_document_filter_skips_binary_and_xbrl(self):
+        """
+        Test that DocumentFilter only returns the header and text document bodies.
+        """
+        document_filter = DocumentFilter()
+        ranges = document_filter.ranges(SUBMISSION, len(SUBMISSION))
+        analyzed = "".join(SUBMISSION[start:end] for start, end in ranges)
+
+        self.assertIn("EXAMPLE CORP", analyzed)
+        self.assertIn("Bitcoin", analyzed)
+        self.assertIn("stablecoin", analyzed)
+        self.assertNotIn("begin 644", analyzed)
+        self.assertNotIn("TradingSymbol", analyzed)
+        self.assertGreater(document_filter.skipped_chars, 0)
+
+    def test_document_filter_marks_html_segments(self):
+        """
+        Test that segments of HTML document bodies are marked as HTML and carry
+        the number of their document, and that a bare HTML page is HTML too.
+        """
+        segments = DocumentFilter().segments(SUBMISSION, len(SUBMISSION))
+        marked = [(segment.document, segment.html) for segment in segments]
+
+        self.assertEqual(marked[0], (0, False))
+        self.assertIn((1, True), marked)
+        self.assertIn((5, False), marked)  # <p> fragment, not an HTML page
+        bare = "\n<!DOCTYPE html>\n<html><body><p>Bitcoin</p></body></html>\n"
+        self.assertEqual(
+            [segment.html for segment in DocumentFilter().segments(bare, len(bare))], [True]
+        )
+
+    def test_iter_segments(self):
+        """
+        Test that iter_segments selects the same documents as DocumentFilter, for
+        str and bytes, and marks HTML documents.
+        """
+        document_filter = DocumentFilter()
+        expected = [
+            SUBMISSION[segment.start:segment.end].strip()
+            for segment in document_filter.segments(SUBMISSION, len(SUBMISSION))
+        ]
+        segments = list(iter_segments(SUBMISSION))
+
+        # Only the text between documents, like the closing </SEC-DOCUMENT>, differs.
+        self.assertEqual(expected[-1], "</SEC-DOCUMENT>")
+        self.assertEqual([SUBMISSION[s.start:s.end].strip() for s in segments], [e for e in expected[:-1] if e])
+        self.assertEqual([(s.document, s.html) for s in segments], [(0, False), (1, True), (5, False)])
+        data = SUBMISSION.encode("utf-8")
+        self.assertEqual(
+            [(s.start, s.end) for s in iter_segments(data)], [(s.start, s.end) for s in segments]
+        )
+
+    def test_keyword_analyzer_analyze_path(self):
+        """
+        Test that analyzing a submission file, plain or gzip-compressed, gives the
+        same result as analyzing its text.
+        """
+        analyzer = KeywordAnalyzer()
+        expected = analyzer.analyze_filing(SUBMISSION)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            plain = os.path.join(tmp_dir, "0001234567-25-000001.txt")
+            with open(plain, "w", encoding="utf-8", newline="") as f:
+                f.write(SUBMISSION)
+            compressed = plain + ".gz"
+            with gzip.open(compressed, "wt", encoding="utf-8", newline="") as f:
+                f.write(SUBMISSION)
+
+            self.assertEqual(analyzer.analyze_path(plain), expected)
+            self.assertEqual(analyzer.analyze_path(compressed), expected)
+
+    def test_keyword_analyzer_ignores_skipped_documents(self):
+        """
+        Test that short tickers inside binary and XBRL documents are not reported,
+        whether the submission is analyzed whole or streamed line by line.
+        """
+        analyzer = KeywordAnalyzer()
+        chunks = SUBMISSION.splitlines(keepends=True)
+
+        for result in (analyzer.analyze_filing(SUBMISSION), analyzer.analyze_stream(chunks, max_snippets=None)):
+            self.assertTrue(result["crypto_detected"])
+            self.assertIn("Bitcoin", result["summary"])
+            self.assertIn("stablecoin", result["summary"])
+            self.assertNotIn("SOL", result["summary"])
+            self.assertNotIn("DOT", result["summary"])
+
+    def test_keyword_analyzer_include_types(self):
+        """
+        Test that include_types restricts the analysis to the chosen documents.
+        """
+        analyzer = KeywordAnalyzer(include_types=["EX-99"])
+        result = analyzer.analyze_filing(SUBMISSION)
+
+        self.assertTrue(result["crypto_detected"])
+        self.assertIn("stablecoin", result["summary"])
+        self.assertNotIn("Bitcoin", result["summary"])
+
+
+if __name__ == "__main__":
+    unittest.main()
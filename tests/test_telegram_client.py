@@ -1,12 +1,32 @@
 import os
 import sys
+import threading
 import unittest
+from collections import deque
 from unittest.mock import MagicMock, patch
 
 # Add the project root to the Python path
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.telegram_client import TelegramClient
+from telebot.apihelper import ApiTelegramException
+
+from src.rate_limiter import RateLimiter
+from src.telegram_client import MAX_MESSAGE_LENGTH, TelegramClient, build_digest, format_sec_alert, truncate_message
+
+TELEGRAM_ENV = {
+    "TELEGRAM_BOT_TOKEN": "123456:ABC-DEF1234ghIkl-zyx57W2v1u123ew11",
+    "TELEGRAM_CHAT_ID": "12345",
+    "TELEGRAM_CHAT_MESSAGES_PER_SECOND": "1000",
+}
+
+
+def make_filing(index: int) -> dict:
+    return {
+        "company_name": f"Corp {index}",
+        "form_type": "10-Q",
+        "filing_date": "2025-07-15",
+        "link": f"http://example.com/{index}",
+    }
 
 
 class TestTelegramClient(unittest.TestCase):
@@ -56,6 +76,100 @@ class TestTelegramClient(unittest.TestCase):
         # We don't need to assert anything here, just that no exception is raised
         client.send_sec_alert(filing_details, summary)
 
+    @patch.dict(os.environ, TELEGRAM_ENV)
+    @patch('telebot.TeleBot.send_message', new_callable=MagicMock)
+    def test_retry_after_429(self, mock_send_message):
+        """
+        Test that a 429 is retried after the retry_after delay Telegram asks for.
+        """
+        flood = ApiTelegramException(
+            "sendMessage", None,
+            {"error_code": 429, "description": "Too Many Requests", "parameters": {"retry_after": 7}},
+        )
+        mock_send_message.side_effect = [flood, None]
+        sleep = MagicMock()
+
+        client = TelegramClient(sleep=sleep)
+        client.send_sec_alert(make_filing(1), "Bitcoin")
+
+        self.assertEqual(mock_send_message.call_count, 2)
+        sleep.assert_called_once_with(7.0)
+
+    @patch.dict(os.environ, TELEGRAM_ENV)
+    @patch('telebot.TeleBot.send_message', new_callable=MagicMock)
+    def test_background_queue_coalesces_burst(self, mock_send_message):
+        """
+        Test that alerts queued while the sender waits are merged into digests that
+        stay under Telegram's message length limit, and that none is lost.
+        """
+        gate = threading.Event()
+        mock_send_message.side_effect = lambda **kwargs: gate.wait(5)
+
+        client = TelegramClient(background=True, global_limiter=RateLimiter(1000))
+        for index in range(40):
+            client.send_sec_alert(make_filing(index), "Bitcoin " * 20)
+        gate.set()
+        client.flush()
+        client.close()
+
+        texts = [c.kwargs["text"] for c in mock_send_message.call_args_list]
+        self.assertLess(len(texts), 40)
+        self.assertTrue(all(len(text) <= MAX_MESSAGE_LENGTH for text in texts))
+        joined = "".join(texts)
+        for index in range(40):
+            self.assertIn(f"http://example.com/{index})", joined)
+
+    def test_build_digest(self):
+        """
+        Test that build_digest stops before the length limit and truncates a single
+        over-long message.
+        """
+        message = format_sec_alert(make_filing(1), "x" * 1500)
+        text, count = build_digest(deque([message] * 5))
+        self.assertEqual(count, 2)
+        self.assertLessEqual(len(text), MAX_MESSAGE_LENGTH)
+
+        text, count = build_digest(deque(["y" * 5000, "z"]))
+        self.assertEqual((len(text), count), (MAX_MESSAGE_LENGTH, 1))
+
+    def test_truncate_message_at_line_break(self):
+        """
+        Test that an over-long message is cut after its last complete line, so a
+        Markdown entity on the next line is not split.
+        """
+        text = "*Title*\n" + "line\n" * 800 + "*" + "bold " * 200 + "*"
+
+        truncated = truncate_message(text)
+
+        self.assertLessEqual(len(truncated), MAX_MESSAGE_LENGTH)
+        self.assertTrue(truncated.endswith("line\n…"))
+        self.assertEqual(truncated.count("*"), 2)
+
+    @patch.dict(os.environ, TELEGRAM_ENV)
+    @patch('telebot.TeleBot.send_message', new_callable=MagicMock)
+    def test_delivered_keys_and_plain_text_fallback(self, mock_send_message):
+        """
+        Test that a key is reported as delivered only once the message was
+        accepted, that a message Telegram cannot parse as Markdown is sent as
+        plain text, and that a given up message is not reported.
+        """
+        unparsable = ApiTelegramException(
+            "sendMessage", None,
+            {"error_code": 400, "description": "Bad Request: can't parse entities: can't find end of entity"},
+        )
+        mock_send_message.side_effect = [unparsable, None, Exception("network down")]
+
+        client = TelegramClient(background=True, global_limiter=RateLimiter(1000))
+        client.send_sec_alert(make_filing(1), "snake_case", key="a")
+        client.flush()
+        self.assertEqual(client.take_delivered(), ["a"])
+        self.assertIsNone(mock_send_message.call_args.kwargs["parse_mode"])
+
+        client.send_sec_alert(make_filing(2), "Bitcoin", key="b")
+        client.close()
+        self.assertEqual(client.take_delivered(), [])
+        self.assertEqual(client.alerts_in_flight(), set())
+
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,72 @@
+import os
+import sys
+import unittest
+
+# Add the project root to the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.text_extraction import HtmlTextExtractor, extract_apy_rates, html_to_text
+
+FIXTURE = os.path.join(os.path.dirname(__file__), "..", "aave_html_structure.html")
+
+DOCUMENT = """<?xml version='1.0' encoding='ASCII'?>
+<html xmlns="http://www.w3.org/1999/xhtml">
+<head><title>8-K</title><style>.x { color: red }</style></head>
+<body>
+<div style="display:none"><ix:header><ix:hidden>
+<ix:nonNumeric name="dei:Security">Ethereum</ix:nonNumeric>
+</ix:hidden></ix:header></div>
+<p style="margin:0">We bought <span
+ style="font-weight:bold">Bitcoin</span>&#160;and&nbsp;the company&#8217;s
+treasury &amp; reserves grew.</p><p>Second paragraph.</p>
+<table><tr><td>Revenue</td><td>1,000</td></tr></table>
+<script>var p = "<p>Solana</p>";</script>
+<p>a < b</p>
+</body></html>
+"""
+
+
+class TestTextExtraction(unittest.TestCase):
+
+    def test_html_to_text(self):
+        """
+        Test that tags are removed, entities decoded and non-text elements dropped.
+        """
+        text = html_to_text(DOCUMENT)
+
+        self.assertIn("We bought Bitcoin and the company's\ntreasury & reserves grew.", text)
+        self.assertIn("Revenue 1,000", text)
+        self.assertIn("a < b", text)
+        self.assertNotIn("Ethereum", text)
+        self.assertNotIn("Solana", text)
+        self.assertNotIn("color", text)
+        self.assertNotIn("<", text.replace("a < b", ""))
+        self.assertTrue(text.isascii())
+        # Block-level tags start a new line
+        self.assertRegex(text, r"grew\.\n+Second paragraph\.\n")
+
+    def test_extractor_blocks_split_anywhere(self):
+        """
+        Test that feeding the document line by line gives the same text, even
+        with tags and skipped elements spanning lines.
+        """
+        extractor = HtmlTextExtractor()
+        streamed = "".join(extractor.feed(line) for line in DOCUMENT.splitlines(keepends=True))
+
+        self.assertEqual(streamed.split(), html_to_text(DOCUMENT).split())
+
+    def test_extract_apy_rates(self):
+        """
+        Test that the selective parse reads the APY of each ticker from the
+        saved Aave page.
+        """
+        with open(FIXTURE, encoding="utf-8") as f:
+            page = f.read()
+
+        rates = extract_apy_rates(page, ["USDT", "USDC", "DAI", "NOPE"], "marketListItemListItem_")
+
+        self.assertEqual(rates, {"USDT": "3.27%", "USDC": "4.02%", "DAI": "3.44%", "NOPE": None})
+
+
+if __name__ == "__main__":
+    unittest.main()